@@ -0,0 +1,291 @@
+"""Offline benchmarks for the ledger hot paths (no Sheets, no Streamlit server).
+
+    python bench/bench_hotpaths.py                      # 10k, 100k, 1M rows -> bench/results/*.json
+    python bench/bench_hotpaths.py --sizes 10000 --repeat 5
+    python bench/bench_hotpaths.py --compare bench/results/<older>.json
+
+The hot paths are imported from the myfin package (no page script, no Streamlit server); the
+session-scoped inputs they read (accounts, recurring prefs) go in st.session_state.
+The synthetic ledger is seeded, so the same --seed gives the same rows on every version.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_MODULES = ["config", "helpers", "perf", "sheets", "ledger", "storage", "analytics"]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+MERCHANT_WORDS = ["store", "market", "online", "purchase", "pos", "ref", "kitchen", "deli", "express",
+                  "centre", "north", "west", "plaza", "outlet", "depot", "services", "inc", "ltd"]
+
+
+def load_app_definitions(root: Path = ROOT) -> Dict[str, object]:
+    """One namespace over the myfin modules below the pages (definitions only, nothing renders)."""
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    app: Dict[str, object] = {}
+    for name in APP_MODULES:
+        app.update(vars(importlib.import_module(f"myfin.{name}")))
+    return app
+
+
+def synthetic_sheet_values(app: Dict[str, object], n: int, seed: int = 2026) -> List[List[str]]:
+    """Header + n rows as Sheets returns them (all strings), across every type/account/category."""
+    rng = np.random.default_rng(seed)
+    headers = list(app["TX_HEADERS"])
+    entry_types = list(app["ENTRY_TYPES"])
+    accounts = list(app["ALLOWED_ACCOUNTS"])
+    rules = app["DEFAULT_CATEGORY_RULES"]
+    categories = list(rules)
+    keywords = [k for ks in rules.values() for k in ks] or ["misc"]
+
+    types = rng.choice(entry_types, n, p=_type_weights(entry_types))
+    pay = np.where(np.isin(types, ["Debit", "LOC Draw"]), rng.choice(["Card", "Card", "Bank", "Cash"], n), "Bank")
+    acct = np.where((pay == "Card") | np.isin(types, ["CC Repay", "LOC Repay", "LOC Draw"]),
+                    rng.choice(accounts, n), "")
+    start = np.datetime64("2023-01-01")
+    days = rng.integers(0, 3 * 365, n)
+    dates = (start + days.astype("timedelta64[D]")).astype(str)
+    created = (start + days.astype("timedelta64[D]") + rng.integers(0, 86_400, n).astype("timedelta64[s]"))
+    amounts = np.round(rng.gamma(2.0, 40.0, n), 2)
+    cats = rng.choice(categories, n)
+    kw = rng.choice(keywords, n)
+    w1 = rng.choice(MERCHANT_WORDS, n)
+    w2 = rng.choice(MERCHANT_WORDS, n)
+    num = rng.integers(0, 99_999, n)
+    with_kw = rng.random(n) < 0.7
+
+    rows = []
+    for i in range(n):
+        note = f"{kw[i]} {w1[i]} #{num[i]}" if with_kw[i] else f"{w1[i]} {w2[i]} {num[i]}"
+        rows.append([
+            f"tx-{seed}-{i:07d}", dates[i], "Family", types[i], f"{amounts[i]:.2f}", pay[i], acct[i],
+            cats[i], note, f"{created[i]}", "",
+        ])
+    return [headers] + rows
+
+
+def _type_weights(entry_types: List[str]) -> List[float]:
+    base = {"Debit": 0.62, "Credit": 0.08, "Investment": 0.05, "CC Repay": 0.08, "International": 0.03,
+            "LOC Draw": 0.07, "LOC Repay": 0.07}
+    w = np.array([base.get(t, 0.02) for t in entry_types], dtype=float)
+    return list(w / w.sum())
+
+
+def synthetic_accounts(app: Dict[str, object]) -> pd.DataFrame:
+    rows = [{"Account": a, "Emoji": "💳", "Limit": 2000.0 + 1500.0 * i, "BillingDay": 5 + 6 * i}
+            for i, a in enumerate(app["ALLOWED_ACCOUNTS"])]
+    return app["accounts_frame_from_records"](rows)
+
+
+def synthetic_prefs(app: Dict[str, object], seed: int = 2026) -> List[dict]:
+    rng = np.random.default_rng(seed + 1)
+    accounts = list(app["ALLOWED_ACCOUNTS"])
+    return [{"MerchantKey": f"merchant {i}", "IsRecurring": True, "Amount": float(rng.integers(10, 300)),
+             "DayOfMonth": int(rng.integers(1, 29)), "Account": accounts[i % len(accounts)]}
+            for i in range(24)]
+
+
+class _StaticSheet:
+    """Stands in for the Transactions worksheet: returns prebuilt values, no I/O."""
+
+    def __init__(self, values: List[List[str]]):
+        self.values = values
+
+    def get_all_values(self):
+        return self.values
+
+
+def bench_cases(app: Dict[str, object], values: List[List[str]]) -> List[tuple]:
+    """(name, setup-free callable) pairs, in dependency order; state is shared through `ctx`."""
+    import streamlit as st
+
+    ctx: Dict[str, object] = {}
+    accounts = list(app["ALLOWED_ACCOUNTS"])
+    st.session_state["allowed_accounts_live"] = accounts
+    acct_df = synthetic_accounts(app)
+    st.session_state["prefs_list"] = synthetic_prefs(app)
+    rules = app["DEFAULT_CATEGORY_RULES"]
+
+    def parse():
+        ctx["tx"], _ = app["fetch_tx_full"](_StaticSheet(values))
+        ctx["raw"] = ctx["tx"]
+        ctx["month"] = ctx["tx"]["Month"].mode().iloc[0]
+
+    def compact():
+        # The app compacts on publish (_store_tx_df); cases below run on the compact frame.
+        ctx["tx"] = app["compact_tx_frame"](ctx["raw"], accounts)
+
+    def group_by_category(key):
+        return lambda: ctx[key].groupby("Category", observed=True)["Amount"].sum()
+
+    def filter_month_type(key):
+        return lambda: ctx[key][(ctx[key]["Month"] == ctx["month"]) & ctx[key]["Type"].isin(["Debit", "LOC Draw"])]
+
+    def balance():
+        ctx["ev"] = app["compute_balance_events"](ctx["tx"], accounts)
+
+    def month_sums():
+        ctx["chains"] = app["balance_chains"](app["balance_month_sums"](ctx["tx"], accounts)[0])
+        ctx["checkpoints"] = app["BalanceCheckpoints"]()
+
+    def month_window():
+        # The first run fills the checkpoints; best-of-repeats is the warm path the pages take.
+        ctx["window"] = app["month_balance_window"](ctx["tx"], ctx["month"], accounts, ctx["chains"],
+                                                    ctx["checkpoints"])
+
+    def classify_each():
+        classify = app["classify"]
+        for note in ctx["tx"]["Notes"].tolist():
+            classify(note, rules)
+
+    def sqlite_append():
+        # Fresh file per run, so repeats time the same bulk load.
+        path = Path(ctx.setdefault("tmp", tempfile.mkdtemp(prefix="myfin-bench-"))) / f"ledger-{time.time_ns()}.db"
+        ctx["store"] = app["SqliteLedgerStore"](path)
+        ctx["store"].append_many(values[1:])
+
+    def normalize_each():
+        normalize = getattr(app["normalize_merchant"], "__wrapped__", app["normalize_merchant"])  # uncached
+        for note in ctx["tx"]["Notes"].tolist():
+            normalize(note)
+
+    def merchant_keys():
+        app["normalize_merchant"].cache_clear()  # cold: every distinct note normalized once
+        app["merchant_keys"](ctx["tx"]["Notes"])
+
+    return [
+        ("parse_transactions", parse),
+        ("groupby_category_str", group_by_category("raw")),
+        ("filter_month_type_str", filter_month_type("raw")),
+        ("compact_tx_frame", compact),
+        ("groupby_category", group_by_category("tx")),
+        ("filter_month_type", filter_month_type("tx")),
+        ("effective_types", lambda: app["effective_types"](ctx["tx"])),
+        ("dash_type_series", lambda: app["_dash_type_series"](ctx["tx"])),
+        ("expense_flags", lambda: app["expense_flags"](ctx["tx"])),
+        ("is_nonexpense_movement", lambda: app["_is_nonexpense_movement"](ctx["tx"])),
+        ("compute_balance_events", balance),
+        ("util_table", lambda: app["util_table"](ctx["ev"], ctx["month"], acct_df)),
+        ("balance_month_sums", month_sums),
+        ("month_balance_window", month_window),
+        ("util_table_window", lambda: app["util_table"](ctx["window"][0], ctx["month"], acct_df, ctx["window"][1])),
+        ("classify", classify_each),
+        ("classify_many", lambda: app["classify_many"](ctx["tx"]["Notes"], rules)),
+        ("normalize_merchant", normalize_each),
+        ("merchant_keys", merchant_keys),
+        ("sqlite_append_many", sqlite_append),
+        ("sqlite_query_month", lambda: ctx["store"].query(ctx["month"])),
+    ]
+
+
+def run(sizes: List[int], repeat: int, seed: int) -> Dict[str, object]:
+    app = load_app_definitions()
+    results = []
+    for n in sizes:
+        t0 = time.perf_counter()
+        values = synthetic_sheet_values(app, n, seed)
+        print(f"[{n:>9,} rows] generated in {time.perf_counter() - t0:.2f}s", flush=True)
+        reps = repeat if n < 1_000_000 else 1
+        for name, fn in bench_cases(app, values):
+            if name not in _available(app):
+                continue
+            runs = []
+            for _ in range(reps):
+                t = time.perf_counter()
+                fn()
+                runs.append(time.perf_counter() - t)
+            results.append({"name": name, "rows": n, "best_s": min(runs), "mean_s": sum(runs) / len(runs),
+                            "runs": runs})
+            print(f"  {name:<24} best {min(runs) * 1000:10.1f} ms", flush=True)
+    return {"meta": _meta(seed, repeat), "results": results}
+
+
+def _available(app: Dict[str, object]) -> set:
+    names = {"parse_transactions": "fetch_tx_full", "groupby_category_str": "fetch_tx_full",
+             "filter_month_type_str": "fetch_tx_full", "compact_tx_frame": "compact_tx_frame",
+             "groupby_category": "compact_tx_frame", "filter_month_type": "compact_tx_frame",
+             "effective_types": "effective_types", "dash_type_series": "_dash_type_series",
+             "expense_flags": "expense_flags", "is_nonexpense_movement": "_is_nonexpense_movement",
+             "compute_balance_events": "compute_balance_events", "util_table": "util_table",
+             "balance_month_sums": "balance_month_sums", "month_balance_window": "month_balance_window",
+             "util_table_window": "month_balance_window",
+             "classify": "classify", "classify_many": "classify_many", "normalize_merchant": "normalize_merchant",
+             "merchant_keys": "merchant_keys",
+             "sqlite_append_many": "SqliteLedgerStore", "sqlite_query_month": "SqliteLedgerStore"}
+    return {case for case, fn in names.items() if fn in app}
+
+
+def _meta(seed: int, repeat: int) -> Dict[str, object]:
+    try:
+        rev = subprocess.run(["git", "-C", str(ROOT), "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        rev = ""
+    return {
+        "git_rev": rev,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "seed": seed,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def compare(base: Dict[str, object], new: Dict[str, object], threshold: float = 1.25) -> int:
+    """Print new/base ratios per case; returns how many cases regressed past `threshold`."""
+    old = {(r["name"], r["rows"]): r["best_s"] for r in base["results"]}
+    slower = 0
+    print(f"{'case':<24} {'rows':>9} {'base ms':>10} {'new ms':>10} {'ratio':>7}")
+    for r in new["results"]:
+        b = old.get((r["name"], r["rows"]))
+        if b is None:
+            continue
+        ratio = r["best_s"] / b if b > 0 else float("inf")
+        flag = "  <-- slower" if ratio > threshold else ""
+        slower += ratio > threshold
+        print(f"{r['name']:<24} {r['rows']:>9,} {b * 1000:10.1f} {r['best_s'] * 1000:10.1f} {ratio:7.2f}{flag}")
+    return slower
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    ap.add_argument("--repeat", type=int, default=3, help="runs per case (1M-row cases run once)")
+    ap.add_argument("--seed", type=int, default=2026)
+    ap.add_argument("--out", type=Path, help="results JSON (default: bench/results/<rev>-<time>.json)")
+    ap.add_argument("--compare", type=Path, help="earlier results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.25, help="new/base ratio reported as a regression")
+    args = ap.parse_args(argv)
+
+    report = run(args.sizes, args.repeat, args.seed)
+    out = args.out or RESULTS_DIR / f"{report['meta']['git_rev'] or 'worktree'}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"wrote {out}")
+
+    if args.compare:
+        base = json.loads(args.compare.read_text(encoding="utf-8"))
+        return 1 if compare(base, report, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Cold-start and per-rerun wall time of the whole app script (Streamlit AppTest, local_sheets backend).
+
+    python bench/bench_startup.py                        # 5,000-row ledger, 20 reruns per page
+    python bench/bench_startup.py --rows 50000 --reruns 40 --pages dashboard trends
+    python bench/bench_startup.py --app-dir /path/to/other/checkout   # e.g. an older revision
+
+The app tree (streamlit_app.py, myfin/, local_sheets.py) is copied to a temp dir so the replica and
+emulator files never touch the checkout. Each page is measured in a fresh interpreter: "cold" is
+the first script run (imports, replica load, first render), "rerun" the runs after it.
+
+AppTest compiles the script again on every run; the server compiles it once per process. One
+ScriptCache is shared across runs here so rerun times match the server (--no-script-cache to
+measure AppTest as is).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_FILES = ["streamlit_app.py", "local_sheets.py", "myfin"]
+PAGES = ["dashboard", "add", "creditbal", "trends", "transactions", "admin"]
+
+
+def _share_script_cache() -> None:
+    """Compile the script once per process, like the server (AppTest builds a cache per run)."""
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    shared = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: shared
+
+
+def _app_test(app_dir: Path, emulator: Path):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(app_dir / "streamlit_app.py"), default_timeout=300)
+    at.secrets["local_sheets"] = {"path": str(emulator), "latency_ms": 0, "reads_per_minute": 0,
+                                  "writes_per_minute": 0}
+    at.session_state["authed"] = True
+    at.query_params["mobile"] = "1"  # in-page navigation: the selected page runs inside the script
+    return at
+
+
+def synthetic_rows(n: int, seed: int = 2026) -> List[List[str]]:
+    rnd = random.Random(seed)
+    accounts = ["RBC VISA", "RBC Mastercard", "Line of Credit", "Canadian tire Mastercard - Grey", "Cash"]
+    types = ["Debit"] * 6 + ["Credit", "CC Repay", "LOC Draw", "LOC Repay", "International", "Investment"]
+    start = date.today() - timedelta(days=3 * 365)
+    rows = []
+    for i in range(n):
+        d = start + timedelta(days=rnd.randrange(3 * 365))
+        rows.append([str(uuid.UUID(int=rnd.getrandbits(128))), d.isoformat(), "Family", rnd.choice(types),
+                     f"{rnd.uniform(2, 900):.2f}", rnd.choice(["Card", "Card", "Bank", "Cash"]), rnd.choice(accounts),
+                     rnd.choice(["Groceries", "Fuel", "Dining", "Salary", "Uncategorized", "Shopping"]),
+                     f"{rnd.choice(['costco', 'uber', 'netflix', 'shell', 'amazon'])} {i % 97}",
+                     f"{d.isoformat()}T{i % 24:02d}:{i % 60:02d}:00", "", ""])
+    return rows
+
+
+def seed(work: Path, rows: int) -> None:
+    """First run creates the tabs; then the ledger is filled in and one more run syncs the replica.
+
+    Both runs get their own interpreter: the shared ledger and the emulator are process-wide, so
+    a run in this process would keep serving the empty first snapshot.
+    """
+    _child(work, "dashboard", 0)
+    emulator = work / "sheets.json"
+    data = json.loads(emulator.read_text(encoding="utf-8"))
+    for book in data["spreadsheets"].values():
+        for sheet in book["sheets"]:
+            if sheet["title"] == "transactions":
+                sheet["rows"] = sheet["rows"][:1] + synthetic_rows(rows)
+        book["modifiedTime"] = "seeded"
+    emulator.write_text(json.dumps(data), encoding="utf-8")
+    for db in (work / "app").glob("myfin_2026.db*"):
+        db.unlink()
+    r = _child(work, "dashboard", 0)
+    if r["rows"] != rows:
+        raise SystemExit(f"seeding failed: the app loaded {r['rows']} of {rows} rows")
+
+
+def _child(work: Path, page: str, reruns: int, no_script_cache: bool = False) -> Dict[str, object]:
+    cmd = [sys.executable, __file__, "--child", str(work), page, str(reruns)]
+    out = subprocess.run(cmd + (["--no-script-cache"] if no_script_cache else []),
+                         capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+    return json.loads(out)
+
+
+def measure(app_dir: Path, emulator: Path, page: str, reruns: int) -> Dict[str, object]:
+    t0 = time.perf_counter()
+    at = _app_test(app_dir, emulator)
+    at.query_params["p"] = page
+    at.run()
+    cold = time.perf_counter() - t0
+    runs = []
+    for _ in range(reruns):
+        t = time.perf_counter()
+        at.run()
+        runs.append(time.perf_counter() - t)
+    runs.sort() if runs else runs.append(0.0)
+    return {"page": page, "rows": len(at.session_state["tx_df"]), "cold_ms": round(cold * 1000, 1),
+            "rerun_p50_ms": round(statistics.median(runs) * 1000, 1),
+            "rerun_p95_ms": round(runs[int(0.95 * (len(runs) - 1))] * 1000, 1),
+            "errors": [str(e.value)[:200] for e in at.exception]}
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--reruns", type=int, default=20)
+    ap.add_argument("--pages", nargs="+", default=PAGES)
+    ap.add_argument("--app-dir", type=Path, default=ROOT)
+    ap.add_argument("--no-script-cache", action="store_true", help="recompile the script on every run")
+    ap.add_argument("--child", nargs=3, metavar=("WORK_DIR", "PAGE", "RERUNS"), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        work, page, reruns = Path(args.child[0]), args.child[1], int(args.child[2])
+        if not args.no_script_cache:
+            _share_script_cache()
+        print(json.dumps(measure(work / "app", work / "sheets.json", page, reruns)))
+        return 0
+
+    work = Path(tempfile.mkdtemp(prefix="myfin-startup-"))
+    app_dir = work / "app"
+    app_dir.mkdir()
+    for name in APP_FILES:
+        src = args.app_dir / name
+        if src.is_dir():
+            shutil.copytree(src, app_dir / name, ignore=shutil.ignore_patterns("__pycache__"))
+        elif src.exists():
+            shutil.copy2(src, app_dir / name)
+    seed(work, args.rows)
+
+    print(f"{'page':<14} {'cold ms':>9} {'rerun p50':>10} {'rerun p95':>10}")
+    for page in args.pages:
+        r = _child(work, page, args.reruns, args.no_script_cache)
+        print(f"{page:<14} {r['cold_ms']:9.1f} {r['rerun_p50_ms']:10.1f} {r['rerun_p95_ms']:10.1f}"
+              + (f"  errors: {r['errors']}" if r["errors"] else ""), flush=True)
+    shutil.rmtree(work, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,361 @@
+"""Local stand-in for the Google Sheets API surface the app uses (gspread-compatible).
+
+Lets the app (and gs_call's backoff) run and be load-tested offline. Enable it in
+.streamlit/secrets.toml in place of [gcp_service_account]:
+
+    [local_sheets]
+    path = "local_sheets.json"   # omit to keep everything in memory
+    latency_ms = 120             # added to every API call
+    reads_per_minute = 60        # Sheets' per-user read quota; 0 disables
+    writes_per_minute = 60
+
+Calls over quota raise gspread.exceptions.APIError carrying Google's 429 RESOURCE_EXHAUSTED body,
+so gs_call sees the same "[429] ... Quota exceeded ... Read requests" text as in production.
+Cells are stored as their string form (no formula or date evaluation). `LocalClient.stats()`
+returns per-method call counts and how many calls were throttled.
+"""
+from __future__ import annotations
+
+import collections
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import gspread
+import requests
+from gspread.utils import a1_range_to_grid_range, numericise_all, rowcol_to_a1
+
+QUOTA_WINDOW_SECS = 60.0
+QUOTA_MESSAGE = ("Quota exceeded for quota metric '{kind} requests' and limit '{kind} requests per minute per user' "
+                 "of service 'sheets.googleapis.com' for consumer 'project_number:0'.")
+
+
+def api_error(code: int, message: str, status: str) -> gspread.exceptions.APIError:
+    """An APIError built from a Google-shaped error response."""
+    resp = requests.Response()
+    resp.status_code = code
+    resp.headers["Content-Type"] = "application/json; charset=UTF-8"
+    resp._content = json.dumps({"error": {"code": code, "message": message, "status": status}}).encode("utf-8")
+    return gspread.exceptions.APIError(resp)
+
+
+def _cell(v: Any) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, float):
+        return str(int(v)) if v.is_integer() else format(v, ".15g")
+    return str(v)
+
+
+def _trim(row: List[str]) -> List[str]:
+    end = len(row)
+    while end and row[end - 1] == "":
+        end -= 1
+    return row[:end]
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class _Quota:
+    """Sliding one-minute window of request timestamps."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = int(per_minute)
+        self.calls: collections.deque = collections.deque()
+
+    def take(self, now: float) -> bool:
+        if self.per_minute <= 0:
+            return True
+        while self.calls and now - self.calls[0] >= QUOTA_WINDOW_SECS:
+            self.calls.popleft()
+        if len(self.calls) >= self.per_minute:
+            return False
+        self.calls.append(now)
+        return True
+
+
+class LocalBackend:
+    """State of one emulated account: spreadsheets, quota windows, latency and counters."""
+
+    def __init__(self, path: Optional[str] = None, latency_ms: float = 0.0,
+                 reads_per_minute: int = 60, writes_per_minute: int = 60):
+        self.lock = threading.RLock()
+        self.path = Path(path) if path else None
+        self.latency = float(latency_ms) / 1000.0
+        self.reads = _Quota(reads_per_minute)
+        self.writes = _Quota(writes_per_minute)
+        self.stats: collections.Counter = collections.Counter()
+        self.books: Dict[str, dict] = {}
+        if self.path is not None and self.path.exists():
+            self.books = json.loads(self.path.read_text(encoding="utf-8")).get("spreadsheets", {})
+
+    def request(self, kind: str, method: str) -> None:
+        """Account for one API request: latency, then quota ("read"/"write"/"meta"), then counters."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.stats[method] += 1
+            quota = {"read": self.reads, "write": self.writes}.get(kind)
+            if quota is not None and not quota.take(time.monotonic()):
+                self.stats["throttled"] += 1
+                raise api_error(429, QUOTA_MESSAGE.format(kind=kind.capitalize()), "RESOURCE_EXHAUSTED")
+
+    def touch(self, book: dict) -> None:
+        """Record a write: bump modifiedTime and persist."""
+        book["modifiedTime"] = _now_iso()
+        if self.path is None:
+            return
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix=self.path.name, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump({"spreadsheets": self.books}, fh, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+class LocalWorksheet:
+    def __init__(self, backend: LocalBackend, book: dict, sheet: dict):
+        self._backend = backend
+        self._book = book
+        self._sheet = sheet
+
+    @property
+    def id(self) -> int:
+        return self._sheet["id"]
+
+    @property
+    def title(self) -> str:
+        return self._sheet["title"]
+
+    @property
+    def _rows(self) -> List[List[str]]:
+        return self._sheet["rows"]
+
+    def __repr__(self) -> str:
+        return f"<LocalWorksheet {self.title!r} id:{self.id}>"
+
+    # ---- reads -------------------------------------------------------------
+    def _range(self, a1: str) -> List[List[str]]:
+        g = a1_range_to_grid_range(a1.split("!")[-1])
+        r0, r1 = g.get("startRowIndex", 0), g.get("endRowIndex", len(self._rows))
+        c0, c1 = g.get("startColumnIndex", 0), g.get("endColumnIndex", None)
+        out = [_trim(list(r[c0:c1])) for r in self._rows[r0:r1]]
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def row_values(self, row: int, **kwargs) -> List[str]:
+        self._backend.request("read", "row_values")
+        with self._backend.lock:
+            return _trim(list(self._rows[row - 1])) if row <= len(self._rows) else []
+
+    def get_all_values(self, **kwargs) -> List[List[str]]:
+        self._backend.request("read", "get_all_values")
+        with self._backend.lock:
+            rows = self._range("A:ZZZ")
+        width = max((len(r) for r in rows), default=0)
+        return [r + [""] * (width - len(r)) for r in rows]
+
+    def get_all_records(self, head: int = 1, default_blank: Any = "", empty2zero: bool = False,
+                        **kwargs) -> List[Dict[str, Any]]:
+        self._backend.request("read", "get_all_records")
+        with self._backend.lock:
+            rows = [list(r) for r in self._rows]
+        if len(rows) < head:
+            return []
+        keys = rows[head - 1]
+        out = []
+        for r in rows[head:]:
+            r = (r + [""] * len(keys))[:len(keys)]
+            out.append(dict(zip(keys, numericise_all(r, empty2zero=empty2zero, default_blank=default_blank))))
+        return out
+
+    def get(self, range_name: Optional[str] = None, **kwargs) -> List[List[str]]:
+        self._backend.request("read", "get")
+        with self._backend.lock:
+            return self._range(range_name or "A:ZZZ")
+
+    def batch_get(self, ranges: List[str], **kwargs) -> List[List[List[str]]]:
+        self._backend.request("read", "batch_get")
+        with self._backend.lock:
+            return [self._range(r) for r in ranges]
+
+    # ---- writes ------------------------------------------------------------
+    def _write_block(self, a1: str, values: List[List[Any]]) -> dict:
+        g = a1_range_to_grid_range(a1.split("!")[-1])
+        r0, c0 = g.get("startRowIndex", 0), g.get("startColumnIndex", 0)
+        for i, row in enumerate(values):
+            while len(self._rows) <= r0 + i:
+                self._rows.append([])
+            cur = self._rows[r0 + i]
+            cur.extend([""] * (c0 + len(row) - len(cur)))
+            for j, v in enumerate(row):
+                cur[c0 + j] = _cell(v)
+            self._rows[r0 + i] = _trim(cur)
+        width = max((len(r) for r in values), default=1)
+        end = rowcol_to_a1(r0 + max(len(values), 1), c0 + max(width, 1))
+        return {"updatedRange": f"'{self.title}'!{rowcol_to_a1(r0 + 1, c0 + 1)}:{end}",
+                "updatedRows": len(values), "updatedCells": sum(len(r) for r in values)}
+
+    def update(self, values: Any = None, range_name: Optional[str] = None, **kwargs) -> dict:
+        if isinstance(values, str) and not isinstance(range_name, str):
+            values, range_name = range_name, values  # legacy update("A1", [[...]]) order
+        self._backend.request("write", "update")
+        with self._backend.lock:
+            resp = self._write_block(range_name or "A1", values or [])
+            self._backend.touch(self._book)
+        return {"spreadsheetId": self._book["id"], **resp}
+
+    def batch_update(self, data: List[dict], **kwargs) -> dict:
+        self._backend.request("write", "batch_update")
+        with self._backend.lock:
+            responses = [self._write_block(d["range"], d["values"]) for d in data]
+            self._backend.touch(self._book)
+        return {"spreadsheetId": self._book["id"], "responses": responses}
+
+    def append_rows(self, values: List[List[Any]], **kwargs) -> dict:
+        self._backend.request("write", "append_rows")
+        with self._backend.lock:
+            last = len(self._rows)
+            while last and not self._rows[last - 1]:
+                last -= 1
+            del self._rows[last:]
+            updates = self._write_block(f"A{last + 1}", values)
+            self._backend.touch(self._book)
+        return {"spreadsheetId": self._book["id"], "tableRange": f"'{self.title}'!A1", "updates": updates}
+
+    def append_row(self, values: List[Any], **kwargs) -> dict:
+        return self.append_rows([values], **kwargs)
+
+    def insert_row(self, values: List[Any], index: int = 1, **kwargs) -> dict:
+        self._backend.request("write", "insert_row")
+        with self._backend.lock:
+            while len(self._rows) < index - 1:
+                self._rows.append([])
+            self._rows.insert(index - 1, [])
+            resp = self._write_block(f"A{index}", [values])
+            self._backend.touch(self._book)
+        return {"spreadsheetId": self._book["id"], **resp}
+
+    def delete_rows(self, start_index: int, end_index: Optional[int] = None) -> dict:
+        self._backend.request("write", "delete_rows")
+        with self._backend.lock:
+            del self._rows[start_index - 1:(end_index or start_index)]
+            self._backend.touch(self._book)
+        return {"spreadsheetId": self._book["id"]}
+
+    def clear(self) -> dict:
+        self._backend.request("write", "clear")
+        with self._backend.lock:
+            self._rows.clear()
+            self._backend.touch(self._book)
+        return {"spreadsheetId": self._book["id"]}
+
+
+class LocalSpreadsheet:
+    def __init__(self, backend: LocalBackend, book: dict):
+        self._backend = backend
+        self._book = book
+
+    @property
+    def id(self) -> str:
+        return self._book["id"]
+
+    @property
+    def title(self) -> str:
+        return self._book["title"]
+
+    def _ws(self, sheet: dict) -> LocalWorksheet:
+        return LocalWorksheet(self._backend, self._book, sheet)
+
+    def worksheets(self, **kwargs) -> List[LocalWorksheet]:
+        self._backend.request("read", "worksheets")
+        with self._backend.lock:
+            return [self._ws(s) for s in self._book["sheets"]]
+
+    def worksheet(self, title: str) -> LocalWorksheet:
+        self._backend.request("read", "worksheet")
+        with self._backend.lock:
+            for s in self._book["sheets"]:
+                if s["title"] == title:
+                    return self._ws(s)
+        raise gspread.exceptions.WorksheetNotFound(title)
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> LocalWorksheet:
+        self._backend.request("write", "add_worksheet")
+        with self._backend.lock:
+            if any(s["title"] == title for s in self._book["sheets"]):
+                raise api_error(400, f'A sheet with the name "{title}" already exists. Please enter another name.',
+                                "INVALID_ARGUMENT")
+            sheet = {"id": max((s["id"] for s in self._book["sheets"]), default=0) + 1, "title": title, "rows": []}
+            self._book["sheets"].append(sheet)
+            self._backend.touch(self._book)
+        return self._ws(sheet)
+
+    def values_batch_get(self, ranges: List[str], params: Optional[dict] = None) -> dict:
+        """spreadsheets.values.batchGet: one read request for ranges across tabs ('Tab' or 'Tab'!A1:B2)."""
+        self._backend.request("read", "values_batch_get")
+        out = []
+        with self._backend.lock:
+            sheets = {s["title"]: s for s in self._book["sheets"]}
+            for rng in ranges:
+                title, _, a1 = rng.partition("!")
+                if title.startswith("'") and title.endswith("'"):
+                    title = title[1:-1].replace("''", "'")
+                if title not in sheets:
+                    raise api_error(400, f"Unable to parse range: {rng}", "INVALID_ARGUMENT")
+                values = self._ws(sheets[title])._range(a1 or "A:ZZZ")
+                out.append({"range": rng, "majorDimension": "ROWS", "values": values} if values
+                           else {"range": rng, "majorDimension": "ROWS"})
+        return {"spreadsheetId": self.id, "valueRanges": out}
+
+    def get_lastUpdateTime(self) -> str:
+        """Drive modifiedTime; a metadata call, not counted against the Sheets quota."""
+        self._backend.request("meta", "get_lastUpdateTime")
+        with self._backend.lock:
+            return self._book["modifiedTime"]
+
+
+class LocalClient:
+    """Drop-in for the gspread.Client returned by gspread.authorize (open by title or key)."""
+
+    def __init__(self, backend: LocalBackend):
+        self.backend = backend
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "LocalClient":
+        return cls(LocalBackend(path=cfg.get("path") or None,
+                                latency_ms=float(cfg.get("latency_ms", 0) or 0),
+                                reads_per_minute=int(cfg.get("reads_per_minute", 60)),
+                                writes_per_minute=int(cfg.get("writes_per_minute", 60))))
+
+    def open(self, title: str, **kwargs) -> LocalSpreadsheet:
+        """Open (or, unlike Google, create) the spreadsheet called `title`."""
+        self.backend.request("meta", "open")
+        with self.backend.lock:
+            for book in self.backend.books.values():
+                if book["title"] == title:
+                    return LocalSpreadsheet(self.backend, book)
+            book = {"id": uuid.uuid4().hex, "title": title, "sheets": [], "modifiedTime": ""}
+            self.backend.books[book["id"]] = book
+            self.backend.touch(book)
+            return LocalSpreadsheet(self.backend, book)
+
+    def open_by_key(self, key: str) -> LocalSpreadsheet:
+        self.backend.request("meta", "open_by_key")
+        with self.backend.lock:
+            if key not in self.backend.books:
+                raise gspread.exceptions.SpreadsheetNotFound(key)
+            return LocalSpreadsheet(self.backend, self.backend.books[key])
+
+    def stats(self) -> Dict[str, int]:
+        with self.backend.lock:
+            return dict(self.backend.stats)
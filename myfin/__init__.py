@@ -0,0 +1,5 @@
+"""NishanthFinTrack 2026: the app behind streamlit_app.py, split by concern.
+
+config → theme / helpers / perf → sheets → ledger → storage → analytics → pages → app (each module
+only imports from the ones before it).
+"""
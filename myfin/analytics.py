@@ -0,0 +1,818 @@
+"""Credit utilization / balance checkpoints, the dashboard aggregates and transaction search."""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import re
+import sqlite3
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from myfin.config import ACCOUNT_EMOJI_DEFAULT
+from myfin.helpers import cat_label, clamp_day, money
+from myfin.ledger import effective_types, expense_flags
+from myfin.storage import _sqlite_ledger_store, ledger_config, live_accounts, replica
+
+
+# =============================
+# Credit cycle / utilization
+# =============================
+BALANCE_EVENT_COLUMNS = ["Date", "Month", "Account", "Delta", "Balance", "Kind"]
+
+
+def _balance_use_rows(tx: pd.DataFrame, accounts: List[str]) -> pd.DataFrame:
+    """Charge/payment rows for the credit accounts, in balance-replay order (Date, CreatedAt)."""
+    df = tx[tx["Account"].isin(accounts)]
+    charges = df[((df["Type"] == "Debit") & (df["Pay"] == "Card")) | (df["Type"] == "LOC Draw")].copy()
+    charges["Delta"] = charges["Amount"]
+    charges["Kind"] = "Charge"
+
+    pays = df[(df["Type"] == "CC Repay") | (df["Type"] == "LOC Repay")].copy()
+    pays["Delta"] = -pays["Amount"]
+    pays["Kind"] = "Payment"
+
+    use = pd.concat([charges, pays], ignore_index=True)
+    if use.empty:
+        return use
+    use["_sort"] = use["CreatedAt"].fillna("")
+    use.sort_values(["Date", "_sort"], inplace=True)
+    return use
+
+
+def _floored_running_balance(codes, deltas, opening=None):
+    """bal[i] = max(0, bal[prev event of same account] + delta[i]), vectorized.
+
+    Events are regrouped per account (stable, so time order is kept). Zero-floor resets are
+    guessed from the reflected cumulative sum S - min(0, cummin S), then every run between
+    resets is summed with np.cumsum — the same sequential additions the scalar loop does — and
+    the guess is re-checked (run sum <= 0 exactly where a reset was assumed). A few passes
+    converge on float ties; if not, the scalar loop is used, so results are always identical.
+    """
+    n = len(deltas)
+    codes = np.asarray(codes)
+    order = np.argsort(codes, kind="stable")
+    c_o = codes[order]
+    d_o = np.asarray(deltas, dtype=float)[order].copy()
+    acct_start = np.ones(n, dtype=bool)
+    acct_start[1:] = c_o[1:] != c_o[:-1]
+    if opening is not None:
+        d_o[acct_start] = np.asarray(opening, dtype=float)[c_o[acct_start]] + d_o[acct_start]
+
+    cum = pd.Series(d_o).groupby(c_o).cumsum()
+    floor = np.minimum(cum.groupby(c_o).cummin().to_numpy(), 0.0)
+    reset = (cum.to_numpy() - floor) <= 0
+
+    run = np.empty(n, dtype=float)
+    for _ in range(8):
+        starts = acct_start.copy()
+        starts[1:] |= reset[:-1] & ~acct_start[1:]
+        bounds = np.flatnonzero(starts).tolist() + [n]
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            np.cumsum(d_o[lo:hi], out=run[lo:hi])
+        new_reset = ~(run > 0)
+        if np.array_equal(new_reset, reset):
+            break
+        reset = new_reset
+    else:
+        bal = {}
+        for i in range(n):
+            run[i] = max(0.0, bal.get(c_o[i], 0.0) + d_o[i]) if not acct_start[i] else max(0.0, d_o[i])
+            bal[c_o[i]] = run[i]
+        reset = ~(run > 0)
+
+    out = np.empty(n, dtype=float)
+    out[order] = np.where(reset, 0.0, run)
+    return out
+
+
+def _balance_events_from_use(use: pd.DataFrame, opening: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    accts = use["Account"].to_numpy(dtype=object)
+    codes, uniq = pd.factorize(accts)
+    seed = None
+    if opening:
+        seed = [float(opening.get(a, 0.0)) for a in uniq]
+    delta = use["Delta"].astype(float).to_numpy()
+    bal = _floored_running_balance(codes, delta, seed)
+    return pd.DataFrame({
+        "Date": use["Date"].to_numpy(),
+        "Month": use["Month"].to_numpy(dtype=object),
+        "Account": accts,
+        "Delta": delta,
+        "Balance": bal,
+        "Kind": use["Kind"].to_numpy(dtype=object),
+    })
+
+
+def _last_use_key(use: pd.DataFrame):
+    return (use["Date"].iloc[-1], str(use["_sort"].iloc[-1]))
+
+
+def compute_balance_events(tx: pd.DataFrame, accounts: Optional[List[str]] = None) -> pd.DataFrame:
+    """Per-account running balance after every charge/payment, floored at zero after each event."""
+    events, _ = _compute_balance_events_keyed(tx, accounts)
+    return events
+
+
+def _compute_balance_events_keyed(tx: pd.DataFrame, accounts: Optional[List[str]] = None):
+    use = _balance_use_rows(tx, list(live_accounts() if accounts is None else accounts))
+    if use.empty:
+        return pd.DataFrame(columns=BALANCE_EVENT_COLUMNS), None
+    return _balance_events_from_use(use), _last_use_key(use)
+
+
+def extend_balance_events(events: pd.DataFrame, last_key, new_tx: pd.DataFrame,
+                          accounts: Optional[List[str]] = None):
+    """Extend `events` with the events of `new_tx` (rows appended to the ledger).
+
+    Each account resumes from its last computed Balance. Only valid when every new event
+    replays strictly after `last_key` (the (Date, CreatedAt) of the last computed event);
+    returns None otherwise and the caller recomputes from scratch.
+    """
+    use = _balance_use_rows(new_tx, list(live_accounts() if accounts is None else accounts))
+    if use.empty:
+        return events, last_key
+    if last_key is None:
+        return (_balance_events_from_use(use), _last_use_key(use)) if events.empty else None
+    first_date, first_sort = use["Date"].iloc[0], str(use["_sort"].iloc[0])
+    last_date, last_sort = last_key
+    if pd.isna(last_date) or pd.isna(first_date) or use["Date"].isna().any():
+        return None
+    if not (first_date > last_date or (first_date == last_date and first_sort > last_sort)):
+        return None
+    opening = events.groupby("Account", sort=False)["Balance"].last().to_dict() if not events.empty else {}
+    new_events = _balance_events_from_use(use, opening)
+    return pd.concat([events, new_events], ignore_index=True), _last_use_key(use)
+
+
+def balance_events(tx_df: pd.DataFrame) -> pd.DataFrame:
+    """compute_balance_events for the session ledger, cached per tx_version.
+
+    When the ledger only grew at the end (delta sync / appends), the cached events are
+    extended from the last balances instead of replaying the whole history.
+    """
+    version = st.session_state.get("tx_version")
+    accts = tuple(live_accounts())
+    cache = st.session_state.get("_bal_events_cache")
+    if cache and cache["accounts"] == accts and tx_df is st.session_state.get("tx_df"):
+        if cache["version"] == version:
+            return cache["events"]
+        base_rows = (st.session_state.get("tx_lineage") or {}).get(cache["version"])
+        if base_rows is not None:
+            ext = extend_balance_events(cache["events"], cache["last_key"], tx_df.iloc[base_rows:], list(accts))
+            if ext is not None:
+                events, last_key = ext
+                st.session_state["_bal_events_cache"] = {"version": version, "accounts": accts, "events": events, "last_key": last_key}
+                return events
+    events, last_key = _compute_balance_events_keyed(tx_df, list(accts))
+    if tx_df is st.session_state.get("tx_df"):
+        st.session_state["_bal_events_cache"] = {"version": version, "accounts": accts, "events": events, "last_key": last_key}
+    return events
+
+
+# Month-end checkpoints (balance_checkpoints table): utilization for month M replays only M-1
+# and M (the billing cycle starts in M-1) from each account's balance at the end of the month
+# before. A checkpoint stays valid while the digest chain of that account's charges/payments up
+# to its month is unchanged, so an edit invalidates only checkpoints at or after its month.
+_HASH_MASK = (1 << 64) - 1
+
+
+def _balance_rows_mask(tx: pd.DataFrame, accounts: List[str]) -> np.ndarray:
+    """Rows _balance_use_rows turns into charge/payment events."""
+    typ = tx["Type"]
+    charge_or_pay = ((typ == "Debit") & (tx["Pay"] == "Card")) | typ.isin(["LOC Draw", "CC Repay", "LOC Repay"])
+    return (tx["Account"].isin(accounts) & charge_or_pay).to_numpy()
+
+
+def balance_month_sums(tx: pd.DataFrame, accounts: List[str]) -> Tuple[Dict[Tuple[str, str], int], bool]:
+    """Order-free digest of each (account, month)'s charges/payments; True if any is undated.
+
+    Row hashes are summed mod 2**64, so rows appended later just add to their month.
+    """
+    use = tx.loc[_balance_rows_mask(tx, accounts), ["Account", "Month", "Date", "CreatedAt", "Amount", "Type"]]
+    if use.empty:
+        return {}, False
+    h = pd.util.hash_pandas_object(use[["Date", "CreatedAt", "Amount", "Type"]], index=False)
+    sums = h.groupby([use["Account"].to_numpy(dtype=object), use["Month"].to_numpy(dtype=object)]).sum()
+    return {k: int(v) & _HASH_MASK for k, v in sums.items()}, bool(use["Date"].isna().any())
+
+
+def balance_chains(sums: Dict[Tuple[str, str], int]) -> Dict[str, Dict[str, str]]:
+    """account -> month -> digest of that account's events in every month up to and including it."""
+    out: Dict[str, Dict[str, str]] = {}
+    prev: Dict[str, str] = {}
+    for acct, month in sorted(sums):
+        prev[acct] = hashlib.sha1(f"{prev.get(acct, '')}|{month}|{sums[(acct, month)]}".encode()).hexdigest()[:20]
+        out.setdefault(acct, {})[month] = prev[acct]
+    return out
+
+
+def balance_digests(tx_df: pd.DataFrame) -> Tuple[Dict[str, Dict[str, str]], bool]:
+    """balance_chains (+ undated flag) for the session ledger, cached per tx_version.
+
+    Appends (tx_lineage) add the new rows' hashes to the cached sums instead of rehashing.
+    """
+    version = st.session_state.get("tx_version")
+    accts = tuple(live_accounts())
+    cache = st.session_state.get("_bal_digest_cache")
+    sums = None
+    if cache and cache["accounts"] == accts and tx_df is st.session_state.get("tx_df"):
+        if cache["version"] == version:
+            return cache["chains"], cache["undated"]
+        base_rows = (st.session_state.get("tx_lineage") or {}).get(cache["version"])
+        if base_rows is not None:
+            add, undated = balance_month_sums(tx_df.iloc[base_rows:], list(accts))
+            sums = dict(cache["sums"])
+            for k, v in add.items():
+                sums[k] = (sums.get(k, 0) + v) & _HASH_MASK
+            undated = undated or cache["undated"]
+    if sums is None:
+        sums, undated = balance_month_sums(tx_df, list(accts))
+    chains = balance_chains(sums)
+    if tx_df is st.session_state.get("tx_df"):
+        st.session_state["_bal_digest_cache"] = {"version": version, "accounts": accts, "sums": sums,
+                                                 "chains": chains, "undated": undated}
+    return chains, undated
+
+
+class BalanceCheckpoints:
+    """(account, month) -> (month-end balance, chain) in the local ledger database (or in memory).
+
+    Only a cache: a failed write is dropped and the balances are replayed next time.
+    """
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None, lock=None):
+        self.conn = conn
+        self.lock = lock or threading.RLock()
+        self.mem: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
+    def load(self) -> Dict[Tuple[str, str], Tuple[float, str]]:
+        if self.conn is None:
+            with self.lock:
+                return dict(self.mem)
+        with self.lock:
+            rows = self.conn.execute("SELECT card_name, month, balance, chain FROM balance_checkpoints").fetchall()
+        return {(a, m): (float(b), c) for a, m, b, c in rows}
+
+    def save(self, rows: List[Tuple[str, str, float, str]]) -> None:
+        if not rows:
+            return
+        with self.lock:
+            if self.conn is None:
+                self.mem.update({(a, m): (b, c) for a, m, b, c in rows})
+                return
+            try:
+                with self.conn:
+                    self.conn.executemany("INSERT OR REPLACE INTO balance_checkpoints(card_name, month, balance, chain) "
+                                          "VALUES (?, ?, ?, ?)", rows)
+            except sqlite3.Error:
+                pass
+
+
+@st.cache_resource
+def balance_checkpoints() -> BalanceCheckpoints:
+    cfg = ledger_config()
+    if cfg["backend"] == "sqlite":
+        store = _sqlite_ledger_store(cfg["path"])
+        return BalanceCheckpoints(store.conn, store.lock)
+    rep = replica()
+    return BalanceCheckpoints(rep.conn, rep.lock) if rep is not None else BalanceCheckpoints()
+
+
+def _months_mask(months: pd.Series, after: str, before: str) -> np.ndarray:
+    """after < Month < before ("YYYY-MM" strings sort in time order); "" leaves that side open."""
+    if isinstance(months.dtype, pd.CategoricalDtype):
+        ok = _months_mask(pd.Series(months.cat.categories.to_numpy(dtype=object)), after, before)
+        return np.append(ok, False)[months.cat.codes.to_numpy()]  # code -1 (missing) -> False
+    m = months.to_numpy(dtype=object)
+    ok = np.asarray(m < before, dtype=bool) if before else np.ones(len(m), dtype=bool)
+    if after:
+        ok &= np.asarray(m > after, dtype=bool)
+    return ok
+
+
+def _checkpoint_rows(events: pd.DataFrame, chains: Dict[str, Dict[str, str]],
+                     stored: Dict[Tuple[str, str], Tuple[float, str]]) -> List[Tuple[str, str, float, str]]:
+    """Month-end balances of `events` whose stored checkpoint is missing or stale."""
+    ends = events.groupby(["Account", "Month"], sort=False)["Balance"].last()
+    return [(a, m, float(b), chains[a][m]) for (a, m), b in ends.items()
+            if stored.get((a, m), (None, None))[1] != chains[a][m]]
+
+
+def month_balance_window(tx: pd.DataFrame, month: str, accounts: List[str], chains: Dict[str, Dict[str, str]],
+                         store: BalanceCheckpoints) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """Balance events of `month` and the month before it, plus each account's balance before them.
+
+    Opening balances come from the latest checkpoint that still matches `chains`, replaying only
+    the months after it; every month-end computed on the way is stored for next time.
+    Dated events only (callers fall back to balance_events otherwise).
+    """
+    start = str(pd.Period(month, freq="M") - 1)
+    stored = store.load()
+    opening: Dict[str, float] = {}
+    resume: Dict[str, Tuple[str, float]] = {}
+    for acct in accounts:
+        chain = chains.get(acct, {})
+        months = [m for m in chain if m < start]
+        if not months:
+            continue
+        for m in reversed(months):
+            ck = stored.get((acct, m))
+            if ck is not None and ck[1] == chain[m]:
+                break
+        else:
+            m, ck = "", None
+        if m == months[-1]:
+            opening[acct] = ck[0]
+        else:
+            resume[acct] = (m, ck[0] if ck is not None else 0.0)
+
+    saves = []
+    if resume:
+        mask = np.zeros(len(tx), dtype=bool)
+        for acct, (after, _) in resume.items():
+            mask |= (tx["Account"] == acct).to_numpy() & _months_mask(tx["Month"], after, start)
+        use = _balance_use_rows(tx[mask], list(resume))
+        opening.update({a: b for a, (_, b) in resume.items()})
+        if not use.empty:
+            ev = _balance_events_from_use(use, opening)
+            saves += _checkpoint_rows(ev, chains, stored)
+            opening.update(ev.groupby("Account", sort=False)["Balance"].last().to_dict())
+
+    use = _balance_use_rows(tx[_months_mask(tx["Month"], str(pd.Period(start, freq="M") - 1),
+                                            str(pd.Period(month, freq="M") + 1))], accounts)
+    if use.empty:
+        events = pd.DataFrame(columns=BALANCE_EVENT_COLUMNS)
+    else:
+        events = _balance_events_from_use(use, opening)
+        saves += _checkpoint_rows(events, chains, stored)
+    store.save(saves)
+    return events, opening
+
+
+def credit_util_table(tx_df: pd.DataFrame, month: str, acct_df: pd.DataFrame) -> pd.DataFrame:
+    """util_table for the session ledger from month-end checkpoints: two months of events, not
+    the whole history. Undated charges/payments fall back to the full replay (balance_events)."""
+    chains, undated = balance_digests(tx_df)
+    try:
+        pd.Period(month, freq="M")
+    except Exception:
+        undated = True
+    if undated:
+        return util_table(balance_events(tx_df), month, acct_df)
+    accounts = live_accounts()
+    key = (st.session_state.get("tx_version"), tuple(accounts), month)
+    cache = st.session_state.get("_bal_window_cache")
+    if cache and cache[0] == key and tx_df is st.session_state.get("tx_df"):
+        events, opening = cache[1]
+    else:
+        events, opening = month_balance_window(tx_df, month, list(accounts), chains,
+                                               balance_checkpoints())
+        if tx_df is st.session_state.get("tx_df"):
+            st.session_state["_bal_window_cache"] = (key, (events, opening))
+    return util_table(events, month, acct_df, opening)
+
+def cycle_bounds(month_str: str, billing_day: int) -> Tuple[date, date]:
+    p = pd.Period(month_str, freq="M")
+    y, m = p.year, p.month
+    this_bill = date(y, m, clamp_day(y, m, billing_day))
+    prev_p = p - 1
+    prev_bill = date(prev_p.year, prev_p.month, clamp_day(prev_p.year, prev_p.month, billing_day))
+    return prev_bill, this_bill
+
+def next_bill_date(month_str: str, billing_day: int) -> date:
+    p = pd.Period(month_str, freq="M")
+    y, m = p.year, p.month
+    return date(y, m, clamp_day(y, m, billing_day))
+
+def recurring_by_account(prefs: List[dict]) -> Dict[str, List[Tuple[float, int]]]:
+    """Recurring prefs grouped once per account as (amount, day_of_month), in prefs order."""
+    out: Dict[str, List[Tuple[float, int]]] = {}
+    for r in prefs:
+        if not r.get("IsRecurring", False):
+            continue
+        amt = r.get("Amount", None)
+        if amt is None:
+            continue
+        try:
+            amt = float(amt)
+        except Exception:
+            continue
+        dom = r.get("DayOfMonth", 1)
+        try:
+            dom = int(float(dom)) if dom is not None else 1
+        except Exception:
+            dom = 1
+        out.setdefault(str(r.get("Account","")).strip(), []).append((amt, dom))
+    return out
+
+def upcoming_recurring_total(month_str: str, bill_day: int, items: List[Tuple[float, int]]) -> float:
+    """Recurring amounts due between today and the next bill date, for one account's items."""
+    p = pd.Period(month_str, freq="M")
+    nb = next_bill_date(month_str, bill_day)
+    today = date.today()
+    total = 0.0
+    for amt, dom in items:
+        due = date(p.year, p.month, clamp_day(p.year, p.month, dom))
+        if today <= due <= nb:
+            total += amt
+    return float(total)
+
+def _account_event_slices(balance_events: pd.DataFrame) -> Dict[str, Tuple[int, int]]:
+    """Group events by account once: (start, stop) into an account-sorted, time-ordered view."""
+    if balance_events.empty:
+        return {}
+    codes, uniq = pd.factorize(balance_events["Account"].to_numpy(dtype=object))
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniq))
+    stops = np.cumsum(counts)
+    return {a: (int(stops[i] - counts[i]), int(stops[i])) for i, a in enumerate(uniq)}
+
+def util_table(balance_events: pd.DataFrame, month: str, acct_df: pd.DataFrame,
+               opening_balances: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """Per-account month/cycle utilization in one pass over the balance events.
+
+    Events are grouped by account once (stable, so each group stays in replay order); month and
+    billing-cycle windows are then sorted-array searches into each group instead of frame filters.
+    opening_balances: each account's balance before the first event given (a checkpoint window).
+    """
+    limits = dict(zip(acct_df["Account"], acct_df["Limit"]))
+    billing = dict(zip(acct_df["Account"], acct_df["BillingDay"]))
+    emoji = dict(zip(acct_df["Account"], acct_df["Emoji"]))
+    recurring = recurring_by_account(st.session_state["prefs_list"])
+
+    slices = _account_event_slices(balance_events)
+    if slices:
+        codes, _ = pd.factorize(balance_events["Account"].to_numpy(dtype=object))
+        order = np.argsort(codes, kind="stable")
+        months = balance_events["Month"].astype(str).to_numpy()[order]
+        dates = balance_events["Date"].to_numpy(dtype="datetime64[ns]")[order]
+        deltas = balance_events["Delta"].astype(float).to_numpy()[order]
+        bals = balance_events["Balance"].astype(float).to_numpy()[order]
+        is_charge = (balance_events["Kind"] == "Charge").to_numpy()[order]
+        is_pay = (balance_events["Kind"] == "Payment").to_numpy()[order]
+
+    out = []
+    for acct in live_accounts():
+        lim = float(limits.get(acct, 0.0))
+        bill = int(billing.get(acct, 1))
+        lo, hi = slices.get(acct, (0, 0))
+        c_start, c_end = cycle_bounds(month, bill)
+
+        base = float(opening_balances.get(acct, 0.0)) if opening_balances else 0.0
+        opening = closing = peak = base
+        charges = payments = 0.0
+        cyc_charges = cyc_pay = 0.0
+        cyc_peak = None
+        if hi > lo:
+            m = months[lo:hi]
+            if (m[1:] >= m[:-1]).all():
+                m_lo, m_hi = lo + int(np.searchsorted(m, month, "left")), lo + int(np.searchsorted(m, month, "right"))
+                before_last = m_lo - 1 if m_lo > lo else None
+                in_m = slice(m_lo, m_hi)
+            else:
+                # Events out of month order (unparseable dates); fall back to masks.
+                before_idx = np.flatnonzero(m < month)
+                before_last = lo + int(before_idx[-1]) if len(before_idx) else None
+                in_m = lo + np.flatnonzero(m == month)
+            opening = float(bals[before_last]) if before_last is not None else base
+            m_bal = bals[in_m]
+            closing = float(m_bal[-1]) if len(m_bal) else opening
+            peak = float(m_bal.max()) if len(m_bal) else opening
+            charges = float(deltas[in_m][is_charge[in_m]].sum())
+            payments = float((-deltas[in_m][is_pay[in_m]]).sum())
+
+            d = dates[lo:hi]
+            c_lo = lo + int(np.searchsorted(d, np.datetime64(c_start, "ns"), "left"))
+            c_hi = lo + int(np.searchsorted(d, np.datetime64(c_end, "ns"), "left"))
+            if c_hi > c_lo:
+                cyc_charges = float(deltas[c_lo:c_hi][is_charge[c_lo:c_hi]].sum())
+                cyc_pay = float((-deltas[c_lo:c_hi][is_pay[c_lo:c_hi]]).sum())
+                cyc_peak = float(bals[c_lo:c_hi].max())
+        if cyc_peak is None:
+            cyc_peak = closing
+
+        util_pct = (closing / lim * 100.0) if lim > 0 else None
+        upcoming = upcoming_recurring_total(month, bill, recurring.get(acct, []))
+        safe_to_spend = None if lim <= 0 else max(0.0, lim - closing - upcoming)
+
+        out.append({
+            "Account": acct,
+            "Emoji": str(emoji[acct]) if acct in emoji else ACCOUNT_EMOJI_DEFAULT.get(acct,"💳"),
+            "BillingDay": bill,
+            "BillDate": str(next_bill_date(month, bill)),
+            "Limit": lim,
+            "Balance": closing,
+            "UtilPct": util_pct,
+            "SafeToSpend": safe_to_spend,
+            "MonthCharges": charges,
+            "MonthPayments": payments,
+            "MonthPeak": peak,
+            "CycleStart": str(c_start),
+            "CycleEnd": str(c_end),
+            "CycleCharges": cyc_charges,
+            "CyclePayments": cyc_pay,
+            "CyclePeak": cyc_peak,
+            "UpcomingRecurringToBill": upcoming,
+        })
+    return pd.DataFrame(out)
+
+
+
+# =============================
+# Dashboard helpers
+# =============================
+def _dash_type_series(df: pd.DataFrame) -> pd.Series:
+    """Dashboard-only normalization of Type (income override); see effective_types.
+
+    Ledger frames carry it precomputed as EffectiveType, so this is a column read.
+    """
+    if df is not None and "EffectiveType" in df.columns:
+        return df["EffectiveType"].astype(str)
+    return effective_types(df)
+
+
+def _is_nonexpense_movement(df: pd.DataFrame) -> pd.Series:
+    """Rows that should NOT be counted as 'Expense' even if Type is Debit (ExpenseFlags != 0).
+
+    HF9: Exclude LOC utilization and transfers from expense charts while still tracking them.
+    """
+    if df is None or df.empty:
+        return pd.Series([], dtype=bool)
+    flags = df["ExpenseFlags"].to_numpy() if "ExpenseFlags" in df.columns else expense_flags(df)
+    return pd.Series(flags != 0, index=df.index)
+
+
+SUMMARY_TYPES = ("Credit", "Debit", "Investment", "CC Repay", "International")
+CUBE_KEYS = ["Month", "Type", "EType", "Category", "Expense"]
+
+
+class DashboardCube:
+    """Ledger pre-aggregated by (Month, Type, effective Type, Category, expense flag).
+
+    Built once per ledger version (see dashboard_cube); every dashboard widget reads its totals
+    from here, so reruns of the page are lookups into a few small per-month frames. The raw Type
+    is kept as a dimension because the snapshot and the sidebar type filter work on it.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        if df is None or df.empty:
+            self.groups: Dict[str, pd.DataFrame] = {}
+            self.rows: Dict[str, np.ndarray] = {}
+        else:
+            frame = pd.DataFrame({
+                "Month": df["Month"].astype(str).to_numpy(),
+                "Type": df["Type"].astype(str).to_numpy(),
+                "EType": _dash_type_series(df).to_numpy(),
+                "Category": df["Category"].to_numpy(),
+                "Expense": df["ExpenseFlags"].to_numpy() == 0,
+                "Amount": pd.to_numeric(df["Amount"], errors="coerce").fillna(0.0).to_numpy(),
+            })
+            agg = frame.groupby(CUBE_KEYS, dropna=False)["Amount"].agg(["sum", "size"]).reset_index()
+            agg.rename(columns={"sum": "Amount", "size": "Count"}, inplace=True)
+            self.groups = {m: g.reset_index(drop=True) for m, g in agg.groupby("Month", sort=False)}
+            self.rows = frame.groupby("Month", sort=False).indices
+        self._memo: Dict[tuple, object] = {}
+
+    def month(self, month: str) -> pd.DataFrame:
+        return self.groups.get(month, pd.DataFrame(columns=CUBE_KEYS + ["Amount", "Count"]))
+
+    def month_rows(self, month: str) -> np.ndarray:
+        """Positions (iloc) of the ledger rows in `month`."""
+        return self.rows.get(month, np.array([], dtype=np.intp))
+
+    def count(self, month: str) -> int:
+        return int(self.month(month)["Count"].sum())
+
+    def summary(self, month: str) -> Dict[str, float]:
+        key = ("summary", month)
+        if key not in self._memo:
+            g = self.month(month)
+            out = {}
+            for t in SUMMARY_TYPES:
+                hit = g["EType"] == t
+                if t == "Debit":
+                    hit = hit & g["Expense"].astype(bool)
+                out[t] = float(g.loc[hit, "Amount"].sum())
+            self._memo[key] = out
+        return self._memo[key]
+
+    def category_totals(self, month: str, etype: Optional[str] = None,
+                        types: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
+        """Category/Amount totals for the month, largest first (optionally by effective/raw Type)."""
+        key = ("cats", month, etype, types)
+        if key not in self._memo:
+            g = self.month(month)
+            if etype is not None:
+                g = g[g["EType"] == etype]
+            if types is not None:
+                g = g[g["Type"].isin(types)]
+            by_cat = g.groupby("Category", as_index=False)["Amount"].sum().sort_values("Amount", ascending=False)
+            self._memo[key] = by_cat
+        return self._memo[key]
+
+
+def dashboard_cube(tx_df: pd.DataFrame) -> DashboardCube:
+    """DashboardCube for the session ledger, rebuilt only when tx_version changes."""
+    version = st.session_state.get("tx_version")
+    cached = st.session_state.get("_dash_cube")
+    if cached and cached[0] == version and tx_df is st.session_state.get("tx_df"):
+        return cached[1]
+    cube = DashboardCube(tx_df)
+    if tx_df is st.session_state.get("tx_df"):
+        st.session_state["_dash_cube"] = (version, cube)
+    return cube
+
+
+def hero_insight(cube: DashboardCube, month: str) -> str:
+    n = cube.count(month)
+    if n == 0:
+        return "No transactions yet. Add your first one ✨"
+
+    by_cat = cube.category_totals(month, etype="Debit")
+    if not by_cat.empty:
+        top = by_cat.iloc[0]
+        return f"Highest debit spend: **{cat_label(top['Category'])}** ({money(float(top['Amount']))})"
+
+    return f"Transactions captured: **{n}**"
+
+
+# =============================
+# Transaction search
+# =============================
+# Inverted index over the ledger text: every token of Notes / MerchantKey / Category / Account
+# maps to the sheet rows (_row) holding it, with the best field weight per row. Sheet rows don't
+# move on local edits, tombstones or restores, so those patch only the touched rows' postings
+# (tx_row_changes); search maps hits back to row positions (iloc). A query term
+# matches indexed tokens exactly, by prefix (bisect on the sorted vocabulary) or, from 3 chars,
+# anywhere inside a token (one str.find pass over the joined vocabulary). Rows must match every
+# query term; rank = summed weights, newest first on ties.
+SEARCH_FIELDS = {"MerchantKey": 3.0, "Notes": 2.0, "Category": 1.5, "Account": 1.0}  # heaviest first
+SEARCH_MATCH_FACTOR = {"exact": 1.0, "prefix": 0.6, "infix": 0.3}
+SEARCH_TOKEN_RE = re.compile(r"[^\W_]+")
+SEARCH_SPLIT_RE = re.compile(r"[^\W_]+|\x1e")
+
+
+def search_tokens(text: str) -> List[str]:
+    return SEARCH_TOKEN_RE.findall(str(text or "").lower())
+
+
+def _field_pairs(s: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(field vocabulary, token code, row) for every token of every row.
+
+    Distinct values are tokenized in one regex pass over their \\x1e-joined text (the separator
+    matches too, so a running count of separators gives each token's value); each value's tokens
+    are then fanned out to the rows holding it.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):  # only the categories in use (a delta uses few)
+        codes, used = pd.factorize(s.cat.codes.to_numpy())
+        uniques = np.append(s.cat.categories.to_numpy(dtype=object), "")[used]
+    else:
+        codes, uniques = pd.factorize(s.fillna("").astype(str))
+    text = "\x1e".join(map(str, uniques))
+    if text.count("\x1e") != len(uniques) - 1:  # a value holds the separator itself
+        text = "\x1e".join(str(u).replace("\x1e", " ") for u in uniques)
+    found = np.array(SEARCH_SPLIT_RE.findall(text.lower()), dtype=object)
+    sep = found == "\x1e"
+    if sep.all():
+        return np.empty(0, dtype=object), np.empty(0, np.int64), np.empty(0, np.int64)
+    owner = np.cumsum(sep)[~sep]
+    tok_codes, vocab = pd.factorize(found[~sep])
+    by_value = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes, minlength=len(uniques))
+    starts = np.cumsum(counts) - counts
+    reps = counts[owner]
+    first = np.repeat(np.cumsum(reps) - reps, reps)
+    pos = np.repeat(starts[owner], reps) + (np.arange(int(reps.sum())) - first)
+    return np.asarray(vocab, dtype=object), np.repeat(tok_codes, reps), by_value[pos]
+
+
+class TxSearchIndex:
+    """Token → (sheet rows, weights) postings for a ledger frame; see the section comment above."""
+
+    def __init__(self, postings: Dict[str, Tuple[np.ndarray, np.ndarray]], row_ids: np.ndarray,
+                 dates: np.ndarray, like: Optional["TxSearchIndex"] = None):
+        self.postings = postings
+        self.row_ids = row_ids  # _row per position, ascending
+        self.dates = dates
+        if like is not None and len(like.terms) == len(postings):  # same vocabulary: reuse it
+            self.terms, self._vocab, self._starts = like.terms, like._vocab, like._starts
+            return
+        self.terms = sorted(postings)
+        self._vocab = "\n".join(self.terms) + "\n"
+        self._starts = np.cumsum([0] + [len(t) + 1 for t in self.terms[:-1]]) if self.terms else np.zeros(0, np.int64)
+
+    @property
+    def rows(self) -> int:
+        return len(self.dates)
+
+    @staticmethod
+    def _postings(df: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        parts = [(_field_pairs(df[c]), w) for c, w in SEARCH_FIELDS.items() if c in df.columns]
+        parts = [(p, w) for p, w in parts if len(p[0])]
+        if not parts:
+            return {}
+        term_codes, terms = pd.factorize(pd.Series(np.concatenate([p[0] for p, _ in parts]), dtype=object))
+        offsets = np.cumsum([0] + [len(p[0]) for p, _ in parts])
+        tok = np.concatenate([term_codes[o:][p[1]] for (p, _), o in zip(parts, offsets)])
+        row = np.concatenate([p[2] for p, _ in parts])
+        wt = np.concatenate([np.full(len(p[2]), w, dtype=np.float32) for p, w in parts])
+        # One posting per (token, row): fields come heaviest first, so a stable sort keeps the best weight.
+        key = tok * (len(df) + 1) + row
+        order = np.argsort(key, kind="stable")
+        key, tok, row, wt = key[order], tok[order], row[order], wt[order]
+        keep = np.ones(len(key), dtype=bool)
+        keep[1:] = key[1:] != key[:-1]
+        tok, row, wt = tok[keep], df["_row"].to_numpy(dtype=np.int64)[row[keep]].astype(np.int32), wt[keep]
+        bounds = np.flatnonzero(np.diff(tok)) + 1
+        lo, hi = np.concatenate([[0], bounds]).tolist(), np.concatenate([bounds, [len(tok)]]).tolist()
+        names = terms[tok[lo]]
+        return {t: (row[a:b], wt[a:b]) for t, a, b in zip(names, lo, hi)}
+
+    @staticmethod
+    def _dates(df: pd.DataFrame) -> np.ndarray:
+        ns = pd.to_datetime(df["Date"], errors="coerce").to_numpy("datetime64[ns]").astype(np.int64)
+        return np.where(ns == np.iinfo(np.int64).min, 0, ns)  # undated rows rank as oldest
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "TxSearchIndex":
+        return cls(cls._postings(df), df["_row"].to_numpy(dtype=np.int64), cls._dates(df))
+
+    def patch(self, df: pd.DataFrame, rows: List[int], old: pd.DataFrame) -> "TxSearchIndex":
+        """Index for `df`, the indexed ledger with sheet `rows` changed (this index is left as is).
+
+        `old` holds those rows' earlier text (none for appends/restores): their tokens' postings
+        drop the rows, then the rows still live in `df` are indexed again.
+        """
+        postings = dict(self.postings)
+        gone = np.unique(np.asarray(rows, dtype=np.int64))
+        for t in self._postings(old) if len(old) else ():
+            if t in postings:
+                r, w = postings[t]
+                keep = ~np.isin(r, gone)
+                postings[t] = (r[keep], w[keep])
+        row_ids = df["_row"].to_numpy(dtype=np.int64)
+        pos = np.minimum(np.searchsorted(row_ids, gone), max(len(row_ids) - 1, 0))
+        live = pos[row_ids[pos] == gone] if len(row_ids) else pos[:0]
+        for t, (r, w) in self._postings(df.iloc[live]).items() if len(live) else ():
+            cur = postings.get(t)
+            postings[t] = (r, w) if cur is None else (np.concatenate([cur[0], r]), np.concatenate([cur[1], w]))
+        return TxSearchIndex(postings, row_ids, self._dates(df), like=self)
+
+    def matching_terms(self, q: str) -> Dict[str, str]:
+        """Indexed tokens matching query term `q` → match kind (exact / prefix / infix)."""
+        out: Dict[str, str] = {}
+        i = bisect.bisect_left(self.terms, q)
+        while i < len(self.terms) and self.terms[i].startswith(q):
+            out[self.terms[i]] = "exact" if self.terms[i] == q else "prefix"
+            i += 1
+        if len(q) >= 3:
+            at = [m.start() for m in re.finditer(re.escape(q), self._vocab)]
+            for k in np.searchsorted(self._starts, at, side="right") - 1 if at else ():
+                out.setdefault(self.terms[k], "infix")
+        return out
+
+    def search(self, query: str, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Row positions matching every term of `query` (and `mask`, if given), best first."""
+        terms = list(dict.fromkeys(search_tokens(query)))
+        if not terms or not self.rows:
+            return np.empty(0, dtype=np.intp)
+        span = int(self.row_ids[-1]) + 1  # scores are kept per sheet row
+        total = np.zeros(span, dtype=np.float32)
+        alive = np.zeros(span, dtype=bool)
+        alive[self.row_ids if mask is None else self.row_ids[np.asarray(mask, dtype=bool)]] = True
+        for q in terms:
+            score = np.zeros(span, dtype=np.float32)
+            for t, kind in self.matching_terms(q).items():
+                r, w = self.postings[t]
+                np.maximum.at(score, r, w * SEARCH_MATCH_FACTOR[kind])
+            alive &= score > 0
+            total += score
+        hits = np.flatnonzero(alive)
+        pos = np.searchsorted(self.row_ids, hits)
+        return pos[np.lexsort((-self.dates[pos], -total[hits]))]
+
+
+def search_index(tx_df: pd.DataFrame) -> TxSearchIndex:
+    """TxSearchIndex for the session ledger, cached per tx_version and patched on appends and
+    local edits (tx_row_changes)."""
+    version = st.session_state.get("tx_version")
+    cache = st.session_state.get("_search_index_cache")
+    if cache and tx_df is st.session_state.get("tx_df"):
+        if cache[0] == version:
+            return cache[1]
+        changes = st.session_state.get("tx_row_changes") or {}
+        steps = [changes.get(v) for v in range(cache[0], version)]
+        if steps and all(step is not None for step in steps):
+            olds = [old for _, old in steps if len(old)]
+            index = cache[1].patch(tx_df, [r for rows, _ in steps for r in rows],
+                                   pd.concat(olds, ignore_index=True) if olds else tx_df.iloc[:0])
+            st.session_state["_search_index_cache"] = (version, index)
+            return index
+    index = TxSearchIndex.build(tx_df)
+    if tx_df is st.session_state.get("tx_df"):
+        st.session_state["_search_index_cache"] = (version, index)
+    return index
@@ -0,0 +1,324 @@
+"""One script run: first sync, dirty refreshes, sidebar filters and page navigation."""
+from __future__ import annotations
+
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from myfin.config import (
+    ACCT_HEADERS,
+    ADMIN_HEADERS,
+    ALLOWED_ACCOUNTS,
+    APP_NAME,
+    ENTRY_TYPES,
+    TYPE_EMOJI,
+    build_account_maps,
+)
+from myfin.theme import inject_theme
+from myfin.sheets import SheetsUnavailable, api_error, sheets_busy_notice
+from myfin.ledger import TX_FRAME_COLUMNS
+from myfin.storage import (
+    adopt_shared_ledger,
+    ensure_recurring_for_month,
+    last_sync_text,
+    load_from_replica,
+    poll_replica,
+    poll_shared_ledger,
+    refresh_accounts_from_sheets,
+    refresh_admin_from_sheets,
+    refresh_all_from_sheets,
+    ss_get,
+    start_background_reconcile,
+    sync_transactions_delta,
+)
+from myfin.pages import (
+    page_add,
+    page_add_mobile,
+    page_admin,
+    page_creditbal,
+    page_dashboard,
+    page_transactions,
+    page_trends,
+    require_login,
+)
+
+
+# =============================
+# First sync (only once per session)
+# =============================
+def initial_sync() -> None:
+    if "tx_df" in st.session_state or st.session_state.get("did_initial_refresh"):
+        return
+    # Mark immediately to prevent multiple rapid reruns from re-triggering a full refresh.
+    st.session_state["did_initial_refresh"] = True
+    try:
+        if adopt_shared_ledger() or load_from_replica():
+            start_background_reconcile()
+        else:
+            refresh_all_from_sheets()
+    except api_error() as e:
+        # If Google throttles reads (429), show a friendly message instead of crashing.
+        s = str(e)
+        if ("[429]" in s) or ("429" in s) or ("Quota exceeded" in s) or ("Read requests" in s):
+            st.error("Google Sheets rate limit reached (HTTP 429). Please wait ~60 seconds and click Refresh.")
+            # Allow the user to retry manually.
+            st.session_state["tx_df"] = pd.DataFrame(columns=TX_FRAME_COLUMNS)
+            st.session_state["accounts_df"] = pd.DataFrame(columns=ACCT_HEADERS + ["_row"])
+            st.session_state["admin_df"] = pd.DataFrame(columns=ADMIN_HEADERS + ["_row"])
+            st.stop()
+        raise
+    except SheetsUnavailable as e:
+        st.error(f"Google Sheets is rate limited right now ({e}). Please wait a moment and click Refresh.")
+        st.session_state["tx_df"] = pd.DataFrame(columns=TX_FRAME_COLUMNS)
+        st.session_state["accounts_df"] = pd.DataFrame(columns=ACCT_HEADERS + ["_row"])
+        st.session_state["admin_df"] = pd.DataFrame(columns=ADMIN_HEADERS + ["_row"])
+        st.stop()
+
+
+# Dirty-flag refreshes (avoid full re-read after small mutations)
+def refresh_dirty() -> None:
+    try:
+        if st.session_state.get("admin_dirty"):
+            refresh_admin_from_sheets()
+        if st.session_state.get("accounts_dirty"):
+            refresh_accounts_from_sheets()
+        if st.session_state.get("tx_dirty"):
+            sync_transactions_delta()
+    except SheetsUnavailable:
+        # Flags stay set, so the next rerun retries; meanwhile the cached data is shown.
+        st.toast("Google Sheets is busy — showing cached data", icon="⏳")
+
+
+# =============================
+# Sidebar nav + fast filters
+# =============================
+def current_month_default(df: pd.DataFrame) -> str:
+    # Robust default: handle empty frames or missing derived columns
+    cur = str(pd.Period(date.today(), freq="M"))
+    if df is None or df.empty:
+        return cur
+    if "Month" not in df.columns:
+        # Derive on the fly from Date if possible
+        if "Date" in df.columns:
+            d = pd.to_datetime(df["Date"], errors="coerce")
+            months = sorted(d.dropna().dt.to_period("M").astype(str).unique().tolist())
+            return months[-1] if months else cur
+        return cur
+    months = sorted(pd.Series(df["Month"]).dropna().unique().tolist())
+    return months[-1] if months else cur
+
+
+def render_sidebar(tx_df: pd.DataFrame) -> None:
+    with st.sidebar:
+        st.markdown(
+            f"""
+            <div class="mf-topbrand mf-anim">
+              <div>
+                <div style="font-size:18px; font-weight:950;">{APP_NAME}</div>
+                <div style="font-size:12px; color:rgba(232,234,237,0.65); margin-top:2px;">Family ledger • 2026</div>
+              </div>
+              <div style="text-align:right;">
+                <span class="mf-pill">Sheets</span>
+                <div style="height:6px;"></div>
+                <span class="mf-pill">Fast</span>
+              </div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+        st.write("")
+
+        # sync bar (explicit, premium)
+        st.markdown(
+            f"""
+            <div class="mf-sync mf-anim">
+              <div>
+                <div style="font-weight:950;">Sync</div>
+                <small>Last: {last_sync_text()} UTC</small>
+              </div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+        cA, cB, cC = st.columns([1, 1, 1])
+        with cA:
+            if st.button("Refresh", width="stretch"):
+                with sheets_busy_notice("the refresh"):
+                    refresh_all_from_sheets()
+                    st.toast("Refreshed ✓", icon="🔄")
+                    st.rerun()
+        with cB:
+            if st.button("Logout", width="stretch"):
+                st.session_state["authed"] = False
+                st.rerun()
+        with cC:
+            view_mode = "Auto"  # locked to Auto (mobile toggle removed)
+            st.markdown('<span class="pill pill-auto">Auto</span>', unsafe_allow_html=True)
+
+
+        st.divider()
+        months = sorted(tx_df["Month"].unique().tolist()) if not tx_df.empty else [str(pd.Period(date.today(), freq="M"))]
+
+        # PERFORMANCE: Filters in form + Apply
+        with st.form("sidebar_filters", border=False):
+            st.markdown("### Filters")
+            month_sel = st.selectbox("📅 Month", months, index=months.index(st.session_state["flt_month"]) if st.session_state["flt_month"] in months else len(months) - 1)
+
+            st.markdown("### Focus (Types)")
+            # C3 redesigned: premium toggles, no chips, no red
+            selected = []
+            cols = st.columns(2)
+            for i, t in enumerate(ENTRY_TYPES):
+                with cols[i % 2]:
+                    on = st.toggle(f"{TYPE_EMOJI[t]} {t}", value=(t in st.session_state["flt_types"]), key=f"tg_{t}")
+                if on:
+                    selected.append(t)
+
+            apply = st.form_submit_button("Apply")
+
+        if apply:
+            st.session_state["flt_month"] = month_sel
+            st.session_state["flt_types"] = selected if selected else ENTRY_TYPES.copy()
+            st.toast("Filters applied", icon="🎛️")
+            st.rerun()
+
+
+# =============================
+# Pages (subpages) + Navigation
+# =============================
+def detect_mobile_mode() -> bool:
+    # Explicit override via query params
+    try:
+        qp = st.query_params
+        mv = str(qp.get("mobile", "")).strip().lower()
+        if mv in ("1", "true", "yes", "y", "on"):
+            return True
+        if mv in ("0", "false", "no", "n", "off"):
+            return False
+    except Exception:
+        pass
+
+    # Best-effort user-agent detection (works on Streamlit Cloud)
+    ua = ""
+    try:
+        ua = (st.context.headers.get("User-Agent") or "")
+    except Exception:
+        try:
+            # older streamlit fallbacks
+            ua = (st.runtime.scriptrunner.get_script_run_ctx().request.headers.get("User-Agent") or "")
+        except Exception:
+            ua = ""
+
+    ua_l = ua.lower()
+    return any(k in ua_l for k in ["iphone", "ipad", "android", "mobile"])
+
+
+# Use mobile Add page when on phone
+def _page_add_router():
+    if st.session_state.get("mobile_mode"):
+        page_add_mobile()
+    else:
+        page_add()
+
+
+def navigate() -> None:
+    mobile_mode = st.session_state["mobile_mode"] = detect_mobile_mode()
+    if mobile_mode:
+        # On phones, avoid relying on the sidebar (it overlays the content).
+        # Provide an in-page navigation bar so the user never needs to open the sidebar.
+        page_keys = ["dashboard", "add", "creditbal", "trends", "transactions", "admin"]
+        page_labels = {
+            "dashboard": "🏠",
+            "add": "➕",
+            "creditbal": "💳",
+            "trends": "📈",
+            "transactions": "🧾",
+            "admin": "🛡️",
+        }
+        # Read current page from query params (fallback to dashboard)
+        try:
+            cur = str(st.query_params.get("p", "dashboard"))
+        except Exception:
+            cur = "dashboard"
+        if cur not in page_keys:
+            cur = "dashboard"
+
+        sel = st.radio(
+            "Navigate",
+            options=page_keys,
+            index=page_keys.index(cur),
+            format_func=lambda k: f"{page_labels.get(k,'•')} {k.title()}",
+            horizontal=True,
+            label_visibility="collapsed",
+            key="mobile_top_nav",
+        )
+
+        if sel != cur:
+            st.query_params["p"] = sel
+            st.rerun()
+
+        # Execute the selected page directly (no sidebar needed)
+        page_map = {
+            "dashboard": page_dashboard,
+            "add": _page_add_router,
+            "creditbal": page_creditbal,
+            "trends": page_trends,
+            "transactions": page_transactions,
+            "admin": page_admin,
+        }
+        page_map[sel]()
+    else:
+        pages = [
+            st.Page(page_dashboard, title="🏠 Dashboard", url_path="dashboard"),
+            st.Page(_page_add_router, title="➕ Add", url_path="add"),
+            st.Page(page_creditbal, title="💳 CreditBal", url_path="creditbal"),
+            st.Page(page_trends, title="📈 Trends", url_path="trends"),
+            st.Page(page_transactions, title="🧾 Transactions", url_path="transactions"),
+            st.Page(page_admin, title="🛡️ Admin", url_path="admin"),
+        ]
+        nav = st.navigation(pages, position="sidebar")
+        nav.run()
+
+
+def run() -> None:
+    """The whole app for one script run (streamlit_app.py calls this after set_page_config)."""
+    inject_theme()
+    require_login()
+    initial_sync()
+    refresh_dirty()
+    poll_replica()
+    poll_shared_ledger()
+
+    locked_months = st.session_state["locked_months"]
+    tx_df = st.session_state["tx_df"]
+    allowed_accounts_live, _ = build_account_maps(st.session_state["acct_df"])
+    st.session_state["allowed_accounts_live"] = allowed_accounts_live  # read back via live_accounts()
+
+    ss_get("flt_month", current_month_default(tx_df))
+    ss_get("flt_types", ENTRY_TYPES.copy())
+    ss_get("admin_section", "Monthly Lock")
+    ss_get("auto_recurring_done_for", "")
+
+    # Quick add defaults (suggestion #1)
+    ss_get("quick_defaults", {"Type": "Debit", "Pay": "Card", "Account": (allowed_accounts_live[0] if allowed_accounts_live else ALLOWED_ACCOUNTS[0]), "Category": "Uncategorized"})
+    ss_get("undo", None)
+
+    render_sidebar(tx_df)
+
+    month_sel = st.session_state["flt_month"]
+    if month_sel in set(locked_months):
+        st.warning(f"🔒 **{month_sel} is LOCKED** — Add/Edit/Delete disabled for this month.")
+
+    # Auto-add recurring for chosen month (C6 + suggestion)
+    # If Sheets refuses the write the month isn't marked done, so the next rerun retries.
+    if st.session_state["auto_recurring_done_for"] != month_sel:
+        with sheets_busy_notice("adding this month's recurring items"):
+            created = ensure_recurring_for_month(month_sel)
+            st.session_state["auto_recurring_done_for"] = month_sel
+            if created > 0:
+                st.toast(f"Auto-added {created} recurring item(s)", icon="🔁")
+                st.rerun()
+
+    navigate()
+    st.caption("NishanthFinTrack 2026 • Premium Dark • Fast • Sheets-backed • Apply filters for speed • Refresh only when needed")
@@ -0,0 +1,163 @@
+"""App constants: accounts, entry types, categories, the Sheets schema."""
+from __future__ import annotations
+
+import datetime as dt
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+
+def normalize_account_name(v: str) -> str:
+    if not v:
+        return ""
+    s = str(v).strip()
+
+    # Strip a leading emoji/prefix token (e.g., "💳 Canadian Tire Grey Card")
+    parts = s.split(" ", 1)
+    if len(parts) == 2 and not any(c.isalnum() for c in parts[0]):
+        s = parts[1].strip()
+
+    # Apply backward-compatible renames
+    s = ACCOUNT_ALIASES.get(s, s)
+    return s
+
+def build_month_options(today: dt.date | None = None, past_months: int = 12, future_months: int = 3) -> list[str]:
+    """Return month strings YYYY-MM for (past_months) including current + (future_months)."""
+    if today is None:
+        today = dt.date.today()
+    first = dt.date(today.year, today.month, 1) - relativedelta(months=past_months-1)
+    last = dt.date(today.year, today.month, 1) + relativedelta(months=future_months)
+    months = []
+    cur = first
+    while cur <= last:
+        months.append(cur.strftime("%Y-%m"))
+        cur = cur + relativedelta(months=1)
+    return months
+
+
+# =============================
+# Config
+# =============================
+APP_NAME = "NishanthFinTrack 2026"
+APP_VERSION = "VF3_1A_HF2"
+SHEET_NAME = "nishanthfintrack_2026"   # <-- change if your Sheet name differs
+
+# Hardcoded auth as requested
+AUTH_USERNAME = "Ajay"
+AUTH_PASSWORD = "1999"
+
+# Fixed accounts (E2) + emojis (E3)
+ACCOUNT_EMOJI_DEFAULT = {
+    "Canadian tire Mastercard - Grey": "🛒",
+    "Canadian tire Mastercard - Black": "🛒",
+    "RBC VISA": "🏦",
+    "RBC Mastercard": "🏦",
+    "Line of Credit": "📉",
+}
+
+# Backward-compatible aliases (old -> new). This keeps existing sheet rows working after renames.
+ACCOUNT_ALIASES = {
+    "Canadian Tire Grey Card": "Canadian tire Mastercard - Grey",
+    "Canadian Tire Black Card": "Canadian tire Mastercard - Black",
+    "Nishanth's RBC Card": "RBC VISA",
+    "Indhu's RBC Card": "RBC Mastercard",
+}
+ALLOWED_ACCOUNTS = list(ACCOUNT_EMOJI_DEFAULT.keys())
+
+# Types + emoji (C3 redesign)
+TYPE_EMOJI = {"Debit": "🧾", "Credit": "💰", "Investment": "💹", "CC Repay": "💳", "International": "🌍", "LOC Draw": "🏦", "LOC Repay": "↩️"}
+ENTRY_TYPES = list(TYPE_EMOJI.keys())
+PAY_METHODS = ["Card", "Bank", "Cash"]  # C7: Salary uses Bank label
+
+
+# Display labels (finance-style) — internal values remain the same in Sheets.
+TYPE_DISPLAY = {
+    "Debit": "Expense (−)",
+    "Credit": "Income (+)",
+    "Investment": "Invest",
+    "CC Repay": "Pay Credit Card",
+    "International": "Remit International",
+}
+DISPLAY_TO_TYPE = {v: k for k, v in TYPE_DISPLAY.items()}
+
+def type_to_display(t: str) -> str:
+    return TYPE_DISPLAY.get(t, t)
+
+def display_to_type(lbl: str) -> str:
+    return DISPLAY_TO_TYPE.get(lbl, lbl)
+
+def build_account_maps(acct_df: pd.DataFrame):
+    """Return (accounts_list, emoji_map) from Accounts sheet (fallback to defaults)."""
+    accounts = []
+    emoji_map = dict(ACCOUNT_EMOJI_DEFAULT)
+    if isinstance(acct_df, pd.DataFrame) and not acct_df.empty and "Account" in acct_df.columns:
+        accounts = [a for a in acct_df["Account"].astype(str).tolist() if a and a != "nan"]
+        if "Emoji" in acct_df.columns:
+            for _, r in acct_df.iterrows():
+                a = str(r.get("Account", "")).strip()
+                if a:
+                    e = str(r.get("Emoji", "")).strip()
+                    if e and e != "nan":
+                        emoji_map[a] = e
+    if not accounts:
+        accounts = list(ACCOUNT_EMOJI_DEFAULT.keys())
+    return accounts, emoji_map
+
+# Categories (E4,E5)
+CATEGORY_ICON = {
+    "Salary": "💼",
+    "Rent": "🏠",
+    "Groceries": "🛒",
+    "Food/Coffee": "☕",
+    "Fuel": "⛽",
+    "Car": "🚗",
+    "Utilities": "💡",
+    "Shopping": "🛍️",
+    "Medical": "🩺",
+    "Travel": "✈️",
+    "Investment": "💹",
+    "India Transfer": "🌍",
+    "Banking/Fees": "🏦",
+    "LOC Utilization": "🏦",
+    "Repayment": "↩️",
+    "Entertainment": "🎬",
+    "Uncategorized": "❓",
+}
+
+DEFAULT_CATEGORY_RULES = {
+    "Salary": ["salary", "payroll", "pay", "direct deposit", "fis"],
+    "Investment": ["tfsa", "fhsa", "rrsp", "investment", "contribution", "brokerage", "wealthsimple", "questrade"],
+    "Rent": ["rent", "lease"],
+    "Groceries": ["grocery", "superstore", "walmart", "costco", "freshco", "save on", "saveon", "no frills", "nofrills"],
+    "Food/Coffee": ["restaurant", "pizza", "ubereats", "doordash", "tim hortons", "tims", "starbucks", "coffee", "cafe", "food"],
+    "Fuel": ["fuel", "gas", "petro", "shell", "esso", "co-op", "coop", "costco gas"],
+    "Car": ["lanpro", "service", "oil", "tire", "tyre", "alignment", "repair", "mercedes", "insurance"],
+    "Utilities": ["hydro", "electric", "water", "internet", "wifi", "phone", "mobile", "bell", "rogers", "telus", "shaw"],
+    "Shopping": ["amazon", "ikea", "bestbuy", "best buy", "mall", "shopping"],
+    "Medical": ["pharmacy", "doctor", "clinic", "dental", "dentist", "hospital"],
+    "Travel": ["flight", "hotel", "airbnb", "uber", "lyft", "taxi"],
+    "India Transfer": ["wise", "remitly", "remit", "remittance", "money transfer", "india"],
+    "Banking/Fees": ["fee", "charges", "interest", "bank fee", "nsf", "overdraft"],
+    "Entertainment": ["netflix", "prime", "spotify", "movie", "theatre"],
+    "Uncategorized": [],
+}
+
+STOPWORDS = set("""
+a an and are as at be but by for from has have he her hers him his i if in into is it its
+me my of on or our ours she so than that the their them they this to up was we were what when where who why will with you your yours
+""".split())
+
+
+# =============================
+# Google Sheets schema
+# =============================
+TAB_TRANSACTIONS = "transactions"
+TAB_ACCOUNTS = "cards"
+TAB_ADMIN = "admin"
+
+# Deleted: tombstone timestamp. Deleting never removes a sheet row, so row numbers stay stable;
+# Admin → Fix Mistakes → Compact drops tombstoned rows for good.
+TX_HEADERS = ["TxId", "Date", "Owner", "Type", "Amount", "Pay", "Account", "Category", "Notes", "CreatedAt", "AutoTag",
+              "Deleted"]
+ACCT_HEADERS = ["Account", "Emoji", "Limit", "BillingDay"]
+ADMIN_HEADERS = ["Key", "Value"]  # locked_months, rules_text, rules_locked, recurring_prefs_json
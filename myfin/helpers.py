@@ -0,0 +1,201 @@
+"""Small formatting / parsing helpers and the category matcher."""
+from __future__ import annotations
+
+import calendar
+import functools
+import hashlib
+import hmac
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from myfin.config import AUTH_PASSWORD, AUTH_USERNAME, CATEGORY_ICON, STOPWORDS
+
+
+# =============================
+# Helpers
+# =============================
+def money(n: float) -> str:
+    sign = "-" if float(n or 0) < 0 else ""
+    n = abs(float(n or 0))
+    return f"{sign}${n:,.2f}"
+
+def cat_label(name: str) -> str:
+    return f"{CATEGORY_ICON.get(name,'•')} {name}"
+
+def clamp_day(year: int, month: int, day: int) -> int:
+    last = calendar.monthrange(year, month)[1]
+    return max(1, min(int(day), last))
+
+def auth_ok(u: str, p: str) -> bool:
+    return hmac.compare_digest(u or "", AUTH_USERNAME) and hmac.compare_digest(p or "", AUTH_PASSWORD)
+
+def parse_amount(text: str) -> Optional[float]:
+    t = (text or "").strip().replace(",", "")
+    if not t:
+        return None
+    try:
+        v = float(t)
+        if v < 0:
+            return None
+        return v
+    except Exception:
+        return None
+
+# Merchant key = first two words of the notes (letters only) that are not stopwords and longer than 2.
+MERCHANT_NONALPHA_RE = re.compile(r"[^a-z]+")
+
+
+@functools.lru_cache(maxsize=1 << 17)
+def normalize_merchant(notes: str) -> str:
+    words = [w for w in MERCHANT_NONALPHA_RE.sub(" ", (notes or "").lower()).split()
+             if len(w) > 2 and w not in STOPWORDS]
+    return " ".join(words[:2])
+
+
+def merchant_keys(notes: pd.Series) -> np.ndarray:
+    """normalize_merchant for a whole column: once per distinct note (memoized across loads and sessions)."""
+    codes, uniq = pd.factorize(notes.fillna("").astype(str))
+    keys = np.array([normalize_merchant(u) for u in uniq] + [""], dtype=object)
+    return keys[codes]
+
+def _keyword_trie_pattern(words: List[str]) -> str:
+    """Prefix-factored regex alternation of literal words (longest extension tried first)."""
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        kids = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not kids:
+            return ""
+        body = kids[0] if len(kids) == 1 else "(?:" + "|".join(kids) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+class CategoryMatcher:
+    """Rules compiled into one keyword automaton (a trie-shaped regex).
+
+    Same answer as the nested label/keyword scan: the first label (in rules order) having any
+    keyword that is a substring of the lowercased note. Keywords matching at one position form
+    a prefix chain, so the longest match there also stands for its keyword prefixes (`best`).
+    """
+
+    def __init__(self, rules: Dict[str, List[str]]):
+        self.labels = [label for label in rules if label != "Uncategorized"]
+        prio: Dict[str, int] = {}
+        for i, label in enumerate(self.labels):
+            for k in rules[label]:
+                if k:
+                    prio.setdefault(k.lower(), i)
+        self.best = {k: min(p for j, p in prio.items() if k.startswith(j)) for k in prio}
+        self.pattern = re.compile(_keyword_trie_pattern(list(prio))) if prio else None
+
+    def _label_index(self, t: str) -> Optional[int]:
+        if self.pattern is None:
+            return None
+        best = None
+        m = self.pattern.search(t)
+        while m is not None:
+            p = self.best[m.group()]
+            if best is None or p < best:
+                best = p
+                if best == 0:
+                    break
+            m = self.pattern.search(t, m.start() + 1)
+        return best
+
+    def classify(self, notes: str) -> str:
+        i = self._label_index((notes or "").lower())
+        return "Uncategorized" if i is None else self.labels[i]
+
+    def classify_many(self, notes: pd.Series) -> pd.Series:
+        """Vector of labels for a Series of notes (each distinct note is matched once)."""
+        codes, uniq = pd.factorize(notes.fillna("").astype(str).str.lower())
+        labels = np.array([self.classify(t) for t in uniq] + ["Uncategorized"], dtype=object)
+        return pd.Series(labels[codes], index=notes.index)
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _compiled_category_matcher(rules_digest: str, _rules: Dict[str, List[str]]) -> CategoryMatcher:
+    return CategoryMatcher(_rules)
+
+_MATCHER_FOR: Dict[int, Tuple[Dict[str, List[str]], CategoryMatcher]] = {}
+
+
+def category_matcher(rules: Dict[str, List[str]]) -> CategoryMatcher:
+    """Compiled matcher for `rules`, shared across reruns/sessions by a hash of the rules text.
+
+    The same rules object within a run skips the hashing (classify is called per note).
+    """
+    hit = _MATCHER_FOR.get(id(rules))
+    if hit is not None and hit[0] is rules:
+        return hit[1]
+    text = json.dumps(list(rules.items()), ensure_ascii=False)
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    matcher = _compiled_category_matcher(digest, rules)
+    _MATCHER_FOR.clear()
+    _MATCHER_FOR[id(rules)] = (rules, matcher)
+    return matcher
+
+def classify(notes: str, rules: Dict[str, List[str]]) -> str:
+    return category_matcher(rules).classify(notes)
+
+def classify_many(notes: pd.Series, rules: Dict[str, List[str]]) -> pd.Series:
+    return category_matcher(rules).classify_many(notes)
+
+def segmented(label: str, options: List[str], default: str, key: str):
+    if hasattr(st, "segmented_control"):
+        return st.segmented_control(label, options, default=default, key=key)
+    idx = options.index(default) if default in options else 0
+    return st.radio(label, options, index=idx, horizontal=True, key=key)
+
+def prev_month_str(m: str) -> str:
+    try:
+        p = pd.Period(m, freq="M")
+        return str(p - 1)
+    except Exception:
+        return m
+
+def delta_badge(delta: float) -> str:
+    if abs(delta) < 0.005:
+        return "—"
+    return ("▲ " if delta > 0 else "▼ ") + money(abs(delta))
+
+
+# =============================
+# Chart figures
+# =============================
+FIGURE_CACHE_SIZE = 48
+
+
+def frame_fingerprint(frame: pd.DataFrame, *extra: Any) -> str:
+    """Digest of a (small, aggregated) frame's columns, dtypes and values, plus any `extra` keys."""
+    h = hashlib.blake2b(digest_size=16)
+    head = [list(map(str, frame.columns)), list(map(str, frame.dtypes)), extra]
+    h.update(json.dumps(head, sort_keys=True, default=str).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def _cached_figure(chart: str, fingerprint: str, _frame: pd.DataFrame, _build: Callable, _layout: Dict[str, Any]):
+    fig = _build(_frame)
+    if _layout:
+        fig.update_layout(**_layout)
+    return fig
+
+
+def cached_figure(chart: str, frame: pd.DataFrame, build: Callable[[pd.DataFrame], Any], **layout: Any):
+    """Plotly figure `build(frame)` with `layout` applied, reused while the frame and layout are unchanged.
+
+    `chart` names the builder (the key cannot see inside `build`), so everything the figure depends on
+    must be in `frame` or `layout`. The LRU is process-wide: treat the returned figure as read-only.
+    """
+    return _cached_figure(chart, frame_fingerprint(frame, layout), frame, build, layout)
@@ -0,0 +1,353 @@
+"""Transactions frame model: header layout, parsing, derived columns and compaction."""
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from myfin.config import (
+    ALLOWED_ACCOUNTS,
+    CATEGORY_ICON,
+    DEFAULT_CATEGORY_RULES,
+    ENTRY_TYPES,
+    PAY_METHODS,
+    TX_HEADERS,
+)
+from myfin.helpers import merchant_keys
+
+
+# =============================
+# Transactions frame model
+# =============================
+# Common header synonyms from older versions / user-edits
+TX_HEADER_SYNONYMS = {
+    "txid": "TxId",
+    "transactionid": "TxId",
+    "transaction_id": "TxId",
+    "id": "TxId",
+    "created": "CreatedAt",
+    "createdat": "CreatedAt",
+    "created_at": "CreatedAt",
+    "autotag": "AutoTag",
+    "auto_tag": "AutoTag",
+    "merchant": "Notes",
+    "reason": "Notes",
+    "description": "Notes",
+    "payment": "Pay",
+    "paymenttype": "Pay",
+    "paymentmethod": "Pay",
+    "deletedat": "Deleted",
+    "deleted_at": "Deleted",
+}
+TX_LAYOUT_POSITIONAL = list(range(len(TX_HEADERS)))
+
+
+def _norm_header(h: str) -> str:
+    return re.sub(r"\s+", "", str(h or "").strip().lower())
+
+
+def tx_column_layout(raw_hdr: List[str]) -> List[Optional[int]]:
+    """Sheet column index for each TX_HEADERS entry (None = column missing).
+
+    HF7: Make header handling robust.
+    - If sheet headers differ by casing/spacing or common synonyms, map them.
+    - If headers are unrecognized, assume the sheet is already in TX_HEADERS order.
+    """
+    norm_to_canon = {_norm_header(k): v for k, v in TX_HEADER_SYNONYMS.items()}
+    for c in TX_HEADERS:
+        norm_to_canon[_norm_header(c)] = c  # exact canonical
+
+    mapped_cols = [norm_to_canon.get(_norm_header(h), "") for h in raw_hdr]
+    # Case 1: We can map at least Date/Amount (minimum viable)
+    if ("Date" in mapped_cols) and ("Amount" in mapped_cols):
+        return [mapped_cols.index(c) if c in mapped_cols else None for c in TX_HEADERS]
+    # Case 2: headers unrecognized; fall back to positional
+    return list(TX_LAYOUT_POSITIONAL)
+
+
+# Derived columns every parsed ledger frame carries after TX_HEADERS.
+TX_FRAME_COLUMNS = TX_HEADERS + ["_row", "Month", "EffectiveType", "ExpenseFlags", "MerchantKey"]
+
+# Salary/payroll-like wording in Category or Notes marks a row as income whatever its Type. Matches
+# whole words on the text lowercased with every run of non a-z characters read as one space.
+INCOME_TOKEN_RE = re.compile(r"(?<![a-z])(?:salary|payroll|pay[^a-z]+cheque|paycheck|paycheque|wages|bonus)(?![a-z])")
+
+
+def effective_types(df: pd.DataFrame) -> pd.Series:
+    """Type with the income override: rows whose Category/Notes read as income count as Credit.
+
+    The dashboard uses this so Salary entered as a Debit by mistake does not show up as Outflow.
+    Computed once per parsed row (EffectiveType column); appended/edited rows are parsed afresh.
+    """
+    if df is None or df.empty or "Type" not in df.columns:
+        return pd.Series([], dtype=str)
+    t = df["Type"].astype(str)
+    if "Category" not in df.columns:
+        return t
+    text = df["Category"].astype(str).str.lower()
+    for note_col in ("Notes", "Reason/Notes", "Reason", "Description"):
+        if note_col in df.columns:
+            text = text + " " + df[note_col].astype(str).str.lower()
+            break
+    search = INCOME_TOKEN_RE.search
+    is_income = np.fromiter((search(s) is not None for s in text.tolist()), dtype=bool, count=len(text))
+    return t.mask(is_income, "Credit")
+
+
+# ExpenseFlags bits: why a row is a money movement rather than an expense (0 = counts as expense).
+# HF9: LOC utilization and transfers are tracked but kept out of expense charts.
+# Flags read only the row's own Type/Pay/Account/Category, so saving rules or accounts never moves them.
+FLAG_MOVE_TYPE = 1   # International / CC Repay / LOC Draw / LOC Repay
+FLAG_LOC = 2         # Debit card charge on a line-of-credit account
+FLAG_REMIT = 4       # remittance / transfer category
+FLAG_REPAY = 8       # repayment category
+MOVEMENT_TYPES = ("International", "CC Repay", "LOC Draw", "LOC Repay")
+LOC_ACCOUNT_RE = re.compile(r"\bline\s*of\s*credit\b|\bloc\b")
+REMIT_CATEGORY_RE = re.compile(r"india|remit|remittance|international\s*transfer|transfer\s*abroad|send\s*home")
+REPAY_CATEGORY_RE = re.compile(r"repay|repayment")
+
+
+def _distinct_test(s: pd.Series, test) -> np.ndarray:
+    """test(str) per distinct value of `s`, broadcast back to one bool per row."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, uniq = s.cat.codes.to_numpy(), s.cat.categories
+    else:
+        codes, uniq = pd.factorize(s.astype(str))
+    hits = np.array([bool(test(str(u))) for u in uniq] + [False], dtype=bool)  # code -1 (NaN) -> False
+    return hits[codes]
+
+
+def expense_flags(df: pd.DataFrame) -> np.ndarray:
+    """ExpenseFlags (uint8 bit set, see FLAG_*) for each row; evaluated once per distinct value."""
+    if df is None or df.empty:
+        return np.zeros(0, dtype=np.uint8)
+    typ = _distinct_test(df["Type"], lambda v: v.strip() in MOVEMENT_TYPES)
+    debit = _distinct_test(df["Type"], lambda v: v.strip() == "Debit")
+    card = _distinct_test(df["Pay"], lambda v: v.strip().lower() == "card")
+    loc = _distinct_test(df["Account"], lambda v: LOC_ACCOUNT_RE.search(v.strip().lower()))
+    remit = _distinct_test(df["Category"], lambda v: REMIT_CATEGORY_RE.search(v.strip().lower()))
+    repay = _distinct_test(df["Category"], lambda v: REPAY_CATEGORY_RE.search(v.strip().lower()))
+    flags = typ * FLAG_MOVE_TYPE + (loc & card & debit) * FLAG_LOC + remit * FLAG_REMIT + repay * FLAG_REPAY
+    return flags.astype(np.uint8)
+
+
+def tx_frame_from_rows(rows: List[List[object]], layout: List[Optional[int]], first_row: int = 2) -> pd.DataFrame:
+    """Parse raw sheet rows into the in-memory ledger schema (TX_FRAME_COLUMNS)."""
+    data = {
+        canon: [(r[i] if (i is not None and i < len(r)) else "") for r in rows]
+        for canon, i in zip(TX_HEADERS, layout)
+    }
+    df = pd.DataFrame(data, columns=TX_HEADERS)
+    df["_row"] = [first_row + i for i in range(len(df))]
+
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce").dt.normalize()
+    df["Amount"] = pd.to_numeric(df["Amount"], errors="coerce").fillna(0.0)
+    df["Month"] = df["Date"].dt.to_period("M").astype(str)
+    df["EffectiveType"] = effective_types(df)
+    df["ExpenseFlags"] = expense_flags(df)
+    df["MerchantKey"] = merchant_keys(df["Notes"])
+    return df
+
+
+# Low-cardinality ledger columns held as categoricals. Categories are the fixed vocabulary plus
+# whatever the ledger holds, sorted, so sort/groupby order matches plain strings and the month
+# codes are chronological. Month is ordered, and its vocabulary is every month 2000-2099: pandas
+# only compares an ordered categorical to a scalar that is one of its categories, so this is what
+# makes `Month <= "2026-02"` work for months the ledger doesn't hold ("" sorts first, as a string).
+TX_CATEGORY_COLUMNS = ["Owner", "Type", "Pay", "Account", "Category", "AutoTag", "Deleted", "Month",
+                       "EffectiveType", "MerchantKey"]
+TX_ORDERED_COLUMNS = {"Month"}
+TX_MONTH_CATEGORIES = [""] + [f"{y}-{m:02d}" for y in range(2000, 2100) for m in range(1, 13)]
+TX_BASE_CATEGORIES = {
+    "Owner": ["Family"],
+    "Type": ENTRY_TYPES,
+    "Pay": PAY_METHODS,
+    "Account": [""] + ALLOWED_ACCOUNTS,
+    "Category": [""] + list(CATEGORY_ICON) + list(DEFAULT_CATEGORY_RULES),
+    "AutoTag": [""],
+    "Deleted": [""],
+    "Month": TX_MONTH_CATEGORIES,
+    "EffectiveType": ENTRY_TYPES,
+    "MerchantKey": [""],
+}
+
+
+def compact_tx_frame(tx_df: pd.DataFrame, accounts: Optional[List[str]] = None) -> pd.DataFrame:
+    """Ledger frame with TX_CATEGORY_COLUMNS as categoricals (columns already categorical are kept).
+
+    `accounts` (the accounts tab) joins the Account vocabulary so new rows rarely widen it.
+    """
+    todo = [c for c in TX_CATEGORY_COLUMNS
+            if c in tx_df.columns and not isinstance(tx_df[c].dtype, pd.CategoricalDtype)]
+    if not todo:
+        return tx_df
+    out = tx_df.copy(deep=False)
+    for c in todo:
+        col = out[c].fillna("").astype(str)
+        base = TX_BASE_CATEGORIES[c] + (list(accounts or []) if c == "Account" else [])
+        cats = sorted(set(base).union(col.unique()))
+        out[c] = pd.Categorical(col, categories=cats, ordered=c in TX_ORDERED_COLUMNS)
+    return out
+
+
+def _tx_concat_frames(parts: List[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat for ledger frames that keeps the categorical columns categorical.
+
+    Parts whose categories differ (or plain-string parts, e.g. freshly parsed rows) are cast to
+    the union first; otherwise pandas would fall back to object columns.
+    """
+    parts = list(parts)
+    for c in TX_CATEGORY_COLUMNS:
+        dtypes = [p[c].dtype for p in parts if c in p.columns]
+        if not any(isinstance(d, pd.CategoricalDtype) for d in dtypes):
+            continue
+        if all(d == dtypes[0] for d in dtypes):
+            continue
+        cats = set()
+        for p in parts:
+            if c in p.columns:
+                s = p[c]
+                cats.update(s.cat.categories if isinstance(s.dtype, pd.CategoricalDtype)
+                            else s.fillna("").astype(str).unique())
+        dtype = pd.CategoricalDtype(sorted(cats), ordered=c in TX_ORDERED_COLUMNS)
+        parts = [p.astype({c: dtype}) if c in p.columns else p for p in parts]
+    return pd.concat(parts, ignore_index=True)
+
+
+def tx_memory_report(tx_df: pd.DataFrame) -> pd.DataFrame:
+    """Bytes per row for each ledger column: as plain Python strings vs the compact in-memory schema."""
+    n = max(len(tx_df), 1)
+    rows = []
+    for c in tx_df.columns:
+        s = tx_df[c]
+        before = s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s
+        rows.append({"Column": c, "Dtype": str(s.dtype),
+                     "Before B/row": before.memory_usage(index=False, deep=True) / n,
+                     "After B/row": s.memory_usage(index=False, deep=True) / n})
+    report = pd.DataFrame(rows, columns=["Column", "Dtype", "Before B/row", "After B/row"])
+    total = {"Column": "Total", "Dtype": "", "Before B/row": report["Before B/row"].sum(),
+             "After B/row": report["After B/row"].sum()}
+    return pd.concat([report, pd.DataFrame([total])], ignore_index=True).round(1)
+
+
+def drop_tombstones(tx_df: pd.DataFrame) -> pd.DataFrame:
+    """Live rows only (blank Deleted); `_row` keeps each row's sheet row number."""
+    live = tx_df["Deleted"].astype(str).str.strip() == ""
+    return tx_df if live.all() else tx_df[live].reset_index(drop=True)
+
+
+# Content hash: every column but Deleted (tombstoned rows are not in the frame). Per-row hashes are
+# summed (mod 2**64) into the mark's "content", so appends and edits can adjust it in place.
+TX_CONTENT_COLUMNS = [c for c in TX_HEADERS if c != "Deleted"]
+_ROW_HASH_MUL = np.uint64(0x100000001B3)
+
+
+def _column_hashes(s: pd.Series, col: str) -> np.ndarray:
+    if col == "Date":
+        return pd.util.hash_array(pd.to_datetime(s, errors="coerce").to_numpy("datetime64[ns]").view(np.int64))
+    if col == "Amount":
+        return pd.util.hash_array(pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64))
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        cats = pd.util.hash_array(np.append(s.cat.categories.astype(str).to_numpy(dtype=object), ""))
+        return cats[s.cat.codes.to_numpy()]  # code -1 (missing) -> the "" slot at the end
+    return pd.util.hash_array(s.fillna("").astype(str).to_numpy(dtype=object))
+
+
+def _tx_key_hashes(row_nums, txids, created) -> np.ndarray:
+    """uint64 per live row over (sheet row, TxId, CreatedAt)."""
+    h = pd.util.hash_array(np.asarray(row_nums, dtype=np.int64))
+    with np.errstate(over="ignore"):
+        for v in (txids, created):
+            h = (h * _ROW_HASH_MUL) ^ pd.util.hash_array(np.asarray(v, dtype=object))
+    return h
+
+
+def _tx_keys(tx_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return (tx_df["_row"].to_numpy(dtype=np.int64), tx_df["TxId"].astype(str).to_numpy(dtype=object),
+            tx_df["CreatedAt"].astype(str).to_numpy(dtype=object))
+
+
+def _tx_key_digest(row_nums, txids, created, base: str = "0") -> str:
+    """Checksum over (sheet row, TxId, CreatedAt) of the live rows: `base` (a previous digest, hex)
+    plus their key hashes, mod 2**64. Summed like the content digest, so patches move it in place."""
+    total = (int(base, 16) + int(_tx_key_hashes(row_nums, txids, created).sum(dtype=np.uint64))) & 0xFFFFFFFFFFFFFFFF
+    return format(total, "016x")
+
+
+def tx_row_hashes(tx_df: pd.DataFrame) -> np.ndarray:
+    """uint64 per row over its sheet row and TX_CONTENT_COLUMNS.
+
+    The same for a row however the frame was built (sheet read, replica, local patch; plain or
+    categorical columns), so a full read can be compared against what a session holds.
+    """
+    h = pd.util.hash_array(tx_df["_row"].to_numpy(dtype=np.int64))
+    with np.errstate(over="ignore"):
+        for c in TX_CONTENT_COLUMNS:
+            h = (h * _ROW_HASH_MUL) ^ _column_hashes(tx_df[c], c)
+    return h
+
+
+def tx_content_digest(tx_df: pd.DataFrame, base: str = "0") -> str:
+    """`base` (a previous digest, hex) plus the row hashes of `tx_df`, mod 2**64."""
+    total = (int(base, 16) + int(tx_row_hashes(tx_df).sum(dtype=np.uint64))) & 0xFFFFFFFFFFFFFFFF
+    return format(total, "016x")
+
+
+def tx_content_patched(content: str, removed: Optional[pd.DataFrame] = None,
+                       added: Optional[pd.DataFrame] = None) -> str:
+    """Content digest after dropping `removed` rows and adding `added` ones, hashing only those."""
+    total = int(content, 16)
+    if removed is not None and len(removed):
+        total -= int(tx_row_hashes(removed).sum(dtype=np.uint64))
+    if added is not None and len(added):
+        total += int(tx_row_hashes(added).sum(dtype=np.uint64))
+    return format(total & 0xFFFFFFFFFFFFFFFF, "016x")
+
+
+def tx_hwm_of(tx_df: pd.DataFrame, rows: Optional[int] = None, content: Optional[str] = None) -> Dict[str, object]:
+    """High-water mark: sheet rows covered (at least up to the last live row), live-key digest and
+    content digest.
+
+    Pass `rows` when the covered extent is known to reach past the last live row (tombstones at the end),
+    and `content` when the content digest is already known (see tx_content_patched).
+    """
+    last = int(tx_df["_row"].max()) - 1 if len(tx_df) else 0
+    return {
+        "rows": last if rows is None else max(int(rows), last),
+        "digest": _tx_key_digest(*_tx_keys(tx_df)),
+        "content": tx_content_digest(tx_df) if content is None else content,
+    }
+
+
+def tx_hwm_patched(hwm: Dict[str, object], removed: Optional[pd.DataFrame] = None,
+                   added: Optional[pd.DataFrame] = None) -> Dict[str, object]:
+    """tx_hwm_of after dropping `removed` live rows and adding `added` ones, hashing only those rows.
+
+    The covered extent only grows (to the last added row), as tx_hwm_of(rows=...) has it.
+    """
+    rows, digest = int(hwm["rows"]), int(str(hwm["digest"]), 16)
+    if removed is not None and len(removed):
+        digest -= int(_tx_key_hashes(*_tx_keys(removed)).sum(dtype=np.uint64))
+    if added is not None and len(added):
+        digest += int(_tx_key_hashes(*_tx_keys(added)).sum(dtype=np.uint64))
+        rows = max(rows, int(added["_row"].max()) - 1)
+    return {"rows": rows, "digest": format(digest & 0xFFFFFFFFFFFFFFFF, "016x"),
+            "content": tx_content_patched(str(hwm.get("content") or "0"), removed, added)}
+
+
+def tx_changes(tx_df: pd.DataFrame, hwm: Dict[str, object]) -> Tuple[str, Optional[pd.DataFrame]]:
+    """Full read (live rows) vs a high-water mark -> ("noop" | "delta" | "full", rows past the mark).
+
+    Unlike the key probe this sees in-place edits: any change to a covered row (or a mark without
+    a content digest) is "full"; "delta" means the covered rows are untouched and rows were appended.
+    """
+    rows = int(hwm["rows"])
+    covered = tx_df["_row"].to_numpy(dtype=np.int64) <= rows + 1
+    known = tx_hwm_of(tx_df[covered], rows=rows)
+    if known["digest"] != hwm["digest"] or known["content"] != hwm.get("content"):
+        return "full", None
+    if covered.all():
+        return "noop", None
+    return "delta", tx_df[~covered].reset_index(drop=True)
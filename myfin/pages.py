@@ -0,0 +1,1150 @@
+"""Undo, login and the six pages.
+
+Pages read the session's data and filters from st.session_state at the top of each render; plotly
+is imported on the first chart.
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from myfin.config import (
+    ACCOUNT_EMOJI_DEFAULT,
+    APP_NAME,
+    APP_VERSION,
+    CATEGORY_ICON,
+    ENTRY_TYPES,
+    PAY_METHODS,
+    TX_HEADERS,
+    TYPE_EMOJI,
+    build_account_maps,
+    build_month_options,
+    type_to_display,
+)
+from myfin.theme import is_mobile_view
+from myfin.helpers import auth_ok, cached_figure, cat_label, classify, money, parse_amount, prev_month_str, segmented
+from myfin.perf import PERF, PERF_MAX_SPANS, perf_jsonl, perf_session_id, perf_summary, perf_timed
+from myfin.sheets import SheetsUnavailable, sheets_busy_notice, sheets_busy_warning, sheets_guard
+from myfin.ledger import tx_memory_report
+from myfin.storage import (
+    admin_update_and_refresh,
+    compact_ledger,
+    delete_transaction,
+    restore_transaction,
+    save_accounts,
+    tx_row_index,
+    update_transaction,
+    upsert_pref,
+)
+from myfin.analytics import DashboardCube, credit_util_table, dashboard_cube, hero_insight, search_index
+
+
+# =============================
+# Undo stack
+# =============================
+@dataclass
+class UndoAction:
+    kind: str  # add/edit/delete
+    txid: Optional[str] = None
+    row_num: Optional[int] = None
+    old_row: Optional[List[object]] = None
+
+def push_undo(action: UndoAction):
+    st.session_state["undo"] = action
+
+def confidence_tag(auto_tag: str) -> str:
+    tag = (auto_tag or "").strip()
+    if tag.startswith("AUTO:"):
+        return "🔁 Auto-recurring"
+    if tag.startswith("RULE:"):
+        return "🧠 Auto-categorized"
+    if tag.startswith("MANUAL:"):
+        return "✍️ Manual"
+    return "—"
+
+def render_undo():
+    ua: Optional[UndoAction] = st.session_state.get("undo")
+    if not ua:
+        return
+    c1, c2 = st.columns([1, 5])
+    with c1:
+        if st.button("Undo", key="undo_btn"):
+            try:
+                if ua.kind == "add" and ua.txid:
+                    if ua.txid in tx_row_index():
+                        delete_transaction(ua.txid)
+                elif ua.kind == "edit" and ua.old_row:
+                    r = ua.old_row
+                    update_transaction(ua.txid or r[0], {
+                        "TxId": r[0], "Date": r[1], "Type": r[3], "Amount": float(r[4]),
+                        "Pay": r[5], "Account": r[6], "Category": r[7], "Notes": r[8],
+                        "CreatedAt": r[9], "AutoTag": r[10],
+                    })
+                elif ua.kind == "delete" and ua.row_num and ua.old_row:
+                    # the tombstoned row is still at row_num (unless compacted since)
+                    restore_transaction(ua.row_num, ua.old_row)
+                st.session_state["undo"] = None
+                st.toast("Undone ✅", icon="↩️")
+                st.rerun()
+            except SheetsUnavailable as e:
+                sheets_busy_warning("the undo", e)  # undo entry kept, so it can be retried
+            except Exception as e:
+                st.error(f"Undo failed: {e}")
+    with c2:
+        st.caption("Undo last action (until the next action).")
+
+
+# =============================
+# Login
+# =============================
+def require_login():
+    if st.session_state.get("authed", False):
+        return
+
+    # Lightweight login UI (mobile-friendly)
+    st.markdown(f"## 🔐 {APP_NAME}  ·  {APP_VERSION}")
+    st.caption("Sign in to continue.")
+
+    with st.form("login_form", clear_on_submit=False, border=True):
+        u = st.text_input("Username", value="", autocomplete="username")
+        p = st.text_input("Password", value="", type="password", autocomplete="current-password")
+        ok = st.form_submit_button("Sign in", width="stretch")
+
+    if ok:
+        if auth_ok(u, p):
+            st.session_state["authed"] = True
+            st.toast("Signed in ✅", icon="✅")
+            st.rerun()
+        else:
+            st.error("Invalid username or password.")
+
+    st.stop()
+
+# Pages
+# =============================
+def render_debit_categories_chart(cube: DashboardCube, month: str, types: List[str]) -> None:
+    st.markdown("### 🧩 Debit categories (this month)")
+    # Only true expenses (exclude Income even if mis-typed as Debit), within the sidebar type filter
+    by_cat = cube.category_totals(month, etype="Debit", types=tuple(types)).copy()
+    if by_cat.empty:
+        st.caption("No debit transactions this month.")
+    else:
+        by_cat["CategoryLabel"] = by_cat["Category"].apply(cat_label)
+        import plotly.express as px
+
+        fig_cat = cached_figure("debit_by_category", by_cat[["CategoryLabel", "Amount"]], lambda d: px.bar(
+            d, x="CategoryLabel", y="Amount", title="Debit by Category", height=420, template="plotly_dark",
+            color_discrete_sequence=px.colors.qualitative.Set2), bargap=0.35, margin=dict(l=10,r=10,t=50,b=10))
+        st.plotly_chart(fig_cat, width="stretch")
+
+
+@st.fragment
+@perf_timed("fragment")
+def dashboard_spending_snapshot(month_sel: str) -> None:
+    """Top categories + breakdown. A category tap reruns only this fragment, not the page."""
+    import plotly.express as px
+
+    tx_df = st.session_state["tx_df"]
+    cube = dashboard_cube(tx_df)
+    st.markdown("### 🧾 Spending snapshot")
+    by_cat = cube.category_totals(month_sel, types=("Debit",)).copy()
+    if by_cat.empty:
+        st.caption("No expense (Debit) transactions for this month.")
+    else:
+        by_cat["CategoryLabel"] = by_cat["Category"].apply(cat_label)
+        top = by_cat.head(8).copy()
+
+        # Keep selection sticky across reruns
+        if "dash_spend_cat" not in st.session_state or st.session_state["dash_spend_cat"] not in by_cat["Category"].tolist():
+            st.session_state["dash_spend_cat"] = top.iloc[0]["Category"]
+
+        cL, cR = st.columns([1, 1], gap="large")
+
+        with cL:
+            st.markdown("<div class='mf-card mf-anim'><div class='mf-sub'>Top categories (tap to view details)</div></div>", unsafe_allow_html=True)
+            fig1 = cached_figure(
+                "snapshot_top_categories",
+                top[["CategoryLabel", "Amount"]].iloc[::-1],
+                lambda d: px.bar(d, x="Amount", y="CategoryLabel", orientation="h"),
+                height=320,
+                margin=dict(l=0, r=0, t=10, b=0),
+                xaxis_title=None,
+                yaxis_title=None,
+                showlegend=False,
+            )
+            st.plotly_chart(fig1, width="stretch")
+
+            # Category 'list' selector (premium-feeling, compact)
+            for _, row in top.iterrows():
+                cat = row["Category"]
+                is_sel = (cat == st.session_state["dash_spend_cat"])
+                label = f"{cat_label(cat)}  •  {money(float(row['Amount']))}"
+                if st.button(label, key=f"dash_catbtn_{cat}", use_container_width=True, type=("primary" if is_sel else "secondary")):
+                    st.session_state["dash_spend_cat"] = cat
+
+        with cR:
+            sel = st.session_state["dash_spend_cat"]
+            st.markdown(
+                f"""<div class='mf-card mf-anim'>
+                <div class='mf-sub'>Breakdown</div>
+                <div style='font-size:20px;font-weight:850;margin-top:2px;'>{cat_label(sel)}</div>
+                </div>""",
+                unsafe_allow_html=True,
+            )
+            mrows = tx_df.iloc[cube.month_rows(month_sel)]
+            sub = mrows[(mrows["Type"] == "Debit") & (mrows["Category"] == sel)].copy()
+
+            # Use AutoTag when present; otherwise Notes
+            label_col = "AutoTag" if ("AutoTag" in sub.columns and sub["AutoTag"].astype(str).str.strip().ne("").any()) else "Notes"
+            sub[label_col] = sub[label_col].astype(str).str.strip()
+            sub.loc[sub[label_col] == "", label_col] = "(Unlabeled)"
+
+            by_lbl = (
+                sub.groupby(label_col, as_index=False)["Amount"]
+                .sum()
+                .sort_values("Amount", ascending=False)
+            )
+
+            fig2 = cached_figure(
+                "snapshot_breakdown",
+                by_lbl.head(12).iloc[::-1],
+                lambda d: px.bar(d, x="Amount", y=d.columns[0], orientation="h"),
+                height=420,
+                margin=dict(l=0, r=0, t=10, b=0),
+                xaxis_title=None,
+                yaxis_title=None,
+                showlegend=False,
+            )
+            st.plotly_chart(fig2, width="stretch")
+
+
+@perf_timed("page")
+def page_dashboard():
+    # V3_1A Dashboard (visual-only)
+    st.markdown("## 🧭 Dashboard")
+    tx_df, acct_df = st.session_state["tx_df"], st.session_state["acct_df"]
+    month_sel, type_filter = st.session_state["flt_month"], st.session_state["flt_types"]
+    cube = dashboard_cube(tx_df)
+    # Friendly insight card
+    try:
+        insight = hero_insight(cube, month_sel)
+    except Exception:
+        insight = "Overview for the selected month."
+
+    # Compute month summaries
+    cur = cube.summary(month_sel)
+    pm = prev_month_str(month_sel)
+    prev = cube.summary(pm) if pm else {"Credit":0,"Debit":0,"Investment":0,"CC Repay":0,"International":0}
+
+    outflow = float(cur.get("Debit",0)) + float(cur.get("Investment",0)) + float(cur.get("CC Repay",0)) + float(cur.get("International",0))
+    prev_outflow = float(prev.get("Debit",0)) + float(prev.get("Investment",0)) + float(prev.get("CC Repay",0)) + float(prev.get("International",0))
+    incoming = float(cur.get("Credit",0))
+    prev_incoming = float(prev.get("Credit",0))
+    net = incoming - outflow
+    prev_net = prev_incoming - prev_outflow
+
+    def _delta(a, b):
+        d = float(a) - float(b)
+        sign = "+" if d >= 0 else "−"
+        return f"{sign}{money(abs(d))}"
+
+
+    net_color = "#00e676" if net >= 0 else "#ff5252"
+    # HERO
+    left, right = st.columns([1.35, 1.0], gap="large")
+    with left:
+        st.markdown(
+            f"""<div class='mf-card mf-anim'>
+            <div style='display:flex;justify-content:space-between;align-items:flex-start;gap:16px;'>
+              <div>
+                <div class='mf-sub'>This month • {month_sel}</div>
+                <div style='font-size:34px;font-weight:800;line-height:1.15;margin-top:6px;'>Net: <span style='color:{net_color};'>{money(net)}</span></div>
+                <div class='mf-sub' style='margin-top:6px;'>Δ {_delta(net, prev_net)} vs last month</div>
+              </div>
+              <div style='text-align:right;'>
+                <div class='mf-sub'>Incoming</div>
+                <div style='font-size:22px;font-weight:750;line-height:1.2;'>{money(incoming)}</div>
+                <div class='mf-sub'>Outflow</div>
+                <div style='font-size:22px;font-weight:750;line-height:1.2;'>{money(outflow)}</div>
+              </div>
+            </div>
+            <div style='margin-top:12px;'>
+              <div class='mf-pill'>Spend focus</div>
+              <span class='mf-sub' style='margin-left:10px;'>{insight}</span>
+            </div>
+            </div>""",
+            unsafe_allow_html=True,
+        )
+
+    with right:
+        # Spend composition / health
+        debit = float(cur.get("Debit",0))
+        invest = float(cur.get("Investment",0))
+        repay = float(cur.get("CC Repay",0))
+        remit = float(cur.get("International",0))
+        st.markdown(
+            f"""<div class='mf-card mf-anim'>
+            <div style='display:flex;justify-content:space-between;align-items:center;'>
+              <div>
+                <div class='mf-sub'>Spending (Expenses only)</div>
+                <div style='font-size:26px;font-weight:800;margin-top:4px;'>{money(debit)}</div>
+                <div class='mf-sub'>Δ {_delta(debit, float(prev.get("Debit",0)))} vs last month</div>
+              </div>
+              <div class='mf-pill'>Clean view</div>
+            </div>
+            <div style='margin-top:12px;display:grid;grid-template-columns:1fr 1fr;gap:10px;'>
+              <div style='padding:10px;border-radius:14px;background:rgba(255,255,255,0.04);'>
+                <div class='mf-sub'>Invest</div>
+                <div style='font-weight:750;font-size:18px;'>{money(invest)}</div>
+              </div>
+              <div style='padding:10px;border-radius:14px;background:rgba(255,255,255,0.04);'>
+                <div class='mf-sub'>Repay</div>
+                <div style='font-weight:750;font-size:18px;'>{money(repay)}</div>
+              </div>
+              <div style='padding:10px;border-radius:14px;background:rgba(255,255,255,0.04);'>
+                <div class='mf-sub'>Remit</div>
+                <div style='font-weight:750;font-size:18px;'>{money(remit)}</div>
+              </div>
+              <div style='padding:10px;border-radius:14px;background:rgba(255,255,255,0.04);'>
+                <div class='mf-sub'>Safe-to-spend*</div>
+                <div style='font-weight:750;font-size:18px;'>{money(max(0.0, incoming - (invest + repay + remit)))}</div>
+              </div>
+            </div>
+            <div class='mf-sub' style='margin-top:10px;'>*Excludes essential bills if you categorize them under Expenses.</div>
+            </div>""",
+            unsafe_allow_html=True,
+        )
+
+
+    # Interactive spending snapshot (V3_1A_HF2)
+    dashboard_spending_snapshot(month_sel)
+
+    st.markdown("### 💳 Credit health")
+    try:
+        util = credit_util_table(tx_df, month_sel, acct_df)
+    except Exception:
+        util = None
+
+    if util is None or getattr(util, "empty", True):
+        st.info("No credit accounts found. Add cards/limits in **Admin → Accounts**.")
+    else:
+        # Render as 2-column grid of compact cards
+        cards = [util.iloc[i] for i in range(len(util))]
+        rows = [cards[i:i+2] for i in range(0, len(cards), 2)]
+        for rset in rows:
+            cols = st.columns(len(rset), gap="large")
+            for col, row in zip(cols, rset):
+                with col:
+                    lim = float(row.get("Limit", 0) or 0)
+                    bal = float(row.get("Balance", 0) or 0)
+                    pct = None if lim <= 0 else (bal/lim*100.0)
+                    if pct is None:
+                        status = "Set limit in Admin"
+                        badge = "<span class='mf-pill'>Needs limit</span>"
+                        bar = ""
+                    else:
+                        if pct < 30:
+                            status = "Healthy"
+                            badge = "<span class='mf-pill'>Healthy</span>"
+                        elif pct < 70:
+                            status = "Watch"
+                            badge = "<span class='mf-pill'>Watch</span>"
+                        else:
+                            status = "High"
+                            badge = "<span class='mf-pill'>High</span>"
+                        bar = f"""<div style='height:8px;border-radius:999px;background:rgba(255,255,255,0.08);overflow:hidden;margin-top:10px;'>
+                                  <div style='height:8px;width:{min(100,max(0,pct)):.0f}%;background:rgba(99,102,241,0.95);'></div>
+                                </div>"""
+                    st.markdown(
+                        f"""<div class='mf-card mf-anim'>
+                        <div style='display:flex;justify-content:space-between;align-items:flex-start;gap:12px;'>
+                          <div>
+                            <div style='font-weight:800;font-size:18px;'>{row.get("Account","")}</div>
+                            <div class='mf-sub'>{status}</div>
+                          </div>
+                          {badge}
+                        </div>
+                        <div style='display:flex;justify-content:space-between;margin-top:10px;'>
+                          <div>
+                            <div class='mf-sub'>Balance</div>
+                            <div style='font-weight:800;font-size:20px;'>{money(bal)}</div>
+                          </div>
+                          <div style='text-align:right;'>
+                            <div class='mf-sub'>Limit</div>
+                            <div style='font-weight:800;font-size:20px;'>{money(lim)}</div>
+                          </div>
+                        </div>
+                        {bar}
+                        <div class='mf-sub' style='margin-top:8px;'>Utilization: {"—" if pct is None else f"{pct:.0f}%"} </div>
+                        </div>""",
+                        unsafe_allow_html=True
+                    )
+
+    st.markdown("### 📈 Spending snapshot")
+    # Default to showing the debit categories chart in a compact expander
+    with st.expander("View expense breakdown (expenses only)", expanded=False):
+        try:
+            render_debit_categories_chart(cube, month_sel, type_filter)
+        except Exception as e:
+            st.warning("Could not render chart for this month.")
+
+@perf_timed("page")
+def page_add():
+    if is_mobile_view():
+        return page_add_mobile()
+    st.markdown("## ➕ Add")
+    add_entry_form(st.session_state["flt_month"] in set(st.session_state["locked_months"]))
+
+
+@st.fragment
+@perf_timed("fragment")
+def add_entry_form(locked_now: bool) -> None:
+    """Quick-action tiles, category chips and the entry form: clicks and edits rerun only this
+    fragment (the sidebar, recurring check and other pages' work are skipped)."""
+    rules = st.session_state["rules"]
+    # --- Premium Tiles: quick type selection (UI-only, logic unchanged) ---
+    if "add_type_pick" not in st.session_state:
+        st.session_state["add_type_pick"] = None
+
+    st.markdown('<div class="quick-actions">', unsafe_allow_html=True)
+    st.markdown("### Quick actions")
+    _tile_primary = [("Expense (−)", "Debit"), ("Income (+)", "Credit"), ("Invest", "Investment")]
+    _tile_actions = [("Pay Credit Card", "CC Repay"), ("Remit International", "International"), ("LOC Draw", "LOC Draw"), ("LOC Repay", "LOC Repay")]
+
+    def _render_tiles(_items, _cols=3, _key_prefix="tile"):
+        cols = st.columns(_cols, gap="small")
+        for i, (label, value) in enumerate(_items):
+            with cols[i % _cols]:
+                if st.button(label, use_container_width=True, key=f"{_key_prefix}_{i}"):
+                    # Everything below reads the pick, so the run carries on instead of rerunning.
+                    st.session_state["add_type_pick"] = value
+    _render_tiles(_tile_primary, _cols=2, _key_prefix="tile_p")
+    _render_tiles(_tile_actions, _cols=2, _key_prefix="tile_a")
+
+    _pref_type = st.session_state.get("add_type_pick")
+
+    if locked_now:
+        st.info("This month is locked. Switch month in sidebar or unlock in Admin.")
+
+    # Keyboard-first autofocus amount
+    st.components.v1.html("""
+    <script>
+    setTimeout(() => {
+      const inputs = parent.document.querySelectorAll('input');
+      for (const el of inputs) {
+        if (el.getAttribute('aria-label') === 'Amount ($)') { el.focus(); break; }
+      }
+    }, 250);
+    </script>
+    """, height=0)
+
+    qd = st.session_state["quick_defaults"]
+    categories = sorted(set(list(rules.keys()) + list(CATEGORY_ICON.keys())))
+    allowed_accounts, emoji_map = build_account_maps(st.session_state["acct_df"])
+    acct_options = [f"{emoji_map.get(a,'💳')} {a}" for a in allowed_accounts]
+    acct_map = {f"{emoji_map.get(a,'💳')} {a}": a for a in allowed_accounts}
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# (VF2.3) Add page: use normal widgets (not st.form) so Pay changes can hide/show Account instantly
+    c1, c2, c3 = st.columns([1.05, 1.2, 1.2])
+    with c1:
+        entry_date = st.date_input("Date", value=date.today(), disabled=locked_now)
+    with c2:
+        # Primary selector = Quick actions tiles (top). Dropdown is kept in a collapsed expander as a fallback.
+        entry_type = st.session_state.get("add_type_pick")
+        if not entry_type:
+            entry_type = qd.get("Type", "Debit")
+            st.session_state["add_type_pick"] = entry_type
+            st.session_state["add_type_select"] = type_to_display(entry_type)
+        st.markdown("**Type**")
+        st.markdown(f"<div style=\"padding:8px 12px;border:1px solid rgba(255,255,255,.12);border-radius:10px;background:rgba(255,255,255,.03);display:inline-block;\">{type_to_display(entry_type)}</div>", unsafe_allow_html=True)
+        # Type is selected via Quick action tiles above.
+
+    with c3:
+        # Pay rules:
+        # - Income/Invest/Remit International => Bank only
+        # - Pay Credit Card => Bank only
+        # - Expense => Card/Bank/Cash
+        if entry_type in ("Credit", "Investment", "International"):
+            pay = st.selectbox("Pay", options=["Bank"], index=0, disabled=True, key="add_pay_fixed")
+        elif entry_type in ("CC Repay", "LOC Repay"):
+            pay = st.selectbox("Pay", options=["Bank"], index=0, disabled=True, key="add_pay_fixed_cc")
+        elif entry_type == "LOC Draw":
+            pay = st.selectbox("Pay", options=["Card"], index=0, disabled=True, key="add_pay_fixed_loc")
+        else:
+            default_pay = qd.get("Pay", "Card")
+            pay = segmented("Pay", PAY_METHODS, default=default_pay, key="add_pay")
+    amt_text = st.text_input("Amount ($)", value="", placeholder="e.g. 120 or 120.50", disabled=locked_now)
+    notes = st.text_area("Reason / Notes", value="", height=85, disabled=locked_now)
+
+    auto_cat = classify(notes, rules) if notes.strip() else "Uncategorized"
+    auto_idx = categories.index(auto_cat) if auto_cat in categories else categories.index("Uncategorized")
+
+    # --- Category chips (top spend) ---
+    if "add_cat_pick" not in st.session_state:
+        st.session_state["add_cat_pick"] = None
+
+    try:
+        _tx = st.session_state.get("tx_df")
+        _top_cats = []
+        if _tx is not None and isinstance(_tx, pd.DataFrame) and len(_tx) > 0:
+            _tmp = _tx.copy()
+            # Focus on expense categories for chips
+            if "Type" in _tmp.columns:
+                _tmp = _tmp[_tmp["Type"].astype(str).str.lower().isin(["debit", "expense", "debit (-)"])]
+            if "Date" in _tmp.columns:
+                _cut = pd.Timestamp.utcnow().normalize() - pd.Timedelta(days=90)
+                _tmp = _tmp[_tmp["Date"] >= _cut]
+            if "Category" in _tmp.columns and "Amount" in _tmp.columns:
+                _agg = _tmp.groupby("Category", dropna=False, observed=True)["Amount"].sum().sort_values(ascending=False)
+                _top_cats = [c for c in _agg.head(6).index.tolist() if str(c).strip() in categories]
+        if _top_cats:
+            st.markdown("**Quick categories**")
+            _cols = st.columns(min(6, len(_top_cats)), gap="small")
+            for i, c in enumerate(_top_cats):
+                with _cols[i]:
+                    if st.button(cat_label(str(c)), use_container_width=True, key=f"qc_{i}", disabled=locked_now):
+                        st.session_state["add_cat_pick"] = str(c)
+    except Exception:
+        pass
+
+    _picked_cat = st.session_state.get("add_cat_pick")
+    if _picked_cat in categories:
+        auto_idx = categories.index(_picked_cat)
+
+    # Account selection
+    loc_candidates = [a for a in allowed_accounts if re.search(r"\bline\s*of\s*credit\b|\bloc\b", str(a), flags=re.I)]
+    loc_account = str(loc_candidates[0]).strip() if loc_candidates else ""
+
+    if entry_type == "LOC Draw":
+        pay = "Card"
+        if not loc_account:
+            st.error("No Line of Credit account found in Admin → Accounts. Add 'RBC Line of Credit' and try again.")
+            account = ""
+        else:
+            loc_label = f"{emoji_map.get(loc_account, '🏦')} {loc_account}"
+            st.selectbox("Account", options=[loc_label], index=0, disabled=True, key="add_loc_account_draw")
+            account = loc_account
+
+    elif entry_type == "LOC Repay":
+        pay = "Bank"
+        if not loc_account:
+            st.error("No Line of Credit account found in Admin → Accounts. Add 'RBC Line of Credit' and try again.")
+            account = ""
+        else:
+            loc_label = f"{emoji_map.get(loc_account, '🏦')} {loc_account}"
+            st.selectbox("Repayment to which account?", options=[loc_label], index=0, disabled=True, key="add_loc_account_repay")
+            account = loc_account
+
+    elif entry_type == "CC Repay":
+        default_acct = qd.get("Account", allowed_accounts[0])
+        default_label = f"{emoji_map.get(default_acct, '💳')} {default_acct}"
+        default_idx = acct_options.index(default_label) if default_label in acct_options else 0
+        acct_pick = st.selectbox("Repayment to which account?", acct_options, index=default_idx, disabled=locked_now)
+        account = acct_map[acct_pick]
+        pay = "Bank"
+    else:
+        if pay == "Card" and entry_type in ("Debit", "Investment", "International"):
+            default_acct = qd.get("Account", allowed_accounts[0])
+            default_label = f"{emoji_map.get(default_acct, '💳')} {default_acct}"
+            default_idx = acct_options.index(default_label) if default_label in acct_options else 0
+            acct_pick = st.selectbox("Account", acct_options, index=default_idx, disabled=locked_now, key="add_account")
+            account = acct_map[acct_pick]
+        else:
+            st.session_state.pop("add_account", None)
+            account = ""  # No Account for non-card expenses OR for Credit/Income
+    if entry_type == "LOC Draw":
+        fixed_cat = "LOC Utilization"
+        fixed_label = cat_label(fixed_cat)
+        st.selectbox("Category", options=[fixed_label], index=0, disabled=True, key="add_cat_loc_draw")
+        category = fixed_cat
+        used_auto = False
+    elif entry_type == "LOC Repay":
+        fixed_cat = "Repayment"
+        fixed_label = cat_label(fixed_cat)
+        st.selectbox("Category", options=[fixed_label], index=0, disabled=True, key="add_cat_loc_repay")
+        category = fixed_cat
+        used_auto = False
+    else:
+        cat_pick = st.selectbox("Category", [cat_label(c) for c in categories], index=auto_idx, disabled=locked_now)
+        category = categories[[cat_label(c) for c in categories].index(cat_pick)]
+        used_auto = (category == auto_cat and auto_cat != "Uncategorized" and notes.strip() != "")
+
+    with st.expander("🔁 Recurring (optional)", expanded=False):
+        st.caption("Turn ON once. Future months auto-add when you open the app.")
+        mark_rec = st.toggle("Mark as recurring", value=False, disabled=locked_now)
+        dom = st.number_input("Day of month (1–31)", min_value=1, max_value=31, value=1, step=1, disabled=(locked_now or not mark_rec))
+        nick = st.text_input("Display name", value="", placeholder="e.g. Rent / Netflix", disabled=(locked_now or not mark_rec))
+
+    amt_preview = parse_amount(amt_text) if amt_text.strip() else None
+    amt_invalid = (amt_text.strip() == "") or (amt_preview is None)
+    if amt_text.strip() != "" and amt_preview is None:
+        st.error("Amount must be a number (e.g., 120 or 120.50).")
+
+    # --- Review before Save (premium confirm) ---
+    if "pending_add" not in st.session_state:
+        st.session_state["pending_add"] = None
+    if "show_add_review" not in st.session_state:
+        st.session_state["show_add_review"] = False
+
+    save = st.button("Save Entry", disabled=(locked_now or amt_invalid))
+
+    # Stage transaction for review instead of writing immediately
+    if save:
+        st.session_state["pending_add"] = {
+            "entry_date": entry_date,
+            "entry_type": entry_type,
+            "amt_text": amt_text,
+            "pay": pay,
+            "account": account,
+            "category": category,
+            "notes": notes,
+            "used_auto": used_auto,
+            "auto_cat": auto_cat,
+            "mark_rec": mark_rec,
+            "dom": dom if "dom" in locals() else 1,
+            "nick": nick if "nick" in locals() else "",
+        }
+        st.session_state["show_add_review"] = True
+
+    if st.session_state.get("show_add_review") and st.session_state.get("pending_add"):
+        p = st.session_state["pending_add"]
+        st.markdown("### ✅ Review")
+        _amount_preview = parse_amount(p.get("amt_text","")) or 0.0
+        _notes_preview = (p['notes'][:120] + '…') if p.get('notes') and len(p['notes']) > 120 else (p.get('notes') or '—')
+        _review_md = (
+            f"**{p['entry_type']}** • **{p['category']}** • **${_amount_preview:,.2f}**\n\n"
+            f"**Pay:** {p['pay']} • **Account:** {p['account']}\n\n"
+            f"**Notes:** {_notes_preview}"
+        )
+        st.markdown(_review_md)
+
+def page_add_mobile():
+    # Mobile variant: keep behavior identical to desktop for now (avoids undefined reference).
+    return page_add()
+
+@perf_timed("page")
+def page_creditbal():
+    st.markdown("## 💳 CreditBal")
+    st.caption("Billing-cycle view • Utilization • Safe-to-spend • Upcoming recurring before bill date.")
+    month_sel = st.session_state["flt_month"]
+    util = credit_util_table(st.session_state["tx_df"], month_sel, st.session_state["acct_df"])
+
+    for _, r in util.iterrows():
+        lim = float(r["Limit"])
+        bal = float(r["Balance"])
+        pct = None if lim <= 0 else bal/lim*100.0
+
+        st.markdown(
+            f"""
+            <div class="mf-card mf-anim">
+              <div style="display:flex; justify-content:space-between; align-items:flex-start; gap:14px;">
+                <div>
+                  <div style="font-size:18px; font-weight:950;">{r['Emoji']} {r['Account']}</div>
+                  <div style="color:rgba(232,234,237,0.70); font-size:13px; margin-top:4px;">
+                    Bill date: <b>{r['BillDate']}</b> • Cycle: <b>{r['CycleStart']}</b> → <b>{r['CycleEnd']}</b>
+                  </div>
+                  <div style="margin-top:10px; font-size:13px; color:rgba(232,234,237,0.70);">
+                    Cycle charges: <b>{money(float(r['CycleCharges']))}</b> • Cycle payments: <b>{money(float(r['CyclePayments']))}</b> • Upcoming recurring: <b>{money(float(r['UpcomingRecurringToBill']))}</b>
+                  </div>
+                </div>
+                <div style="text-align:right;">
+                  <div style="font-size:12px; color:rgba(232,234,237,0.70);">Current Balance</div>
+                  <div style="font-size:28px; font-weight:950;">{money(bal)}</div>
+                  <div style="margin-top:6px;">
+                    <span class="mf-pill">{month_sel}</span>
+                  </div>
+                </div>
+              </div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+        if lim > 0 and pct is not None:
+            safe = r["SafeToSpend"]
+            st.progress(min(max(pct, 0.0), 100.0)/100.0, text=f"{pct:.1f}% utilized of {money(lim)} • Safe-to-spend: {money(float(safe)) if safe is not None else '—'}")
+@perf_timed("page")
+def page_trends():
+    st.markdown("## 📈 Trends")
+    st.caption("Trends, top categories, top merchants, weekday spend pattern.")
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    tx_df = st.session_state["tx_df"]
+    spend = tx_df[(tx_df["Type"] == "Debit") & (tx_df["ExpenseFlags"] == 0)].copy()
+    if spend.empty:
+        st.info("No debit transactions yet.")
+    else:
+        by_m = spend.groupby("Month", as_index=False, observed=True)["Amount"].sum().sort_values("Month")
+        fig = cached_figure("trend_monthly", by_m[["Month", "Amount"]],
+                            lambda d: go.Figure(go.Scatter(x=d["Month"], y=d["Amount"], mode="lines+markers", name="Debit")),
+                            height=260, margin=dict(l=10,r=10,t=40,b=10), title="Debit Trend (monthly)",
+                            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+                            font=dict(color="#E8EAED"))
+        st.plotly_chart(fig, width="stretch")
+
+        c1, c2 = st.columns([1, 1])
+        with c1:
+            by_cat = spend.groupby("Category", as_index=False, observed=True)["Amount"].sum().sort_values("Amount", ascending=False).head(12)
+            by_cat["Category"] = by_cat["Category"].apply(cat_label)
+            st.plotly_chart(cached_figure("trend_top_categories", by_cat[["Category", "Amount"]], lambda d: px.bar(d, x="Category", y="Amount", title="Top categories", template="plotly_dark", color_discrete_sequence=px.colors.qualitative.Set2)), width="stretch")
+        with c2:
+            by_mer = spend[spend["MerchantKey"] != ""].groupby("MerchantKey", as_index=False, observed=True)["Amount"].sum().sort_values("Amount", ascending=False).head(12)
+            by_mer["MerchantKey"] = by_mer["MerchantKey"].str.title()
+            st.plotly_chart(cached_figure("trend_top_merchants", by_mer[["MerchantKey", "Amount"]], lambda d: px.bar(d, x="MerchantKey", y="Amount", title="Top merchants", template="plotly_dark", color_discrete_sequence=px.colors.qualitative.Set2)), width="stretch")
+
+        spend["Weekday"] = spend["Date"].dt.day_name()
+        wd = spend.groupby(["Weekday"], as_index=False)["Amount"].sum()
+        order = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+        wd["Weekday"] = pd.Categorical(wd["Weekday"], categories=order, ordered=True)
+        wd.sort_values("Weekday", inplace=True)
+        st.plotly_chart(cached_figure("trend_weekday", wd[["Weekday", "Amount"]], lambda d: px.bar(d, x="Weekday", y="Amount", title="Spend by weekday", template="plotly_dark", color_discrete_sequence=px.colors.qualitative.Set2)), width="stretch")
+TX_ALL_MONTHS = "All months"
+TX_SEARCH_PAGE_SIZE = 100
+
+
+@perf_timed("page")
+def page_transactions():
+    st.markdown("## 🧾 Transactions")
+    st.caption("Fast search + export. Edit/Delete in Admin → Fix Mistakes.")
+    tx_df, month_sel = st.session_state["tx_df"], st.session_state["flt_month"]
+    df = tx_df[tx_df["Type"].isin(st.session_state["flt_types"])].copy() if not tx_df.empty else tx_df.copy()
+    if df.empty:
+        st.info("No transactions.")
+    else:
+        with st.form("tx_search", border=False):
+            a, b, c = st.columns([1.2, 1.3, 1.0])
+            with a:
+                q = st.text_input("Search notes", "", help="Words or word starts, across notes, merchant, category and account")
+            with b:
+                cats = sorted(df["Category"].dropna().unique().tolist())
+                chosen = st.multiselect("Category", cats, default=cats)
+            with c:
+                m = st.selectbox("Month", [TX_ALL_MONTHS] + sorted(df["Month"].unique()), index=0)
+            run = st.form_submit_button("Search")
+
+        if not run and not q.strip():  # a submitted query stays on (paging reruns the page)
+            m = month_sel
+            chosen = sorted(df["Category"].dropna().unique().tolist())
+            q = ""
+
+        if q.strip():
+            # Ranked search over the whole ledger (inverted index), narrowed by the form filters
+            keep = tx_df["Type"].isin(st.session_state["flt_types"]).to_numpy()
+            if m != TX_ALL_MONTHS:
+                keep &= (tx_df["Month"] == m).to_numpy()
+            if chosen:
+                keep &= tx_df["Category"].isin(chosen).to_numpy()
+            show = tx_df.iloc[search_index(tx_df).search(q, mask=keep)].copy()
+        else:
+            out = df if m == TX_ALL_MONTHS else df[df["Month"] == m]
+            if chosen:
+                out = out[out["Category"].isin(chosen)]
+            show = out.sort_values("Date", ascending=False).copy()
+        show["Type"] = show["Type"].apply(lambda t: f"{TYPE_EMOJI.get(t,'')} {t}")
+        show["Category"] = show["Category"].apply(cat_label)
+        show["Account"] = show["Account"].apply(lambda a: f"{ACCOUNT_EMOJI_DEFAULT.get(a,'💳')} {a}" if a in ACCOUNT_EMOJI_DEFAULT else a)
+        show["Confidence"] = show["AutoTag"].apply(confidence_tag)
+        show = show[["Date","Type","Amount","Pay","Account","Category","Confidence","Notes"]]
+        view = show
+        if q.strip():
+            pages = max(1, -(-len(show) // TX_SEARCH_PAGE_SIZE))
+            search_key = (q.strip().lower(), m, tuple(chosen))
+            if st.session_state.get("tx_search_key") != search_key or st.session_state.get("tx_search_page", 1) > pages:
+                st.session_state["tx_search_key"] = search_key
+                st.session_state["tx_search_page"] = 1
+            where = "all months" if m == TX_ALL_MONTHS else m
+            st.caption(f"{len(show):,} matches in {where}, best first.")
+            if pages > 1:
+                page = st.number_input("Page", min_value=1, max_value=pages, step=1, key="tx_search_page")
+                view = show.iloc[(page - 1) * TX_SEARCH_PAGE_SIZE: page * TX_SEARCH_PAGE_SIZE]
+
+        # Mobile-friendly cards (optional)
+        vm = st.session_state.get("view_mode", "Auto")
+        default_cards = (vm == "Mobile")
+        card_view = st.toggle("Card view", value=default_cards, key="tx_card_view")
+
+        if card_view:
+            max_n = min(300, len(view))
+            n = st.select_slider("Show last", options=[25, 50, 100, 200, max_n], value=min(50, max_n), key="tx_card_n")
+            sdf = view.head(n).copy()
+            for i, r in sdf.iterrows():
+                title = f"{r['Date']} • {r['Category']} • {r['Amount']}"
+                with st.expander(title, expanded=False):
+                    st.write(f"**Type:** {r['Type']}")
+                    st.write(f"**Pay:** {r['Pay']}")
+                    st.write(f"**Account:** {r['Account']}")
+                    st.write(f"**Confidence:** {r['Confidence']}")
+                    if str(r.get('Notes','')).strip():
+                        st.write(f"**Notes:** {r['Notes']}")
+        else:
+            st.dataframe(view, width="stretch", hide_index=True)
+
+        st.download_button("Download CSV", data=show.to_csv(index=False).encode("utf-8"),
+                           file_name=f"{APP_NAME.replace(' ','_')}_{'all' if m == TX_ALL_MONTHS else m}.csv", mime="text/csv")
+@perf_timed("page")
+def page_admin():
+    st.markdown("## 🛡️ Admin")
+    st.caption("Lock months • Accounts • Fix mistakes • Rules • Recurring • Insights • Performance • Backup")
+    tx_df, acct_df = st.session_state["tx_df"], st.session_state["acct_df"]
+    rules, rules_locked = st.session_state["rules"], st.session_state["rules_locked"]
+    locked_months = st.session_state["locked_months"]
+    allowed_accounts_live, emoji_map_live = build_account_maps(acct_df)
+
+    sections = ["Monthly Lock", "Accounts", "Fix Mistakes", "Rules", "Recurring", "Insights", "Performance"]
+    st.session_state["admin_section"] = segmented("Section", sections, default=st.session_state["admin_section"], key="admin_seg")
+    section = st.session_state["admin_section"]
+
+    if section == "Monthly Lock":
+        st.markdown("### 🔒 Monthly lock")
+        months = sorted(tx_df["Month"].unique().tolist()) if not tx_df.empty else []
+        if not months:
+            now = pd.Period(date.today(), freq="M")
+            months = sorted({str(now + i) for i in range(-2, 8)})
+            months = sorted(set(months) | set(build_month_options()))
+
+        safe_default = [m for m in sorted(set(locked_months)) if m in months]
+        selected = st.multiselect("Locked months", options=months, default=safe_default)
+        if st.button("Save Locks"):
+            with sheets_busy_notice("saving the locks"):
+                admin_update_and_refresh("locked_months", ", ".join(sorted(set(selected))))
+                st.toast("Locks updated ✓", icon="🔒")
+                st.rerun()
+
+    elif section == "Accounts":
+        st.markdown("### 💳 Account limits + billing day")
+        st.caption("Set limits for utilization %. BillingDay = bill generation day (1–31).")
+
+        # Show table
+        view = acct_df.copy()
+        st.dataframe(view, width="stretch", hide_index=True)
+
+        allowed_accounts, emoji_map = build_account_maps(acct_df)
+
+        st.markdown("#### Edit an account")
+        acct_opts = [f"{emoji_map.get(a,'💳')} {a}" for a in allowed_accounts]
+        pick = st.selectbox("Account", acct_opts, index=0, key="admin_acct_pick")
+        acct = pick.split(" ", 1)[1]
+        row = acct_df[acct_df["Account"] == acct].iloc[0]
+
+        new_emoji = st.text_input("Emoji", value=str(row.get("Emoji","")).strip() or emoji_map.get(acct, "💳"))
+        new_limit = st.number_input("Limit ($)", min_value=0.0, step=100.0, value=float(row.get("Limit", 0) or 0))
+        new_bill = st.number_input("Billing day (1–31)", min_value=1, max_value=31, step=1, value=int(row.get("BillingDay", 1) or 1))
+
+        c1, c2 = st.columns([1, 1])
+        with c1:
+            if st.button("Save Account", width="stretch"):
+                df2 = acct_df.copy()
+                df2.loc[df2["Account"] == acct, "Emoji"] = new_emoji.strip() or emoji_map.get(acct, "💳")
+                df2.loc[df2["Account"] == acct, "Limit"] = float(new_limit)
+                df2.loc[df2["Account"] == acct, "BillingDay"] = int(new_bill)
+                with sheets_busy_notice("saving the account"):
+                    save_accounts(df2)
+                    st.toast("Saved ✓", icon="✅")
+                    st.rerun()
+        with c2:
+            # Remove account (card)
+            if st.button("Remove Account", width="stretch"):
+                df2 = acct_df.copy()
+                df2 = df2[df2["Account"] != acct].copy()
+                # Safety: ensure at least one account remains
+                if df2.empty:
+                    st.error("You must keep at least one account.")
+                else:
+                    with sheets_busy_notice("removing the account"):
+                        save_accounts(df2)
+                        # Clear any stale selections (e.g., Add page)
+                        for k in ["add_account", "add_repay_account", "admin_acct_pick"]:
+                            if k in st.session_state:
+                                st.session_state.pop(k, None)
+                        st.toast("Removed ✓", icon="🗑️")
+                        st.rerun()
+
+        st.divider()
+        st.markdown("#### Add a new account")
+        with st.form("admin_add_account", border=True):
+            new_name = st.text_input("Account name", value="", placeholder="e.g. Canadian Tire Card")
+            add_emoji = st.text_input("Emoji (optional)", value="💳")
+            add_limit = st.number_input("Limit ($)", min_value=0.0, step=100.0, value=0.0)
+            add_bill = st.number_input("Billing day (1–31)", min_value=1, max_value=31, step=1, value=1)
+            submit_add = st.form_submit_button("Add Account")
+        if submit_add:
+            nm = (new_name or "").strip()
+            if not nm:
+                st.error("Account name is required.")
+            elif nm in set(acct_df["Account"].astype(str).tolist()):
+                st.error("That account already exists.")
+            else:
+                df2 = acct_df.copy()
+                df2 = pd.concat([df2, pd.DataFrame([{
+                    "Account": nm,
+                    "Emoji": (add_emoji or "💳").strip() or "💳",
+                    "Limit": float(add_limit),
+                    "BillingDay": int(add_bill),
+                }])], ignore_index=True)
+                with sheets_busy_notice("adding the account"):
+                    save_accounts(df2)
+                    # Clear stale widget keys
+                    for k in ["admin_acct_pick", "add_account", "add_repay_account"]:
+                        if k in st.session_state:
+                            st.session_state.pop(k, None)
+                    st.toast("Account added ✓", icon="✅")
+                    st.rerun()
+
+    elif section == "Fix Mistakes":
+        st.markdown("### 🧰 Fix mistakes")
+        st.caption("Edit (preferred) or delete. Set Amount=0 to neutralize. Undo available.")
+        if tx_df.empty:
+            st.info("No transactions yet.")
+        else:
+            months = sorted(tx_df["Month"].unique().tolist())
+            m = st.selectbox("Month", months, index=len(months) - 1)
+            locked_sel = m in set(locked_months)
+            if locked_sel:
+                st.warning(f"🔒 {m} is locked — edit/delete disabled.")
+            subset = tx_df[tx_df["Month"] == m].copy().sort_values("Date", ascending=False)
+
+            temp = subset.copy()
+            temp["Type"] = temp["Type"].apply(lambda t: f"{TYPE_EMOJI.get(t,'')} {t}")
+            temp["Category"] = temp["Category"].apply(cat_label)
+            temp["Account"] = temp["Account"].apply(lambda a: f"{emoji_map_live.get(a,'💳')} {a}" if a in allowed_accounts_live else a)
+            temp["Confidence"] = temp["AutoTag"].apply(confidence_tag)
+            st.dataframe(temp[["Date","Type","Amount","Pay","Account","Category","Confidence","Notes","TxId","_row","AutoTag"]],
+                         width="stretch", hide_index=True)
+
+            if not subset.empty:
+                choices = subset.apply(lambda r: f"{r['Date'].date()} | {r['Type']} | {money(r['Amount'])} | {r['Account']} | {r['Category']} | {r['TxId']}", axis=1).tolist()
+                pick = st.selectbox("Select transaction", choices)
+                txid = pick.split("|")[-1].strip()
+                r = subset.loc[subset["TxId"] == txid].iloc[0]
+                row_num = int(r["_row"])
+
+                old_row = [
+                    r["TxId"], str(pd.to_datetime(r["Date"]).date()), "Family", r["Type"], float(r["Amount"]), r["Pay"],
+                    r["Account"], r["Category"], r["Notes"], r["CreatedAt"], r.get("AutoTag","")
+                ]
+
+                st.markdown("#### Edit selected")
+                ed_date = st.date_input("Date", value=pd.to_datetime(r["Date"]).date(), disabled=locked_sel)
+                ed_type = st.selectbox("Type", ENTRY_TYPES, index=ENTRY_TYPES.index(r["Type"]) if r["Type"] in ENTRY_TYPES else 0, disabled=locked_sel,
+                                       format_func=lambda t: f"{TYPE_EMOJI.get(t,'')} {t}")
+                ed_amt = st.text_input("Amount ($)", value=str(float(r["Amount"])), disabled=locked_sel)
+                ed_amount = parse_amount(ed_amt)
+                ed_pay = st.selectbox("Pay", PAY_METHODS, index=(PAY_METHODS.index(r["Pay"]) if r["Pay"] in PAY_METHODS else 0), disabled=locked_sel)
+
+                acct_opts = [f"{emoji_map_live.get(a,'💳')} {a}" for a in allowed_accounts_live]
+                acct_map = {f"{emoji_map_live.get(a,'💳')} {a}": a for a in allowed_accounts_live}
+
+                if ed_type == "CC Repay":
+                    ap = st.selectbox("Account", acct_opts, index=0, disabled=locked_sel)
+                    ed_account = acct_map[ap]
+                    ed_pay = "Bank"
+                else:
+                    if ed_pay == "Card":
+                        ap = st.selectbox("Account", acct_opts, index=0, disabled=locked_sel)
+                        ed_account = acct_map[ap]
+                    else:
+                        ed_account = ed_pay
+
+                cats = sorted(set(list(rules.keys()) + list(CATEGORY_ICON.keys())))
+                ed_cat = st.selectbox("Category", [cat_label(c) for c in cats], index=cats.index(r["Category"]) if r["Category"] in cats else 0, disabled=locked_sel)
+                ed_category = cats[[cat_label(c) for c in cats].index(ed_cat)]
+                ed_notes = st.text_area("Notes", value=str(r["Notes"] or ""), height=80, disabled=locked_sel)
+
+                cA, cB = st.columns([1,1])
+                with cA:
+                    if st.button("Save Edit", disabled=locked_sel):
+                        if ed_amount is None:
+                            st.error("Enter a valid amount.")
+                            st.stop()
+                        with sheets_busy_notice("saving the edit"):
+                            update_transaction(txid, {
+                                "TxId": r["TxId"],
+                                "Date": pd.to_datetime(ed_date).date().isoformat(),
+                                "Type": ed_type,
+                                "Amount": float(ed_amount),
+                                "Pay": ed_pay,
+                                "Account": ed_account,
+                                "Category": ed_category,
+                                "Notes": ed_notes,
+                                "CreatedAt": r["CreatedAt"] or datetime.utcnow().isoformat(timespec="seconds"),
+                                "AutoTag": r.get("AutoTag","") or "",
+                            })
+                            push_undo(UndoAction(kind="edit", txid=txid, row_num=row_num, old_row=old_row))
+                            st.toast("Updated ✓", icon="✅")
+                            st.rerun()
+                with cB:
+                    if st.button("Delete", disabled=locked_sel):
+                        with sheets_busy_notice("the delete"):
+                            delete_transaction(txid)
+                            push_undo(UndoAction(kind="delete", row_num=row_num, old_row=old_row, txid=txid))
+                            st.toast("Deleted", icon="🗑️")
+                            st.rerun()
+        with st.expander("🧹 Compact deleted rows"):
+            st.caption("Deleted transactions stay in the sheet as tombstones (Deleted column), so row numbers "
+                       "never shift. Compacting removes them for good and clears Undo.")
+            if st.button("Compact now"):
+                with sheets_busy_notice("compacting"):
+                    removed = compact_ledger()
+                    st.toast(f"Removed {removed} deleted row(s)", icon="🧹")
+                    st.rerun()
+    elif section == "Rules":
+        st.markdown("### 🧠 Rules")
+        st.caption("Case-insensitive keyword rules used for auto-categorization.")
+        st.toggle("Lock rules (prevent edits)", value=rules_locked, key="rules_lock")
+        if st.button("Save lock"):
+            with sheets_busy_notice("saving the rules lock"):
+                admin_update_and_refresh("rules_locked", "true" if bool(st.session_state["rules_lock"]) else "false")
+                st.toast("Rules lock updated", icon="🔒")
+                st.rerun()
+
+        current = "\n".join([f"{k}: {', '.join(v)}" for k, v in rules.items()])
+        txt = st.text_area("Rules text", value=current, height=280, disabled=rules_locked, help="Format: Category: keyword1, keyword2")
+        if st.button("Save Rules", disabled=rules_locked):
+            with sheets_busy_notice("saving the rules"):
+                admin_update_and_refresh("rules_text", txt)
+                st.toast("Rules saved ✓", icon="✅")
+                st.rerun()
+
+    elif section == "Recurring":
+        st.markdown("### 🔁 Recurring manager")
+        prefs = st.session_state["prefs_list"]
+        if not prefs:
+            st.info("No recurring items yet. Set one from Add page.")
+        else:
+            pdf = pd.DataFrame(prefs)
+            pdf["Amount"] = pd.to_numeric(pdf.get("Amount", None), errors="coerce")
+            pdf["DayOfMonth"] = pd.to_numeric(pdf.get("DayOfMonth", None), errors="coerce").fillna(1).astype(int)
+
+            show = pdf.copy()
+            show["Account"] = show["Account"].apply(lambda a: f"{emoji_map_live.get(a,'💳')} {a}")
+            show["Category"] = show["Category"].apply(lambda c: cat_label(c) if c else cat_label("Uncategorized"))
+            show["Amount"] = show["Amount"].apply(lambda x: money(x) if pd.notna(x) else "—")
+            st.dataframe(show[["Nickname","Amount","Account","Category","DayOfMonth"]], width="stretch", hide_index=True)
+
+            st.markdown("#### Edit one")
+            mk = st.selectbox("MerchantKey", pdf["MerchantKey"].astype(str).tolist(), index=0)
+            row = pdf[pdf["MerchantKey"].astype(str) == str(mk)].iloc[0]
+
+            nick = st.text_input("Display name", value=str(row.get("Nickname","")))
+            amt = st.text_input("Amount ($)", value=str(float(row["Amount"])) if pd.notna(row["Amount"]) else "")
+            amt_v = parse_amount(amt)
+            dom = st.number_input("Day of month (1–31)", min_value=1, max_value=31, value=int(row["DayOfMonth"]), step=1)
+
+            cats = sorted(set(list(rules.keys()) + list(CATEGORY_ICON.keys())))
+            cat_pick = st.selectbox("Category", [cat_label(c) for c in cats], index=cats.index(str(row.get("Category","Uncategorized"))) if str(row.get("Category","Uncategorized")) in cats else 0)
+            cat = cats[[cat_label(c) for c in cats].index(cat_pick)]
+
+            pay = st.selectbox("Pay", PAY_METHODS, index=PAY_METHODS.index(str(row.get("Pay","Bank"))) if str(row.get("Pay","Bank")) in PAY_METHODS else 1)
+            acct_opts = [f"{emoji_map_live.get(a,'💳')} {a}" for a in allowed_accounts_live]
+            acct_map = {f"{emoji_map_live.get(a,'💳')} {a}": a for a in allowed_accounts_live}
+            acct_pick = st.selectbox("Account", acct_opts, index=0)
+            acct = acct_map[acct_pick]
+
+            if st.button("Save Recurring Item"):
+                if amt_v is None:
+                    st.error("Enter a valid amount.")
+                    st.stop()
+                pref = {"MerchantKey": str(mk), "Nickname": nick.strip() or str(mk).title(), "IsRecurring": True,
+                        "DayOfMonth": int(dom), "Category": cat, "Pay": pay,
+                        "Account": acct if pay == "Card" else pay, "Amount": float(amt_v)}
+                prefs2 = upsert_pref(prefs, pref)
+                with sheets_busy_notice("saving the recurring item"):
+                    admin_update_and_refresh("recurring_prefs_json", json.dumps(prefs2, ensure_ascii=False))
+                    st.toast("Saved ✓", icon="✅")
+                    st.rerun()
+
+    elif section == "Performance":
+        st.markdown("### ⏱️ Performance")
+        st.caption("Timing spans for pages, syncs and every Sheets call (p50/p95 over the recent window).")
+        enabled = st.toggle("Record spans (all sessions)", value=PERF.enabled)
+        if enabled != PERF.enabled:
+            PERF.enabled = enabled
+            st.rerun()
+
+        spans = PERF.snapshot()
+        mine = [s for s in spans if s["session"] == perf_session_id()]
+        if not spans:
+            st.info("No spans recorded yet. Turn recording on, then use the app for a while.")
+        else:
+            st.markdown("#### This session")
+            st.dataframe(perf_summary(mine), width="stretch", hide_index=True)
+            sessions = {s["session"] for s in spans} - {"background"}
+            st.markdown("#### Process")
+            st.caption(f"{len(spans):,} spans (last {PERF_MAX_SPANS:,} kept) · {len(sessions)} session(s) + background")
+            st.dataframe(perf_summary(spans), width="stretch", hide_index=True)
+            c1, c2 = st.columns(2)
+            c1.download_button("Export spans (JSONL)", data=perf_jsonl(spans).encode("utf-8"),
+                               file_name="myfin_perf_spans.jsonl", mime="application/x-ndjson")
+            if c2.button("Clear spans"):
+                PERF.clear()
+                st.rerun()
+
+        with st.expander("📶 Sheets API", expanded=False):
+            api = sheets_guard().stats()
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Calls", api["calls"])
+            c2.metric("Throttled", api["throttled"])
+            c3.metric("Retried", api["retried"])
+            c4.metric("Failed", api["failed"])
+            st.caption(f"Served from cache (breaker/quota): {api['short_circuited']} · quota errors: "
+                       f"{api['quota_errors']} · breaker trips: {api['breaker_trips']} · "
+                       f"open: {', '.join(api['breaker_open']) or 'none'} · tokens: {api['tokens']}")
+
+    else:  # Insights
+        st.markdown("### ✨ Insights")
+        st.caption("Quality checks that keep your ledger clean and powerful.")
+
+        issues = []
+        missing_limits = acct_df[acct_df["Limit"] <= 0]["Account"].tolist()
+        if missing_limits:
+            issues.append(f"Set limits for: {', '.join(missing_limits)}")
+
+        unc = tx_df[tx_df["Category"].isin(["", "Uncategorized"])].copy()
+        if not unc.empty:
+            top = unc["MerchantKey"].astype(str)
+            by = top[top != ""].value_counts().head(8)
+            if not by.empty:
+                issues.append("Frequently uncategorized merchants: " + ", ".join([f"{k.title()} ({v})" for k, v in by.items()]))
+
+        empty_notes = int((tx_df["Notes"].fillna("").str.strip() == "").sum()) if not tx_df.empty else 0
+        if empty_notes > 0:
+            issues.append(f"{empty_notes} transaction(s) have empty notes (harder to auto-categorize).")
+
+        score = 100
+        score -= len(missing_limits) * 7
+        score -= min(30, empty_notes * 2)
+        score -= 10 if (not unc.empty) else 0
+        score = max(0, score)
+
+        st.markdown(f"<div class='mf-card mf-anim'><h4>Ledger Health</h4><p class='mf-kpi'>{score}/100</p><p class='mf-sub'>Higher score = cleaner data + better automation.</p></div>", unsafe_allow_html=True)
+        st.progress(score/100.0, text="Health")
+
+        if issues:
+            st.markdown("#### Recommendations")
+            for i in issues:
+                st.info(i)
+        else:
+            st.success("Everything looks clean ✅")
+
+        with st.expander("🧠 Ledger memory", expanded=False):
+            mem = tx_memory_report(tx_df)
+            before, after = mem["Before B/row"].iat[-1], mem["After B/row"].iat[-1]
+            st.caption(f"{len(tx_df):,} rows · {before:,.0f} bytes/row as plain strings → {after:,.0f} compact "
+                       f"({before / max(after, 1):.1f}× smaller)")
+            st.dataframe(mem, width="stretch", hide_index=True)
+
+        st.markdown("#### Backup")
+        export_month = st.selectbox("Export month", ["All"] + sorted(tx_df["Month"].unique().tolist()))
+        export_df = tx_df.copy()
+        if export_month != "All":
+            export_df = export_df[export_df["Month"] == export_month]
+        st.download_button("Download Backup CSV", data=export_df[TX_HEADERS].to_csv(index=False).encode("utf-8"),
+                           file_name="nishanthfintrack_backup.csv", mime="text/csv")
@@ -0,0 +1,151 @@
+"""Timing spans for sync, Sheets calls and page renders (Admin → Performance)."""
+from __future__ import annotations
+
+import collections
+import functools
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+
+# =============================
+# Performance spans (Admin → Performance)
+# =============================
+PERF_MAX_SPANS = 20000  # process-wide ring buffer: every session + background threads
+
+
+class PerfRecorder:
+    """Process-wide ring buffer of timing spans (pages, syncs, Sheets calls).
+
+    Off by default ([perf] enabled = true in secrets, or the Admin → Performance toggle).
+    Disabled, an instrumented call costs one attribute check: see perf_timed and gs_call.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.spans = collections.deque(maxlen=PERF_MAX_SPANS)
+        self.local = threading.local()  # per-thread stack of open spans (perf_note)
+
+    def record(self, span: Dict[str, object]) -> None:
+        with self.lock:
+            self.spans.append(span)
+
+    def snapshot(self, session: Optional[str] = None) -> List[Dict[str, object]]:
+        with self.lock:
+            spans = list(self.spans)
+        return spans if session is None else [s for s in spans if s["session"] == session]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.spans.clear()
+
+
+@st.cache_resource
+def perf_recorder() -> PerfRecorder:
+    try:
+        enabled = bool(st.secrets.get("perf", {}).get("enabled", False))
+    except Exception:  # no secrets file
+        enabled = False
+    return PerfRecorder(enabled)
+
+
+PERF = perf_recorder()
+
+
+def perf_session_id() -> str:
+    """Streamlit session of the calling thread; "background" off the script thread."""
+    ctx = st.runtime.scriptrunner.get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else "background"
+
+
+@contextmanager
+def perf_span(kind: str, name: str):
+    """Record the block as one span; yields the span dict so callers can add rows/bytes/retries."""
+    span = {"ts": round(time.time(), 3), "session": perf_session_id(), "kind": kind, "name": name,
+            "ms": 0.0, "ok": True, "rows": 0, "bytes": 0, "retries": 0}
+    stack = PERF.local.__dict__.setdefault("stack", [])
+    stack.append(span)
+    t0 = time.perf_counter()
+    try:
+        yield span
+    except Exception:  # st.rerun / st.stop are not Exceptions: they end a span normally
+        span["ok"] = False
+        raise
+    finally:
+        span["ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+        stack.pop()
+        PERF.record(span)
+
+
+def perf_timed(kind: str):
+    """Decorator: time each call of the function as a `kind` span named after it."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PERF.enabled:
+                return fn(*args, **kwargs)
+            with perf_span(kind, fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def perf_note(**fields) -> None:
+    """Set fields (rows=..., mode=...) on the innermost open span of this thread, if any."""
+    if PERF.enabled:
+        stack = getattr(PERF.local, "stack", None)
+        if stack:
+            stack[-1].update(fields)
+
+
+def values_size(payload) -> Tuple[int, int]:
+    """(rows, approx bytes) of a Sheets payload: a grid, one row, records, batch grids or a batch response."""
+    if isinstance(payload, dict):  # values_batch_get response
+        payload = [r.get("values", []) for r in payload.get("valueRanges", [])]
+    if not isinstance(payload, list) or not payload:
+        return 0, 0
+    head = payload[0]
+    if isinstance(head, dict):
+        if "values" in head:  # batch_update data
+            payload = [d["values"] for d in payload]
+        else:  # get_all_records
+            return len(payload), sum(len(str(v)) for r in payload for v in r.values())
+    elif isinstance(head, (str, int, float)):  # one row
+        return 1, sum(len(str(c)) for c in payload)
+    elif not isinstance(head, list):  # e.g. worksheets()
+        return 0, 0
+    if any(r and isinstance(r[0], list) for r in payload):  # one grid per range
+        sizes = [values_size(g) for g in payload]
+        return sum(n for n, _ in sizes), sum(b for _, b in sizes)
+    return len(payload), sum(len(str(c)) for r in payload for c in r)
+
+
+def perf_summary(spans: List[Dict[str, object]]) -> pd.DataFrame:
+    """p50/p95 latency and totals per span, slowest p95 first within each kind."""
+    cols = ["Kind", "Span", "Calls", "p50 ms", "p95 ms", "Max ms", "Errors", "Retries", "Rows", "Bytes"]
+    if not spans:
+        return pd.DataFrame(columns=cols)
+    df = pd.DataFrame(spans, columns=["kind", "name", "ms", "ok", "rows", "bytes", "retries"])
+    df["err"] = ~df["ok"].astype(bool)
+    g = df.groupby(["kind", "name"], sort=False)
+    out = pd.DataFrame({
+        "Calls": g.size(),
+        "p50 ms": g["ms"].quantile(0.5).round(1),
+        "p95 ms": g["ms"].quantile(0.95).round(1),
+        "Max ms": g["ms"].max().round(1),
+        "Errors": g["err"].sum(),
+        "Retries": g["retries"].sum(),
+        "Rows": g["rows"].sum(),
+        "Bytes": g["bytes"].sum(),
+    }).reset_index().rename(columns={"kind": "Kind", "name": "Span"})
+    return out.sort_values(["Kind", "p95 ms"], ascending=[True, False])[cols].reset_index(drop=True)
+
+
+def perf_jsonl(spans: List[Dict[str, object]]) -> str:
+    return "".join(json.dumps(s, separators=(",", ":")) + "\n" for s in spans)
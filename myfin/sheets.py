@@ -0,0 +1,318 @@
+"""Google Sheets client, the process-wide request limiter and worksheet helpers.
+
+gspread (and google-auth behind it) is imported on first use: sessions that start from the local
+replica never pay for it on the render path.
+"""
+from __future__ import annotations
+
+import collections
+import time
+import random
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import streamlit as st
+
+from myfin.config import SHEET_NAME
+from myfin.perf import PERF, perf_span, values_size
+
+if TYPE_CHECKING:
+    import gspread
+
+
+# =============================
+# Google auth
+# =============================
+@st.cache_resource
+def gclient() -> gspread.Client:
+    if "local_sheets" in st.secrets:
+        # Offline backend (local_sheets.py): same gspread surface, simulated latency and quota.
+        import local_sheets
+        return local_sheets.LocalClient.from_config(dict(st.secrets["local_sheets"]))
+    if "gcp_service_account" not in st.secrets:
+        st.error("Missing Streamlit secrets: [gcp_service_account].")
+        st.stop()
+    scopes = [
+        "https://www.googleapis.com/auth/spreadsheets",
+        "https://www.googleapis.com/auth/drive",
+    ]
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    creds = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scopes)
+    return gspread.authorize(creds)
+
+@st.cache_resource
+def open_sheet() -> gspread.Spreadsheet:
+    return gclient().open(SHEET_NAME)
+
+
+# Sheets API admission: one process-wide limiter + circuit breaker shared by every session and
+# the background reconcile, so concurrent sessions stop hitting the per-user quota together.
+SHEETS_QUOTA_PER_MIN = {"read": 60, "write": 60}  # Google's per-user limits (requests/minute)
+SHEETS_BURST = 30                 # tokens a bucket holds; refill keeps any 60s window within quota
+SHEETS_BACKGROUND_RESERVE = 4     # read tokens background reads leave for the UI
+SHEETS_MAX_WAIT_SECS = {"write": 10.0, "read": 3.0, "background": 30.0}
+SHEETS_MAX_ATTEMPTS = 3
+SHEETS_WRITE_METHODS = frozenset({"update", "batch_update", "append_row", "append_rows", "insert_row",
+                                  "delete_rows", "clear", "add_worksheet"})
+SHEETS_META_METHODS = frozenset({"get_lastUpdateTime", "open", "open_by_key"})  # Drive, not Sheets quota
+BREAKER_TRIP_ERRORS = 3           # consecutive quota/backend errors that open the breaker
+BREAKER_COOLDOWN_SECS = 30.0
+
+
+class SheetsUnavailable(RuntimeError):
+    """Sheets call refused locally (breaker open, or no quota within the wait budget); keep cached data."""
+
+
+def sheets_busy_warning(action: str, e: SheetsUnavailable) -> None:
+    st.warning(f"Google Sheets is busy ({e}), so {action} didn't go through. Showing cached data; "
+               "try again in a moment.", icon="⏳")
+
+
+@contextmanager
+def sheets_busy_notice(action: str):
+    """Interactive Sheets work (buttons, sidebar refresh): a refused call warns instead of failing the
+    page. Session data is only patched after a write succeeds, so the cached frames stay as they were."""
+    try:
+        yield
+    except SheetsUnavailable as e:
+        sheets_busy_warning(action, e)
+
+
+class TokenBucket:
+    """Token bucket sized so that burst + refill never exceed `per_minute` in any 60s window."""
+
+    def __init__(self, per_minute: int, burst: int = SHEETS_BURST):
+        self.capacity = float(max(1, min(burst, per_minute // 2)))
+        self.rate = (per_minute - self.capacity) / 60.0
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def take(self, reserve: float = 0.0) -> float:
+        """Take a token if more than `reserve` remain; else seconds until one would be available."""
+        self._refill(time.monotonic())
+        if self.tokens >= 1.0 + reserve:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 + reserve - self.tokens) / self.rate
+
+    def drain(self) -> None:
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0.0)
+
+
+class SheetsGuard:
+    """Process-wide admission for Sheets calls: token buckets per quota, priorities, circuit breaker.
+
+    Writes have their own bucket and never wait behind reads; background reads keep a reserve of
+    read tokens for the UI and yield while a write is in flight. A quota error drains the bucket
+    (everyone slows down) and BREAKER_TRIP_ERRORS in a row open the breaker for that quota:
+    calls then fail fast with SheetsUnavailable and the app keeps serving its cached ledger.
+    """
+
+    def __init__(self, quotas: Dict[str, int]):
+        self.lock = threading.Lock()
+        self.buckets = {k: TokenBucket(v) for k, v in quotas.items() if int(v) > 0}
+        self.errors = {k: 0 for k in quotas}
+        self.open_until = {k: 0.0 for k in quotas}
+        self.writes_in_flight = 0
+        self.counters = collections.Counter()
+        self.local = threading.local()
+
+    def priority(self, kind: str) -> str:
+        return "write" if kind == "write" else getattr(self.local, "priority", "read")
+
+    def admit(self, kind: str) -> None:
+        """Block (within the priority's wait budget) until `kind` may call Sheets."""
+        prio = self.priority(kind)
+        deadline = time.monotonic() + SHEETS_MAX_WAIT_SECS[prio]
+        waited = False
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.open_until.get(kind, 0.0):
+                    self.counters["short_circuited"] += 1
+                    raise SheetsUnavailable(f"Sheets {kind} calls paused for "
+                                            f"{self.open_until[kind] - now:.0f}s after repeated quota errors")
+                bucket = self.buckets.get(kind)
+                if prio == "background" and self.writes_in_flight:
+                    wait = 0.25
+                elif bucket is None:
+                    wait = 0.0
+                else:
+                    wait = bucket.take(SHEETS_BACKGROUND_RESERVE if prio == "background" else 0.0)
+                if wait <= 0.0:
+                    self.counters["calls"] += 1
+                    self.counters["throttled"] += waited
+                    self.writes_in_flight += kind == "write"
+                    return
+                if now + wait > deadline:
+                    self.counters["short_circuited"] += 1
+                    raise SheetsUnavailable(f"Sheets {kind} quota busy (next slot in {wait:.1f}s)")
+            waited = True
+            time.sleep(wait)
+
+    def done(self, kind: str, error: Optional[str] = None) -> None:
+        """Record a call's outcome: error is None, "quota" or "backend"."""
+        with self.lock:
+            self.writes_in_flight -= kind == "write"
+            if error is None:
+                self.errors[kind] = 0
+                return
+            self.counters[f"{error}_errors"] += 1
+            if error == "quota" and kind in self.buckets:
+                self.buckets[kind].drain()
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+            if self.errors[kind] >= BREAKER_TRIP_ERRORS:
+                self.open_until[kind] = time.monotonic() + BREAKER_COOLDOWN_SECS
+                self.errors[kind] = BREAKER_TRIP_ERRORS - 1  # half-open: one more failure re-opens
+                self.counters["breaker_trips"] += 1
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self.lock:
+            now = time.monotonic()
+            out = {k: int(self.counters.get(k, 0)) for k in
+                   ("calls", "throttled", "retried", "failed", "short_circuited", "quota_errors", "backend_errors",
+                    "breaker_trips")}
+            out["breaker_open"] = sorted(k for k, t in self.open_until.items() if t > now)
+            out["tokens"] = {k: round(b.tokens, 1) for k, b in self.buckets.items()}
+        return out
+
+
+@st.cache_resource
+def sheets_guard() -> SheetsGuard:
+    quotas = dict(SHEETS_QUOTA_PER_MIN)
+    try:
+        cfg = st.secrets["local_sheets"] if "local_sheets" in st.secrets else None
+    except Exception:  # no secrets file (bench)
+        cfg = None
+    if cfg is not None:
+        # The emulator enforces its own configured quotas.
+        quotas = {"read": int(cfg.get("reads_per_minute", 60)), "write": int(cfg.get("writes_per_minute", 60))}
+    return SheetsGuard(quotas)
+
+
+@contextmanager
+def background_sheets_calls():
+    """Sheets calls in this block (this thread) are background reads: lowest priority."""
+    guard = sheets_guard()
+    prev = getattr(guard.local, "priority", "read")
+    guard.local.priority = "background"
+    try:
+        yield
+    finally:
+        guard.local.priority = prev
+
+
+def api_error() -> type:
+    """gspread's APIError, for `except api_error()` (evaluated only once something was raised)."""
+    import gspread
+
+    return gspread.exceptions.APIError
+
+
+def _sheets_error_class(e: gspread.exceptions.APIError) -> Optional[str]:
+    s = str(e)
+    if ("[429]" in s) or ("429" in s) or ("Quota exceeded" in s) or ("Read requests" in s):
+        return "quota"
+    if ("[500]" in s) or ("[503]" in s):
+        return "backend"
+    return None
+
+
+def gs_call(fn, *args, **kwargs):
+    """Google Sheets API call through the process-wide limiter (sheets_guard).
+
+    HF8: Streamlit reruns can spike read requests. Calls wait for a quota token (bounded per
+    priority) instead of hitting 429s; quota/5xx errors get a short jittered retry, and a run of
+    them opens the circuit breaker so callers fail fast (SheetsUnavailable) and serve cached data.
+    With PERF enabled each call is a "sheets" span (latency incl. admission wait, retries, rows, bytes).
+    """
+    if not PERF.enabled:
+        return _gs_call(fn, args, kwargs, None)
+    name = getattr(fn, "__name__", "")
+    with perf_span("sheets", name) as span:
+        out = _gs_call(fn, args, kwargs, span)
+        if name in SHEETS_WRITE_METHODS:
+            payload = next((a for a in (*args, *kwargs.values()) if isinstance(a, list)), None)
+        else:
+            payload = out
+        span["rows"], span["bytes"] = values_size(payload)
+        return out
+
+
+def _gs_call(fn, args, kwargs, span: Optional[Dict[str, object]]):
+    name = getattr(fn, "__name__", "")
+    if name in SHEETS_META_METHODS:
+        return fn(*args, **kwargs)
+    kind = "write" if name in SHEETS_WRITE_METHODS else "read"
+    guard = sheets_guard()
+    for attempt in range(SHEETS_MAX_ATTEMPTS):
+        guard.admit(kind)
+        try:
+            out = fn(*args, **kwargs)
+        except api_error() as e:
+            err = _sheets_error_class(e)
+            guard.done(kind, err)
+            if err is None or attempt + 1 == SHEETS_MAX_ATTEMPTS:
+                guard.count("failed")
+                raise
+            guard.count("retried")
+            if span is not None:
+                span["retries"] = attempt + 1
+            time.sleep(min(4.0, 0.5 * (2 ** attempt)) + random.random() * 0.5)
+            continue
+        except Exception:
+            guard.done(kind)
+            guard.count("failed")
+            raise
+        guard.done(kind)
+        return out
+
+def _get_ws_map(ss: gspread.Spreadsheet) -> Dict[str, gspread.Worksheet]:
+    """HF8: Cache worksheet objects to avoid repeated spreadsheet metadata reads."""
+    ws_map = st.session_state.get("_ws_map")
+    if ws_map is None or st.session_state.get("_ws_map_id") != ss.id:
+        wss = gs_call(ss.worksheets)  # one metadata call
+        ws_map = {w.title: w for w in wss}
+        st.session_state["_ws_map"] = ws_map
+        st.session_state["_ws_map_id"] = ss.id
+    return ws_map
+
+
+def ensure_ws(ss: gspread.Spreadsheet, title: str, headers: List[str], rows: int = 2000) -> gspread.Worksheet:
+    """Ensure worksheet exists and headers are correct (header check only once per session).
+
+    HF8: Uses cached worksheet map to reduce Google Sheets read requests.
+    """
+    ws_map = _get_ws_map(ss)
+
+    if title in ws_map:
+        ws = ws_map[title]
+        created = False
+    else:
+        ws = gs_call(ss.add_worksheet, title=title, rows=rows, cols=max(25, len(headers) + 10))
+        created = True
+        # refresh map once after creation
+        st.session_state.pop("_ws_map", None)
+        ws_map = _get_ws_map(ss)
+        ws_map[title] = ws
+        st.session_state["_ws_map"] = ws_map
+
+    ensured = st.session_state.setdefault("_ensured_headers", set())
+    if created or title not in ensured:
+        row1 = gs_call(ws.row_values, 1)
+        if row1 != headers:
+            gs_call(ws.update, "A1", [headers])
+        ensured.add(title)
+    return ws
@@ -0,0 +1,1682 @@
+"""Session data store, Sheets sync, batched writes, the local replica and the ledger stores."""
+from __future__ import annotations
+
+import bisect
+import json
+import re
+import uuid
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from myfin.config import (
+    ACCT_HEADERS,
+    ADMIN_HEADERS,
+    DEFAULT_CATEGORY_RULES,
+    TAB_ACCOUNTS,
+    TAB_ADMIN,
+    TAB_TRANSACTIONS,
+    TX_HEADERS,
+    build_account_maps,
+)
+from myfin.helpers import clamp_day
+from myfin.perf import perf_note, perf_timed
+from myfin.sheets import (
+    SheetsUnavailable,
+    _sheets_error_class,
+    api_error,
+    background_sheets_calls,
+    ensure_ws,
+    gs_call,
+    open_sheet,
+)
+from myfin.ledger import (
+    TX_FRAME_COLUMNS,
+    TX_LAYOUT_POSITIONAL,
+    _tx_concat_frames,
+    _tx_key_digest,
+    compact_tx_frame,
+    drop_tombstones,
+    tx_column_layout,
+    tx_changes,
+    tx_frame_from_rows,
+    tx_hwm_of,
+    tx_hwm_patched,
+)
+
+if TYPE_CHECKING:
+    import gspread
+
+
+# =============================
+# Admin storage
+# =============================
+def default_admin_values() -> Dict[str, str]:
+    return {
+        "locked_months": "",
+        "rules_locked": "false",
+        "rules_text": "\n".join([f"{k}: {', '.join(v)}" for k, v in DEFAULT_CATEGORY_RULES.items()]),
+        "recurring_prefs_json": "[]",
+    }
+
+
+class AdminStore:
+    """Admin tab read once into key -> (sheet row, value).
+
+    All reads are served from the map; set() only stages, flush() writes every changed key
+    back with one batch_update (existing rows) plus one append_rows (new keys).
+    """
+
+    def __init__(self, ws_admin: Optional[gspread.Worksheet], rows: Dict[str, Tuple[int, str]]):
+        self.ws = ws_admin  # None: resolved on the first flush (loaded from a batched read)
+        self.rows = rows
+        self.pending: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, ws_admin: gspread.Worksheet) -> "AdminStore":
+        return cls.from_values(ws_admin, gs_call(ws_admin.get_all_values))
+
+    @classmethod
+    def from_values(cls, ws_admin: Optional[gspread.Worksheet], values: List[List[str]]) -> "AdminStore":
+        rows: Dict[str, Tuple[int, str]] = {}
+        for i, r in enumerate(values[1:], start=2):
+            key = str(r[0] if r else "").strip()
+            if key and key not in rows:  # first row wins, as the old linear scans did
+                rows[key] = (i, str(r[1] if len(r) > 1 else ""))
+        return cls(ws_admin, rows)
+
+    def get(self, key: str, default: str = "") -> str:
+        if key in self.pending:
+            return self.pending[key]
+        return self.rows[key][1] if key in self.rows else default
+
+    def values(self) -> Dict[str, str]:
+        return {k: self.get(k) for k in ADMIN_KEYS}
+
+    def set(self, key: str, value: str) -> None:
+        if key not in self.rows or self.rows[key][1] != value:
+            self.pending[key] = value
+
+    def ensure_defaults(self) -> None:
+        for k, v in default_admin_values().items():
+            if k not in self.rows and k not in self.pending:
+                self.pending[k] = v
+
+    def flush(self) -> bool:
+        if not self.pending:
+            return False
+        upd = {k: v for k, v in self.pending.items() if k in self.rows}
+        new = [[k, v] for k, v in self.pending.items() if k not in self.rows]
+        if self.ws is None:
+            self.ws = ensure_ws(open_sheet(), TAB_ADMIN, ADMIN_HEADERS, rows=400)
+        if upd:
+            gs_call(self.ws.batch_update,
+                    [{"range": f"A{self.rows[k][0]}:B{self.rows[k][0]}", "values": [[k, v]]} for k, v in upd.items()])
+            for k, v in upd.items():
+                self.rows[k] = (self.rows[k][0], v)
+        if new:
+            resp = gs_call(self.ws.append_rows, new, value_input_option="USER_ENTERED")
+            first = _appended_row_num(resp)
+            for i, (k, v) in enumerate(new):
+                self.rows[k] = ((first + i) if first is not None else -1, v)
+            if first is None:
+                # Unknown row numbers: re-read on next use rather than guessing.
+                st.session_state.pop("admin_store", None)
+        self.pending.clear()
+        return True
+
+
+def parse_rules_text(text: str) -> Dict[str, List[str]]:
+    rules: Dict[str, List[str]] = {}
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or ":" not in line:
+            continue
+        cat, rest = line.split(":", 1)
+        keys = [x.strip() for x in rest.split(",") if x.strip()]
+        rules[cat.strip()] = keys
+    if not rules:
+        rules = DEFAULT_CATEGORY_RULES.copy()
+    if "Uncategorized" not in rules:
+        rules["Uncategorized"] = []
+    return rules
+
+
+# =============================
+# Session-state DATA STORE (performance)
+# =============================
+def ss_get(key: str, default):
+    if key not in st.session_state:
+        st.session_state[key] = default
+    return st.session_state[key]
+
+def set_last_sync(ts: datetime):
+    st.session_state["last_sync_at"] = ts
+
+def last_sync_text() -> str:
+    ts = st.session_state.get("last_sync_at")
+    if not ts:
+        return "Not synced yet"
+    return ts.strftime("%Y-%m-%d %H:%M:%S")
+
+def live_accounts() -> List[str]:
+    """This session's account list (Accounts tab, else the defaults); set by the app every run."""
+    accounts = st.session_state.get("allowed_accounts_live")
+    if accounts is None:
+        accounts = build_account_maps(st.session_state.get("acct_df"))[0]
+    return accounts
+
+ADMIN_KEYS = ("locked_months", "rules_text", "rules_locked", "recurring_prefs_json")
+
+
+def apply_admin_values(kv: Dict[str, str], synced_at: Optional[datetime] = None) -> None:
+    """Parse admin key/values into session state (locks, rules, recurring prefs)."""
+    locked_raw = str(kv.get("locked_months", "") or "").strip()
+    locked_months = [x.strip() for x in locked_raw.split(",") if x.strip()]
+
+    rules_text = str(kv.get("rules_text", "") or "")
+    rules = parse_rules_text(rules_text)
+
+    rules_locked = (str(kv.get("rules_locked", "") or "").strip().lower() == "true")
+
+    prefs_raw = str(kv.get("recurring_prefs_json", "") or "").strip() or "[]"
+    try:
+        prefs = json.loads(prefs_raw)
+        if not isinstance(prefs, list):
+            prefs = []
+    except Exception:
+        prefs = []
+
+    st.session_state["rules"] = rules
+    st.session_state["locked_months"] = locked_months
+    st.session_state["rules_locked"] = rules_locked
+    st.session_state["prefs_list"] = prefs
+    st.session_state["admin_kv"] = dict(kv)
+    st.session_state["admin_dirty"] = False
+    st.session_state["ledger_local_changes"] = True
+    set_last_sync(synced_at or datetime.utcnow())
+
+
+@perf_timed("sync")
+def refresh_admin_from_sheets(values: Optional[List[List[str]]] = None) -> None:
+    """Read Admin sheet (small); `values` = the tab's values when already fetched (batched load)."""
+    if values is None:
+        store = AdminStore.load(ensure_ws(open_sheet(), TAB_ADMIN, ADMIN_HEADERS, rows=400))
+    else:
+        store = AdminStore.from_values(None, values)
+    store.ensure_defaults()
+    store.flush()
+    st.session_state["admin_store"] = store
+
+    kv = store.values()
+    apply_admin_values(kv)
+    replica_save_admin(kv)
+
+
+def accounts_frame_from_records(rows: List[dict]) -> pd.DataFrame:
+    acct_df = pd.DataFrame(rows) if rows else pd.DataFrame(columns=ACCT_HEADERS)
+
+    acct_df["Account"] = acct_df["Account"].astype(str) if "Account" in acct_df.columns else ""
+    acct_df["Emoji"] = acct_df["Emoji"].astype(str).replace({"": "💳"}) if "Emoji" in acct_df.columns else "💳"
+    acct_df["Limit"] = pd.to_numeric(acct_df.get("Limit", 0), errors="coerce").fillna(0.0)
+    acct_df["BillingDay"] = pd.to_numeric(acct_df.get("BillingDay", 1), errors="coerce").fillna(1).astype(int)
+    return acct_df
+
+
+def records_from_values(values: List[List[str]]) -> List[dict]:
+    """get_all_records() from already-fetched values (header row -> dict per row, short rows padded)."""
+    if not values:
+        return []
+    hdr = values[0]
+    return [{h: (r[i] if i < len(r) else "") for i, h in enumerate(hdr)} for r in values[1:]]
+
+
+@perf_timed("sync")
+def refresh_accounts_from_sheets(values: Optional[List[List[str]]] = None) -> None:
+    """Read Accounts sheet (small); `values` = the tab's values when already fetched (batched load)."""
+    if values is None:
+        rows = gs_call(ensure_ws(open_sheet(), TAB_ACCOUNTS, ACCT_HEADERS, rows=200).get_all_records)
+    else:
+        rows = records_from_values(values)
+    acct_df = accounts_frame_from_records(rows)
+
+    st.session_state["acct_df"] = acct_df
+    st.session_state["accounts_dirty"] = False
+    st.session_state["ledger_local_changes"] = True
+    set_last_sync(datetime.utcnow())
+    replica_save_accounts(acct_df)
+
+
+def _store_tx_df(tx_df: pd.DataFrame, synced_at: Optional[datetime] = None, appended: bool = False,
+                 hwm: Optional[Dict[str, object]] = None,
+                 changed: Optional[Tuple[List[int], pd.DataFrame]] = None) -> None:
+    """Publish a new ledger frame and move the delta-sync high-water mark with it.
+
+    Every publish bumps tx_version (cache key for derived data). appended=True records that
+    the new frame is the previous one plus rows at the end; tx_lineage maps each earlier version
+    that is still a prefix of tx_df to its frame length, so caches can extend instead of rebuild.
+    `changed` = (sheet rows whose content changed, their previous rows) for a local patch;
+    tx_row_changes maps each recent version to that step, so caches keyed by sheet row can be
+    patched. Appends record their new rows there too.
+    """
+    prev_version = int(st.session_state.get("tx_version", 0))
+    prev_df = st.session_state.get("tx_df")
+    prev_rows = 0 if prev_df is None else len(prev_df)
+    lineage = {}
+    if appended:
+        lineage = dict(st.session_state.get("tx_lineage") or {})
+        lineage[prev_version] = prev_rows
+        lineage = dict(list(lineage.items())[-16:])
+        changed = (tx_df["_row"].iloc[prev_rows:].astype(int).tolist(), tx_df.iloc[:0])
+    row_changes = {}
+    if changed is not None:
+        row_changes = dict(st.session_state.get("tx_row_changes") or {})
+        row_changes[prev_version] = changed
+        row_changes = dict(list(row_changes.items())[-16:])
+    acct_df = st.session_state.get("acct_df")
+    accounts = acct_df["Account"].astype(str).tolist() if isinstance(acct_df, pd.DataFrame) and "Account" in acct_df else []
+    tx_df = compact_tx_frame(tx_df, accounts)
+    st.session_state["tx_version"] = prev_version + 1
+    st.session_state["tx_lineage"] = lineage
+    st.session_state["tx_row_changes"] = row_changes
+    st.session_state["tx_df"] = tx_df
+    st.session_state["tx_hwm"] = hwm or tx_hwm_of(tx_df)
+    st.session_state["tx_dirty"] = False
+    st.session_state["ledger_local_changes"] = True
+    set_last_sync(synced_at or datetime.utcnow())
+    perf_note(rows=len(tx_df))
+
+
+def _a1_col(i: int) -> str:
+    """0-based column index -> A1 column letters (no gspread: runs at import time)."""
+    letters, n = "", i + 1
+    while n:
+        n, r = divmod(n - 1, 26)
+        letters = chr(65 + r) + letters
+    return letters
+
+
+def fetch_tx_full(ws_tx: gspread.Worksheet) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """Full read of the Transactions tab -> (tx_df, layout_info). No session state."""
+    return tx_frame_from_values(gs_call(ws_tx.get_all_values))
+
+
+def tx_frame_from_values(values: List[List[str]]) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """The Transactions tab's values (header row first) -> (tx_df, layout_info)."""
+    if not values or len(values) < 2:
+        layout = list(TX_LAYOUT_POSITIONAL) if not values else tx_column_layout(values[0])
+        tx_df = pd.DataFrame(columns=TX_FRAME_COLUMNS)
+    else:
+        layout = tx_column_layout(values[0])
+        tx_df = drop_tombstones(tx_frame_from_rows(values[1:], layout, first_row=2))
+    return tx_df, {"cols": layout, "width": len(values[0]) if values else len(TX_HEADERS)}
+
+
+def _tx_delta_plan(ids: List[str], created: List[str], deleted: List[str],
+                   hwm: Dict[str, object]) -> Tuple[str, int, int]:
+    """Key columns of every sheet row (row 2 first) vs a high-water mark -> (mode, first, last).
+
+    "full" when the known prefix drifted, "noop" when nothing live follows it, else "delta" with
+    the sheet rows first..last spanning every live row past the mark.
+    """
+    n_known = int(hwm["rows"])
+    if len(ids) < n_known:
+        return "full", 0, 0
+    live = [i for i, d in enumerate(deleted) if not str(d).strip()]
+    split = bisect.bisect_left(live, n_known)
+    known = live[:split]
+    if _tx_key_digest([i + 2 for i in known], [ids[i] for i in known], [created[i] for i in known]) != hwm["digest"]:
+        return "full", 0, 0
+    if split == len(live):
+        return "noop", 0, 0
+    return "delta", live[split] + 2, live[-1] + 2
+
+
+def fetch_tx_delta(ws_tx: gspread.Worksheet, hwm: Dict[str, object],
+                   layout_info: Dict[str, object]) -> Tuple[str, Optional[pd.DataFrame]]:
+    """Compare the sheet against a high-water mark. No session state.
+
+    Probes only the TxId/CreatedAt/Deleted key columns (one read). If the known prefix is
+    unchanged, only live rows appended after it are fetched. Returns ("noop", None),
+    ("delta", appended_rows) or ("full", None) when the prefix drifted (rows deleted, restored,
+    compacted or re-keyed elsewhere).
+    """
+    cols = layout_info["cols"]
+    id_i = cols[TX_HEADERS.index("TxId")]
+    ca_i = cols[TX_HEADERS.index("CreatedAt")]
+    del_i = cols[TX_HEADERS.index("Deleted")]
+    if id_i is None or ca_i is None:
+        return "full", None
+
+    key_cols = [id_i, ca_i] + ([del_i] if del_i is not None else [])
+    ranges = list(gs_call(ws_tx.batch_get, [f"{_a1_col(i)}2:{_a1_col(i)}" for i in key_cols]))
+    if del_i is None:
+        ranges.append([])
+    ids, created, deleted = ([r[0] if r else "" for r in vr] for vr in ranges)
+    n_sheet = max(len(ids), len(created), len(deleted))
+    ids += [""] * (n_sheet - len(ids))
+    created += [""] * (n_sheet - len(created))
+    deleted += [""] * (n_sheet - len(deleted))
+
+    mode, first, last = _tx_delta_plan(ids, created, deleted, hwm)
+    if mode != "delta":
+        return mode, None
+
+    last_col = _a1_col(max(int(layout_info["width"]), len(TX_HEADERS)) - 1)
+    rows = gs_call(ws_tx.get, f"A{first}:{last_col}{last}")
+    rows = list(rows) + [[]] * (last - first + 1 - len(rows))
+    return "delta", drop_tombstones(tx_frame_from_rows(rows, cols, first_row=first))
+
+
+@perf_timed("sync")
+def refresh_transactions_from_sheets(values: Optional[List[List[str]]] = None) -> None:
+    """Read the ledger (largest). Full reload; see sync_transactions_delta for the cheap path.
+
+    `values` = the Transactions tab's values when already fetched (batched load, Sheets backend).
+    """
+    tx_df, layout_info = ledger_store().load() if values is None else tx_frame_from_values(values)
+    _store_full_tx(tx_df, layout_info)
+
+
+def _store_full_tx(tx_df: pd.DataFrame, layout_info: Dict[str, object]) -> None:
+    st.session_state["tx_layout"] = layout_info
+    _store_tx_df(tx_df)
+    replica_replace_tx(tx_df, layout_info)
+
+
+@perf_timed("sync")
+def sync_transactions_delta(check_content: bool = False) -> str:
+    """Incremental Transactions sync against the session's high-water mark.
+
+    Appended rows are patched into tx_df; drift falls back to a full reload.
+    The key probe cannot see rows edited in place, so when the ledger changed elsewhere (revision
+    moved) pass check_content=True: one full read compared row-by-row against the mark's content
+    digest, which still patches plain appends in.
+    Returns "noop", "delta" or "full".
+    """
+    hwm = st.session_state.get("tx_hwm")
+    layout_info = st.session_state.get("tx_layout")
+    tx_df = st.session_state.get("tx_df")
+    if not hwm or not layout_info or tx_df is None:
+        refresh_transactions_from_sheets()
+        return "full"
+
+    if check_content:
+        full_df, layout_info = ledger_store().load()
+        mode, new_df = tx_changes(full_df, hwm)
+        st.session_state["tx_layout"] = layout_info
+        if mode == "full":
+            _store_full_tx(full_df, layout_info)
+            return mode
+    else:
+        mode, new_df = ledger_store().delta(hwm, layout_info)
+    if mode == "full":
+        refresh_transactions_from_sheets()
+    elif mode == "delta":
+        out = _tx_concat(tx_df, new_df)
+        _store_tx_df(out, appended=True, hwm=_patched_hwm(out, added=new_df))
+        replica_append_tx(new_df)
+        perf_note(rows=len(new_df))
+    else:
+        st.session_state["tx_dirty"] = False
+        set_last_sync(datetime.utcnow())
+    return mode
+
+
+def _tx_concat(tx_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+    if tx_df is None or tx_df.empty:
+        return new_df.reset_index(drop=True)
+    return _tx_concat_frames([tx_df, new_df])
+
+
+def _tx_rows_frame(first_row: int, rows: List[List[object]]) -> pd.DataFrame:
+    return tx_frame_from_rows([[("" if v is None else str(v)) for v in r] for r in rows], TX_LAYOUT_POSITIONAL,
+                              first_row=first_row)
+
+
+def tx_row_index() -> Dict[str, int]:
+    """TxId -> sheet row of every live transaction.
+
+    Built once per wholesale reload; local patches (append/update/delete/restore) edit it in
+    place, so TxId-addressed mutations never scan tx_df.
+    """
+    cache = st.session_state.get("_tx_index")
+    version = st.session_state.get("tx_version")
+    if cache is None or cache["version"] != version:
+        tx_df = st.session_state["tx_df"]
+        cache = {"version": version,
+                 "rows": dict(zip(tx_df["TxId"].astype(str).tolist(), tx_df["_row"].astype(int).tolist()))}
+        st.session_state["_tx_index"] = cache
+    return cache["rows"]
+
+
+def _patch_tx_index(prev_version: int, removed: List[str] = (), added: Optional[Dict[str, int]] = None) -> None:
+    """Carry the TxId index across a local patch (no-op if it was not built for the previous frame)."""
+    cache = st.session_state.get("_tx_index")
+    if cache is None or cache["version"] != prev_version:
+        return
+    for txid in removed:
+        cache["rows"].pop(txid, None)
+    cache["rows"].update(added or {})
+    cache["version"] = st.session_state.get("tx_version")
+
+
+def patch_tx_append(first_row: int, rows: List[List[object]]) -> None:
+    """Local patch after appending `rows` (TX_HEADERS order) starting at sheet row `first_row`."""
+    tx_df = st.session_state["tx_df"]
+    if first_row != int(st.session_state.get("tx_hwm", {}).get("rows", -1)) + 2:
+        # Someone else appended in between; let the delta sync pick up every new row.
+        sync_transactions_delta()
+        return
+    new = _tx_rows_frame(first_row, rows)
+    prev_version = st.session_state.get("tx_version")
+    out = _tx_concat(tx_df, new)
+    _store_tx_df(out, appended=True, hwm=_patched_hwm(out, added=new))
+    _patch_tx_index(prev_version, added=dict(zip(new["TxId"].astype(str), new["_row"].astype(int))))
+    replica_append_tx(new)
+
+
+def patch_tx_update(updates: Dict[int, List[object]]) -> None:
+    """Local patch after overwriting sheet rows {row_num: row (TX_HEADERS order)}."""
+    tx_df = st.session_state["tx_df"]
+    if not updates:
+        return
+    pos_of = {int(r): i for i, r in enumerate(tx_df["_row"].tolist())} if not tx_df.empty else {}
+    if any(int(r) not in pos_of for r in updates):
+        refresh_transactions_from_sheets()
+        return
+    parts, prev = [], 0
+    for row_num in sorted(updates):
+        pos = pos_of[int(row_num)]
+        parts += [tx_df.iloc[prev:pos], _tx_rows_frame(int(row_num), [updates[row_num]])]
+        prev = pos + 1
+    parts.append(tx_df.iloc[prev:])
+    new = pd.concat(parts[1:-1:2], ignore_index=True)
+    out = _tx_concat_frames(parts)
+    old = tx_df.iloc[[pos_of[int(r)] for r in sorted(updates)]]
+    old_ids = old["TxId"].astype(str).tolist()
+    prev_version = st.session_state.get("tx_version")
+    _store_tx_df(out, hwm=_patched_hwm(out, removed=old, added=new), changed=(old["_row"].astype(int).tolist(), old))
+    _patch_tx_index(prev_version, removed=old_ids, added=dict(zip(new["TxId"].astype(str), new["_row"].astype(int))))
+    replica_update_tx(sorted(int(r) for r in updates), new)
+
+
+def _patched_hwm(out: pd.DataFrame, removed: Optional[pd.DataFrame] = None,
+                 added: Optional[pd.DataFrame] = None) -> Dict[str, object]:
+    """Mark for a locally patched frame; both digests move by the touched rows only."""
+    hwm = st.session_state["tx_hwm"]
+    if not hwm.get("content"):  # mark from before content digests
+        return tx_hwm_of(out, rows=hwm["rows"])
+    return tx_hwm_patched(hwm, removed, added)
+
+
+def patch_tx_delete(row_nums: List[int]) -> None:
+    """Local patch after tombstoning sheet rows `row_nums` (no other row moves)."""
+    tx_df = st.session_state["tx_df"]
+    gone = tx_df["_row"].isin({int(r) for r in row_nums})
+    out = tx_df[~gone].reset_index(drop=True)
+    prev_version = st.session_state.get("tx_version")
+    _store_tx_df(out, hwm=_patched_hwm(out, removed=tx_df[gone]),
+                 changed=(tx_df.loc[gone, "_row"].astype(int).tolist(), tx_df[gone]))
+    _patch_tx_index(prev_version, removed=tx_df.loc[gone, "TxId"].astype(str).tolist())
+    replica_delete_tx(sorted(int(r) for r in row_nums))
+
+
+def patch_tx_restore(row_num: int, row: List[object]) -> None:
+    """Local patch after clearing the tombstone on sheet row `row_num` (undo of a delete)."""
+    tx_df = st.session_state["tx_df"]
+    new = _tx_rows_frame(row_num, [row])
+    pos = int(np.searchsorted(tx_df["_row"].to_numpy(dtype=np.int64), row_num))
+    out = new if tx_df.empty else _tx_concat_frames([tx_df.iloc[:pos], new, tx_df.iloc[pos:]])
+    prev_version = st.session_state.get("tx_version")
+    _store_tx_df(out, hwm=_patched_hwm(out, added=new), changed=([int(row_num)], tx_df.iloc[:0]))
+    _patch_tx_index(prev_version, added={str(new["TxId"].iat[0]): int(row_num)})
+    replica_insert_tx(new)
+
+
+def _a1_tab(title: str) -> str:
+    """A1 range covering a whole tab."""
+    return "'" + title.replace("'", "''") + "'"
+
+
+@perf_timed("sync")
+def fetch_all_tabs() -> Dict[str, List[List[str]]]:
+    """Values of every tab the session loads, in one values_batch_get; headers validated from it.
+
+    A tab whose header row is missing or differs gets the ensure_ws treatment (created / header
+    rewritten) and its returned values are patched to match, so the batched path parses exactly
+    what per-tab reads would have. Raises APIError if a tab does not exist (Google rejects the range).
+    """
+    titles = [TAB_ADMIN, TAB_ACCOUNTS]
+    if ledger_config()["backend"] == "sheets":
+        titles.append(TAB_TRANSACTIONS)
+    ss = open_sheet()
+    resp = gs_call(ss.values_batch_get, [_a1_tab(t) for t in titles])
+    ranges = resp.get("valueRanges", [])
+    out = {}
+    ensured = st.session_state.setdefault("_ensured_headers", set())
+    for i, title in enumerate(titles):
+        values = [list(r) for r in (ranges[i].get("values", []) if i < len(ranges) else [])]
+        headers, rows = TAB_SPECS[title]
+        row1 = values[0] if values else []
+        if row1 != headers:
+            ensure_ws(ss, title, headers, rows=rows)
+            values = [list(headers) + row1[len(headers):]] + values[1:]
+        ensured.add(title)
+        out[title] = values
+    return out
+
+
+@perf_timed("sync")
+def refresh_all_from_sheets() -> None:
+    """Explicit heavy read: all tabs in one batched request (per-tab reads if that is rejected)."""
+    revision = sheet_revision()
+    try:
+        tabs = fetch_all_tabs()
+    except api_error() as e:
+        if _sheets_error_class(e) is not None:
+            raise
+        tabs = {}  # e.g. a tab does not exist yet: the per-tab path creates it
+    refresh_admin_from_sheets(tabs.get(TAB_ADMIN))
+    refresh_accounts_from_sheets(tabs.get(TAB_ACCOUNTS))
+    refresh_transactions_from_sheets(tabs.get(TAB_TRANSACTIONS))
+    st.session_state["ledger_revision"] = revision
+
+
+def admin_store() -> AdminStore:
+    store = st.session_state.get("admin_store")
+    if store is None:
+        ss = open_sheet()
+        store = AdminStore.load(ensure_ws(ss, TAB_ADMIN, ADMIN_HEADERS, rows=400))
+        store.ensure_defaults()
+        st.session_state["admin_store"] = store
+    return store
+
+def admin_update(key: str, value: str) -> None:
+    store = admin_store()
+    store.set(key, value)
+    try:
+        store.flush()
+    except SheetsUnavailable:
+        store.pending.pop(key, None)  # not saved: don't let a later flush write it behind the user's back
+        raise
+
+def admin_update_and_refresh(key: str, value: str) -> None:
+    """Write one admin key and apply it locally (the store already holds every value)."""
+    admin_update(key, value)
+    kv = admin_store().values()
+    apply_admin_values(kv)
+    replica_save_admin(kv)
+
+def save_accounts(df: pd.DataFrame) -> None:
+    ss = open_sheet()
+    ws = ensure_ws(ss, TAB_ACCOUNTS, ACCT_HEADERS, rows=200)
+    gs_call(ws.clear)
+    gs_call(ws.update, "A1", [ACCT_HEADERS])
+    gs_call(ws.append_rows, df[ACCT_HEADERS].values.tolist(), value_input_option="USER_ENTERED")
+    st.session_state["accounts_dirty"] = True
+    refresh_accounts_from_sheets()
+
+def _tx_row_values(values: Dict[str, object]) -> List[object]:
+    return [
+        str(values.get("TxId", "")),
+        str(values.get("Date", "")),
+        "Family",
+        str(values.get("Type", "")),
+        float(values.get("Amount", 0.0) or 0.0),
+        str(values.get("Pay", "")),
+        str(values.get("Account", "")),
+        str(values.get("Category", "")),
+        str(values.get("Notes", "")),
+        str(values.get("CreatedAt", "")),
+        str(values.get("AutoTag", "")),
+        "",  # Deleted
+    ]
+
+def _appended_row_num(resp) -> Optional[int]:
+    """First sheet row written by an append_row(s) call (parsed from updates.updatedRange)."""
+    try:
+        rng = str(resp["updates"]["updatedRange"]).split("!")[-1].split(":")[0]
+        return int(re.sub(r"[^0-9]", "", rng))
+    except Exception:
+        return None
+
+
+# =============================
+# Batched writes
+# =============================
+TAB_SPECS = {
+    TAB_TRANSACTIONS: (TX_HEADERS, 10000),
+    TAB_ACCOUNTS: (ACCT_HEADERS, 200),
+    TAB_ADMIN: (ADMIN_HEADERS, 400),
+}
+
+
+class WriteBatch:
+    """Staged writes, flushed as one batch_update + one append_rows per tab.
+
+    Transactions go to the ledger store (update_many + append_many), whichever backend it is.
+
+    After the flush the in-memory store is brought up to date once: transactions are
+    patched locally (user-001), admin/accounts tabs get a single refresh each.
+    """
+
+    def __init__(self):
+        self.appends: Dict[str, List[List[object]]] = {}
+        self.updates: Dict[str, Dict[int, List[object]]] = {}
+
+    def append(self, tab: str, row: List[object]) -> None:
+        self.appends.setdefault(tab, []).append(list(row))
+
+    def update_row(self, tab: str, row_num: int, row: List[object]) -> None:
+        # Last write to a row wins, like sequential updates would.
+        self.updates.setdefault(tab, {})[int(row_num)] = list(row)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.appends.values()) + sum(len(v) for v in self.updates.values())
+
+    def flush(self) -> None:
+        if not len(self):
+            return
+        ss = open_sheet()
+        appended_at: Dict[str, Optional[int]] = {}
+        for tab in list(dict.fromkeys(list(self.updates) + list(self.appends))):
+            upd = self.updates.get(tab) or {}
+            app = self.appends.get(tab) or []
+            if tab == TAB_TRANSACTIONS:
+                store = ledger_store()
+                if upd:
+                    store.update_many(upd)
+                if app:
+                    appended_at[tab] = store.append_many(app)
+                continue
+            headers, rows = TAB_SPECS[tab]
+            ws = ensure_ws(ss, tab, headers, rows=rows)
+            last_col = _a1_col(len(headers) - 1)
+            if upd:
+                gs_call(ws.batch_update,
+                        [{"range": f"A{r}:{last_col}{r}", "values": [row]} for r, row in sorted(upd.items())],
+                        value_input_option="USER_ENTERED")
+            if app:
+                resp = gs_call(ws.append_rows, app, value_input_option="USER_ENTERED")
+                appended_at[tab] = _appended_row_num(resp)
+
+        if TAB_TRANSACTIONS in self.updates:
+            patch_tx_update(self.updates[TAB_TRANSACTIONS])
+        if TAB_TRANSACTIONS in self.appends:
+            first_row = appended_at.get(TAB_TRANSACTIONS)
+            if first_row is None:
+                sync_transactions_delta()
+            else:
+                patch_tx_append(first_row, self.appends[TAB_TRANSACTIONS])
+        if TAB_ACCOUNTS in self.updates or TAB_ACCOUNTS in self.appends:
+            refresh_accounts_from_sheets()
+        if TAB_ADMIN in self.updates or TAB_ADMIN in self.appends:
+            refresh_admin_from_sheets()
+        self.appends.clear()
+        self.updates.clear()
+
+
+@contextmanager
+def write_batch():
+    """Group writes: `with write_batch(): ...` flushes once on exit. Nested blocks join the outer batch."""
+    outer = st.session_state.get("_write_batch")
+    if outer is not None:
+        yield outer
+        return
+    batch = WriteBatch()
+    st.session_state["_write_batch"] = batch
+    try:
+        yield batch
+    finally:
+        st.session_state["_write_batch"] = None
+    batch.flush()
+
+
+def append_transaction(entry_date: date, entry_type: str, amount: float, pay: str, account: str,
+                       category: str, notes: str, auto_tag: str = "") -> str:
+    txid = str(uuid.uuid4())
+    row = [
+        txid,
+        entry_date.isoformat(),
+        "Family",
+        entry_type,
+        float(amount),
+        pay,
+        account or "",
+        category,
+        notes or "",
+        datetime.utcnow().isoformat(timespec="seconds"),
+        auto_tag or "",
+        "",
+    ]
+    with write_batch() as wb:
+        wb.append(TAB_TRANSACTIONS, row)
+    return txid
+
+def _tx_row_of(txid: str) -> int:
+    row_num = tx_row_index().get(str(txid))
+    if row_num is None:
+        raise KeyError(f"Transaction {txid} is not in the ledger (deleted or changed elsewhere?)")
+    return row_num
+
+def delete_transactions(txids: List[str]) -> None:
+    """Tombstone transactions: their rows keep their place (Deleted gets a timestamp)."""
+    row_nums = [_tx_row_of(t) for t in txids]
+    pending = st.session_state.get("_write_batch")
+    if pending is not None:
+        pending.flush()  # a staged full-row write would clear the tombstone again
+    ledger_store().delete_many(row_nums)
+    patch_tx_delete(row_nums)
+
+def delete_transaction(txid: str) -> None:
+    delete_transactions([txid])
+
+def update_transaction(txid: str, values: Dict[str, object]) -> None:
+    with write_batch() as wb:
+        wb.update_row(TAB_TRANSACTIONS, _tx_row_of(txid), _tx_row_values(values))
+
+def restore_transaction(row_num: int, row: List[object]) -> None:
+    """Undo a delete: clear the tombstone in place, or append the row again if it was compacted away."""
+    row = _tx_row_values(dict(zip(TX_HEADERS, row)))
+    if ledger_store().restore(row_num, row):
+        patch_tx_restore(row_num, row)
+        return
+    with write_batch() as wb:
+        wb.append(TAB_TRANSACTIONS, row)
+
+def compact_ledger() -> int:
+    """Physically remove tombstoned rows (renumbers the sheet), then reload. Returns rows removed."""
+    pending = st.session_state.get("_write_batch")
+    if pending is not None:
+        pending.flush()
+    removed = ledger_store().compact()
+    if removed:
+        st.session_state["undo"] = None  # row numbers moved
+        refresh_transactions_from_sheets()
+    return removed
+
+
+# =============================
+# Local SQLite replica (myfin_2026.db)
+# =============================
+# Write-through copy of the three tabs. Sessions start from it in milliseconds and a
+# background reconcile keeps it in step with Sheets, so cold starts never wait on Sheets.
+# Sheets stays the source of truth: writes still go to Sheets first, then patch the replica.
+APP_DIR = Path(__file__).parent.parent  # next to streamlit_app.py, as before the package split
+REPLICA_DB_PATH = APP_DIR / "myfin_2026.db"
+REPLICA_RECONCILE_SECS = 120
+
+REPLICA_MIGRATIONS = {
+    "entries": [("txid", "TEXT"), ("auto_tag", "TEXT"), ("sheet_row", "INTEGER"), ("month", "TEXT")],
+    "cards": [("emoji", "TEXT"), ("credit_limit", "NUMERIC"), ("billing_day", "INTEGER")],
+}
+# Month-end credit balances (see month_balance_window); lives in whichever SQLite file holds
+# the ledger locally: the replica, or the SQLite ledger itself.
+BALANCE_CHECKPOINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS balance_checkpoints (
+    card_name TEXT NOT NULL,
+    month TEXT NOT NULL,
+    balance REAL NOT NULL,
+    chain TEXT NOT NULL,
+    PRIMARY KEY (card_name, month)
+);
+"""
+REPLICA_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entry_date TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    entry_type TEXT NOT NULL,
+    amount REAL NOT NULL,
+    payment_method TEXT NOT NULL,
+    card_name TEXT,
+    category TEXT NOT NULL,
+    notes TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT NOT NULL,
+    card_name TEXT NOT NULL,
+    is_primary INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS admin_kv (key TEXT PRIMARY KEY, value TEXT NOT NULL DEFAULT '');
+CREATE TABLE IF NOT EXISTS replica_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL DEFAULT '');
+""" + BALANCE_CHECKPOINT_SCHEMA
+REPLICA_INDEXES = """
+CREATE INDEX IF NOT EXISTS ix_entries_sheet_row ON entries(sheet_row);
+CREATE INDEX IF NOT EXISTS ix_entries_date ON entries(entry_date);
+CREATE INDEX IF NOT EXISTS ix_entries_month ON entries(month);
+CREATE INDEX IF NOT EXISTS ix_entries_account ON entries(card_name);
+CREATE INDEX IF NOT EXISTS ix_entries_category ON entries(category);
+"""
+ENTRY_COLUMNS = ["txid", "entry_date", "owner", "entry_type", "amount", "payment_method", "card_name",
+                 "category", "notes", "created_at", "auto_tag", "sheet_row", "month"]
+
+
+class LocalReplica:
+    """Process-wide SQLite handle shared by every session (see replica())."""
+
+    def __init__(self, path: Path):
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(REPLICA_SCHEMA)
+            for table, cols in REPLICA_MIGRATIONS.items():
+                have = {r[1] for r in self.conn.execute(f"PRAGMA table_info({table})")}
+                for name, typ in cols:
+                    if name not in have:
+                        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {typ}")
+            self.conn.executescript(REPLICA_INDEXES)
+        self.generation = int(self.get_meta("generation") or 0)
+        self.reconcile_thread: Optional[threading.Thread] = None
+        self.reconciled_at = 0.0
+        self.last_error = ""
+
+    def get_meta(self, key: str) -> str:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM replica_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else ""
+
+    def write(self, fn, bump: bool = True) -> None:
+        """Run fn(conn) in one transaction and bump the generation other sessions poll."""
+        with self.lock:
+            with self.conn:
+                fn(self.conn)
+                if not bump:
+                    return
+                self.generation += 1
+                self.conn.execute("INSERT OR REPLACE INTO replica_meta(key, value) VALUES ('generation', ?)",
+                                  (str(self.generation),))
+
+
+@st.cache_resource
+def replica() -> Optional[LocalReplica]:
+    if ledger_config()["backend"] == "sqlite":
+        return None  # the ledger itself is local; nothing to mirror
+    try:
+        return LocalReplica(REPLICA_DB_PATH)
+    except (sqlite3.Error, OSError):
+        return None
+
+
+def _replica_write(fn) -> None:
+    """Best-effort write-through: a broken replica must never break a Sheets write."""
+    rep = replica()
+    if rep is None:
+        return
+    try:
+        rep.write(fn)
+    except sqlite3.Error as e:
+        rep.last_error = str(e)
+        return
+    st.session_state["replica_gen"] = rep.generation
+
+
+def _entry_records(df: pd.DataFrame) -> List[tuple]:
+    if df is None or df.empty:
+        return []
+    dates = df["Date"].dt.strftime("%Y-%m-%d").fillna("")
+    return list(zip(
+        df["TxId"].astype(str), dates, df["Owner"].astype(str), df["Type"].astype(str),
+        df["Amount"].astype(float), df["Pay"].astype(str), df["Account"].astype(str),
+        df["Category"].astype(str), df["Notes"].astype(str), df["CreatedAt"].astype(str),
+        df["AutoTag"].astype(str), df["_row"].astype(int), df["Month"].astype(str),
+    ))
+
+
+_ENTRY_INSERT = f"INSERT INTO entries({', '.join(ENTRY_COLUMNS)}) VALUES ({', '.join('?' * len(ENTRY_COLUMNS))})"
+
+
+def _set_tx_meta(conn, hwm: Dict[str, object], layout_info: Optional[Dict[str, object]] = None) -> None:
+    meta = {"tx_hwm": json.dumps(hwm), "synced_at": datetime.utcnow().isoformat(timespec="seconds")}
+    if layout_info is not None:
+        meta["tx_layout"] = json.dumps(layout_info)
+    conn.executemany("INSERT OR REPLACE INTO replica_meta(key, value) VALUES (?, ?)", list(meta.items()))
+
+
+def replica_replace_tx(tx_df: pd.DataFrame, layout_info: Dict[str, object]) -> None:
+    hwm = st.session_state["tx_hwm"]
+    def _w(conn):
+        conn.execute("DELETE FROM entries")
+        conn.executemany(_ENTRY_INSERT, _entry_records(tx_df))
+        _set_tx_meta(conn, hwm, layout_info)
+    _replica_write(_w)
+
+
+def replica_append_tx(new_df: pd.DataFrame) -> None:
+    hwm = st.session_state["tx_hwm"]
+    first_row = int(new_df["_row"].min()) if not new_df.empty else 0
+    def _w(conn):
+        # Idempotent: rows at/after the append point are exactly what we are writing.
+        conn.execute("DELETE FROM entries WHERE sheet_row >= ?", (first_row,))
+        conn.executemany(_ENTRY_INSERT, _entry_records(new_df))
+        _set_tx_meta(conn, hwm)
+    _replica_write(_w)
+
+
+def replica_update_tx(row_nums: List[int], new_df: pd.DataFrame) -> None:
+    hwm = st.session_state["tx_hwm"]
+    def _w(conn):
+        conn.executemany("DELETE FROM entries WHERE sheet_row = ?", [(r,) for r in row_nums])
+        conn.executemany(_ENTRY_INSERT, _entry_records(new_df))
+        _set_tx_meta(conn, hwm)
+    _replica_write(_w)
+
+
+def replica_delete_tx(row_nums: List[int]) -> None:
+    hwm = st.session_state["tx_hwm"]
+    def _w(conn):
+        conn.executemany("DELETE FROM entries WHERE sheet_row = ?", [(r,) for r in row_nums])
+        _set_tx_meta(conn, hwm)
+    _replica_write(_w)
+
+
+def replica_insert_tx(new_df: pd.DataFrame) -> None:
+    hwm = st.session_state["tx_hwm"]
+    def _w(conn):
+        conn.executemany(_ENTRY_INSERT, _entry_records(new_df))
+        _set_tx_meta(conn, hwm)
+    _replica_write(_w)
+
+
+def replica_save_accounts(acct_df: pd.DataFrame) -> None:
+    rows = [("Family", str(r["Account"]), 0, str(r["Emoji"]), r["Limit"], int(r["BillingDay"]))
+            for r in acct_df[ACCT_HEADERS].to_dict("records")]
+    def _w(conn):
+        conn.execute("DELETE FROM cards")
+        conn.executemany("INSERT INTO cards(owner, card_name, is_primary, emoji, credit_limit, billing_day) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    _replica_write(_w)
+
+
+def replica_save_admin(kv: Dict[str, str]) -> None:
+    def _w(conn):
+        conn.executemany("INSERT OR REPLACE INTO admin_kv(key, value) VALUES (?, ?)",
+                         [(k, str(v or "")) for k, v in kv.items()])
+    _replica_write(_w)
+
+
+@perf_timed("sync")
+def load_from_replica() -> bool:
+    """Fill session state from the replica (ms). False if the replica has never been synced."""
+    rep = replica()
+    if rep is None:
+        return False
+    try:
+        with rep.lock:
+            synced = rep.get_meta("synced_at")
+            layout_raw = rep.get_meta("tx_layout")
+            if not synced or not layout_raw:
+                return False
+            gen = rep.generation
+            revision = rep.get_meta("revision")
+            kv = dict(rep.conn.execute("SELECT key, value FROM admin_kv").fetchall())
+            cards = rep.conn.execute(
+                "SELECT card_name, COALESCE(emoji, ''), COALESCE(credit_limit, 0), COALESCE(billing_day, 1) "
+                "FROM cards ORDER BY id").fetchall()
+            entries = rep.conn.execute(
+                f"SELECT {', '.join(ENTRY_COLUMNS)} FROM entries ORDER BY sheet_row").fetchall()
+    except sqlite3.Error:
+        return False
+
+    snap = shared_ledger().snapshot
+    if snap is not None and snap["replica_gen"] == gen:
+        # Another session already parsed this generation.
+        adopt_shared_snapshot(snap)
+        return True
+
+    synced_at = datetime.fromisoformat(synced)
+    apply_admin_values(kv, synced_at=synced_at)
+
+    st.session_state["acct_df"] = accounts_frame_from_records([dict(zip(ACCT_HEADERS, r)) for r in cards])
+    st.session_state["accounts_dirty"] = False
+
+    if entries:
+        tx_df = tx_frame_from_rows([list(r[:11]) for r in entries], TX_LAYOUT_POSITIONAL)
+        tx_df["_row"] = [int(r[11]) for r in entries]
+    else:
+        tx_df = pd.DataFrame(columns=TX_FRAME_COLUMNS)
+    st.session_state["tx_layout"] = json.loads(layout_raw)
+    _store_tx_df(tx_df, synced_at=synced_at)
+    st.session_state["replica_gen"] = gen
+    st.session_state["ledger_revision"] = revision
+    return True
+
+
+@perf_timed("sync")
+def reconcile_replica() -> str:
+    """Bring the replica in step with Sheets. Runs off the script thread: no session state.
+
+    Admin + accounts are small and re-read; transactions use the delta probe against the
+    replica's own high-water mark and only fall back to a full read on drift. When the sheet's
+    revision moved since the replica was written (or can't be probed), rows may have been edited
+    in place, which the key probe can't see: the full read is compared on content instead.
+    """
+    rep = replica()
+    if rep is None:
+        return "disabled"
+    revision = sheet_revision()
+    ss = open_sheet()
+    ws_map = {w.title: w for w in gs_call(ss.worksheets)}
+    if not all(t in ws_map for t in (TAB_ADMIN, TAB_ACCOUNTS, TAB_TRANSACTIONS)):
+        return "missing-tabs"
+
+    kv = AdminStore.load(ws_map[TAB_ADMIN]).values()
+    acct_df = accounts_frame_from_records(gs_call(ws_map[TAB_ACCOUNTS].get_all_records))
+
+    ws_tx = ws_map[TAB_TRANSACTIONS]
+    hwm_raw, layout_raw = rep.get_meta("tx_hwm"), rep.get_meta("tx_layout")
+    mode, new_df = ("full", None)
+    full_df, layout_info = None, None
+    if hwm_raw and layout_raw and (not revision or revision != rep.get_meta("revision")):
+        full_df, layout_info = fetch_tx_full(ws_tx)
+        mode, new_df = tx_changes(full_df, json.loads(hwm_raw))
+    elif hwm_raw and layout_raw:
+        mode, new_df = fetch_tx_delta(ws_tx, json.loads(hwm_raw), json.loads(layout_raw))
+    if mode == "full" and full_df is None:
+        full_df, layout_info = fetch_tx_full(ws_tx)
+    perf_note(rows=len(full_df) if mode == "full" else len(new_df) if mode == "delta" else 0)
+
+    acct_rows = [("Family", str(r["Account"]), 0, str(r["Emoji"]), r["Limit"], int(r["BillingDay"]))
+                 for r in acct_df[ACCT_HEADERS].to_dict("records")]
+
+    def _w(conn):
+        conn.executemany("INSERT OR REPLACE INTO admin_kv(key, value) VALUES (?, ?)", list(kv.items()))
+        conn.execute("DELETE FROM cards")
+        conn.executemany("INSERT INTO cards(owner, card_name, is_primary, emoji, credit_limit, billing_day) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", acct_rows)
+        if mode == "full":
+            conn.execute("DELETE FROM entries")
+            conn.executemany(_ENTRY_INSERT, _entry_records(full_df))
+            _set_tx_meta(conn, tx_hwm_of(full_df), layout_info)
+        else:
+            if mode == "delta":
+                conn.executemany(_ENTRY_INSERT, _entry_records(new_df))
+            hwm = json.loads(hwm_raw)
+            if mode == "delta":
+                hwm = tx_hwm_patched(hwm, added=new_df)
+            conn.executemany("INSERT OR REPLACE INTO replica_meta(key, value) VALUES (?, ?)",
+                             [("tx_hwm", json.dumps(hwm)), ("synced_at", datetime.utcnow().isoformat(timespec="seconds"))])
+        conn.execute("INSERT OR REPLACE INTO replica_meta(key, value) VALUES ('revision', ?)", (revision,))
+
+    with rep.lock:
+        # A session may have written (and re-marked) the replica while we were reading Sheets.
+        if rep.get_meta("tx_hwm") != hwm_raw:
+            return "raced"
+        cur_kv = dict(rep.conn.execute("SELECT key, value FROM admin_kv").fetchall())
+        cur_cards = rep.conn.execute("SELECT owner, card_name, is_primary, emoji, credit_limit, billing_day "
+                                     "FROM cards ORDER BY id").fetchall()
+        changed = (mode != "noop") or any(cur_kv.get(k) != v for k, v in kv.items()) or (cur_cards != acct_rows)
+        rep.write(_w, bump=changed)
+    return mode
+
+
+def _reconcile_worker(rep: LocalReplica) -> None:
+    try:
+        with background_sheets_calls():
+            reconcile_replica()
+        rep.last_error = ""
+    except Exception as e:  # background thread: record, never raise
+        rep.last_error = str(e)
+    finally:
+        rep.reconciled_at = time.time()
+
+
+def start_background_reconcile(force: bool = False) -> None:
+    rep = replica()
+    if rep is None:
+        return
+    with rep.lock:
+        if rep.reconcile_thread is not None and rep.reconcile_thread.is_alive():
+            return
+        if not force and time.time() - rep.reconciled_at < REPLICA_RECONCILE_SECS:
+            return
+        rep.reconciled_at = time.time()
+        rep.reconcile_thread = threading.Thread(target=_reconcile_worker, args=(rep,), daemon=True,
+                                                name="myfin-replica-reconcile")
+        rep.reconcile_thread.start()
+
+
+@perf_timed("sync")
+def poll_replica() -> None:
+    """Pick up replica changes made by the background reconcile or by other sessions."""
+    rep = replica()
+    if rep is None:
+        return
+    if rep.generation != st.session_state.get("replica_gen", rep.generation):
+        load_from_replica()
+    start_background_reconcile()
+
+
+# =============================
+# Ledger store (Sheets / SQLite)
+# =============================
+# Where the Transactions ledger lives, chosen in secrets (Sheets when the table is absent):
+#     [ledger]
+#     backend = "sqlite"
+#     path = "myfin_ledger.db"   # relative to the app folder
+# Both backends address rows by sheet row number (`_row`; the header is row 1). Deletes only
+# tombstone a row (Deleted column), so row numbers change only when compact() runs.
+# Accounts and admin settings stay in the spreadsheet. With the SQLite ledger the replica is off.
+LEDGER_BACKENDS = ("sheets", "sqlite")
+LEDGER_DB_PATH = APP_DIR / "myfin_ledger.db"
+LEDGER_COLUMNS = ["txid", "entry_date", "owner", "entry_type", "amount", "payment_method", "card_name",
+                  "category", "notes", "created_at", "auto_tag", "deleted_at"]  # TX_HEADERS order
+_LEDGER_TEXT_COLUMNS = ",\n    ".join(f"{c} TEXT NOT NULL DEFAULT ''" for c in LEDGER_COLUMNS)
+LEDGER_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS ledger (
+    row_num INTEGER NOT NULL,
+    {_LEDGER_TEXT_COLUMNS},
+    month TEXT NOT NULL DEFAULT '',
+    day TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS ledger_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL DEFAULT '');
+""" + BALANCE_CHECKPOINT_SCHEMA
+LEDGER_MIGRATIONS = [("deleted_at", "TEXT NOT NULL DEFAULT ''")]
+# ix_ledger_month covers a month query outright (no table reads); ix_ledger_keys covers the
+# key probe of a delta sync and MAX(row_num) for appends.
+LEDGER_INDEXES = f"""
+CREATE INDEX IF NOT EXISTS ix_ledger_month ON ledger(month, deleted_at, row_num, {', '.join(LEDGER_COLUMNS[:-1])});
+CREATE INDEX IF NOT EXISTS ix_ledger_day ON ledger(day, row_num);
+CREATE INDEX IF NOT EXISTS ix_ledger_keys ON ledger(row_num, txid, created_at, deleted_at);
+"""
+_LEDGER_SELECT = f"SELECT {', '.join(LEDGER_COLUMNS)}, row_num FROM ledger"
+_LEDGER_INSERT = (f"INSERT INTO ledger(row_num, {', '.join(LEDGER_COLUMNS)}, month, day) "
+                  f"VALUES ({', '.join('?' * (len(LEDGER_COLUMNS) + 3))})")
+_LEDGER_UPDATE = (f"UPDATE ledger SET {', '.join(f'{c} = ?' for c in LEDGER_COLUMNS + ['month', 'day'])} "
+                  f"WHERE row_num = ?")
+
+
+class LedgerStore:
+    """Transactions storage: full/delta load, month or date-range queries and batched mutations.
+
+    Frames use the session schema (TX_HEADERS + _row + Month) and hold live rows only; rows to
+    write are TX_HEADERS lists.
+    """
+
+    name = ""
+
+    def load(self) -> Tuple[pd.DataFrame, Dict[str, object]]:
+        """Every live row -> (tx_df, layout_info)."""
+        raise NotImplementedError
+
+    def delta(self, hwm: Dict[str, object], layout_info: Dict[str, object]) -> Tuple[str, Optional[pd.DataFrame]]:
+        """Same contract as fetch_tx_delta."""
+        raise NotImplementedError
+
+    def query(self, month: Optional[str] = None, start: Optional[date] = None,
+              end: Optional[date] = None) -> pd.DataFrame:
+        """Rows in `month` ("YYYY-MM") and/or between `start` and `end` (inclusive), in row order."""
+        tx_df, _ = self.load()
+        return tx_df[_tx_query_mask(tx_df, month, start, end)].reset_index(drop=True)
+
+    def append_many(self, rows: List[List[object]]) -> Optional[int]:
+        """Append rows at the end; returns the first row number written (None if unknown)."""
+        raise NotImplementedError
+
+    def update_many(self, updates: Dict[int, List[object]]) -> None:
+        raise NotImplementedError
+
+    def delete_many(self, row_nums: List[int]) -> None:
+        """Tombstone rows in place; no row moves."""
+        raise NotImplementedError
+
+    def restore(self, row_num: int, row: List[object]) -> bool:
+        """Undo a delete: overwrite tombstone `row_num` with `row` if it still holds that TxId."""
+        raise NotImplementedError
+
+    def compact(self) -> int:
+        """Remove tombstoned rows for good (later rows move up); returns how many were removed."""
+        raise NotImplementedError
+
+    def revision(self) -> str:
+        """Changes whenever the ledger does; "" when the spreadsheet's own revision covers it."""
+        return ""
+
+
+def _tx_query_mask(tx_df: pd.DataFrame, month: Optional[str], start: Optional[date], end: Optional[date]) -> pd.Series:
+    mask = pd.Series(True, index=tx_df.index)
+    if month:
+        mask &= tx_df["Month"] == month
+    if start is not None:
+        mask &= tx_df["Date"] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= tx_df["Date"] <= pd.Timestamp(end)
+    return mask
+
+
+def _row_runs(row_nums: List[int]) -> List[Tuple[int, int]]:
+    """Distinct row numbers -> contiguous (first, last) runs, bottom-most run first."""
+    runs: List[Tuple[int, int]] = []
+    for r in sorted({int(x) for x in row_nums}, reverse=True):
+        if runs and runs[-1][0] == r + 1:
+            runs[-1] = (r, runs[-1][1])
+        else:
+            runs.append((r, r))
+    return runs
+
+
+def _tombstone_stamp() -> str:
+    return datetime.utcnow().isoformat(timespec="seconds")
+
+
+class SheetsLedgerStore(LedgerStore):
+    """The Transactions tab (default). Sheets cannot filter server-side, so query() reads everything."""
+
+    name = "sheets"
+    DELETED_COL = _a1_col(TX_HEADERS.index("Deleted"))
+    LAST_COL = _a1_col(len(TX_HEADERS) - 1)
+
+    def __init__(self, ws: gspread.Worksheet):
+        self.ws = ws
+
+    def load(self):
+        return fetch_tx_full(self.ws)
+
+    def delta(self, hwm, layout_info):
+        return fetch_tx_delta(self.ws, hwm, layout_info)
+
+    def append_many(self, rows):
+        resp = gs_call(self.ws.append_rows, rows, value_input_option="USER_ENTERED")
+        return _appended_row_num(resp)
+
+    def update_many(self, updates):
+        gs_call(self.ws.batch_update,
+                [{"range": f"A{r}:{self.LAST_COL}{r}", "values": [row]} for r, row in sorted(updates.items())],
+                value_input_option="USER_ENTERED")
+
+    def delete_many(self, row_nums):
+        stamp = _tombstone_stamp()
+        gs_call(self.ws.batch_update,
+                [{"range": f"{self.DELETED_COL}{r}", "values": [[stamp]]} for r in sorted({int(x) for x in row_nums})],
+                value_input_option="RAW")
+
+    def restore(self, row_num, row):
+        cur = gs_call(self.ws.get, f"A{row_num}:{self.LAST_COL}{row_num}")
+        cur = (list(cur[0]) if cur else []) + [""] * len(TX_HEADERS)
+        if cur[0] != str(row[0]) or not str(cur[TX_HEADERS.index("Deleted")]).strip():
+            return False
+        self.update_many({int(row_num): row})
+        return True
+
+    def compact(self):
+        flags = gs_call(self.ws.get, f"{self.DELETED_COL}2:{self.DELETED_COL}")
+        dead = [i + 2 for i, v in enumerate(flags) if v and str(v[0]).strip()]
+        # Bottom-up, so each delete leaves the row numbers of the remaining runs untouched.
+        for first, last in _row_runs(dead):
+            gs_call(self.ws.delete_rows, first, last)
+        return len(dead)
+
+
+def _ledger_records(first_row: int, rows: List[List[object]]) -> List[tuple]:
+    """Rows (TX_HEADERS order) -> ledger table records, cells kept as the text Sheets would hold."""
+    parsed = _tx_rows_frame(first_row, rows)
+    months = parsed["Month"].tolist()
+    days = parsed["Date"].dt.strftime("%Y-%m-%d").fillna("").tolist()
+    out = []
+    for i, row in enumerate(rows):
+        cells = [("" if v is None else str(v)) for v in list(row)[:len(TX_HEADERS)]]
+        cells += [""] * (len(TX_HEADERS) - len(cells))
+        out.append((first_row + i, *cells, months[i], days[i]))
+    return out
+
+
+def _ledger_frame(records: List[tuple]) -> pd.DataFrame:
+    if not records:
+        return pd.DataFrame(columns=TX_FRAME_COLUMNS)
+    tx_df = tx_frame_from_rows([list(r[:len(TX_HEADERS)]) for r in records], TX_LAYOUT_POSITIONAL)
+    tx_df["_row"] = [int(r[len(TX_HEADERS)]) for r in records]
+    return tx_df
+
+
+class SqliteLedgerStore(LedgerStore):
+    """The ledger in a local SQLite file; one handle per process (see _sqlite_ledger_store)."""
+
+    name = "sqlite"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(LEDGER_SCHEMA)
+            have = {r[1] for r in self.conn.execute("PRAGMA table_info(ledger)")}
+            for name, typ in LEDGER_MIGRATIONS:
+                if name not in have:
+                    self.conn.execute(f"ALTER TABLE ledger ADD COLUMN {name} {typ}")
+                    # Covering indexes built before the column existed no longer cover.
+                    self.conn.executescript("DROP INDEX IF EXISTS ix_ledger_month; DROP INDEX IF EXISTS ix_ledger_keys;")
+            self.conn.executescript(LEDGER_INDEXES)
+
+    def _select(self, where: str = "", params: tuple = ()) -> pd.DataFrame:
+        where = f"WHERE deleted_at = '' {'AND ' + where if where else ''}"
+        with self.lock:
+            records = self.conn.execute(f"{_LEDGER_SELECT} {where} ORDER BY row_num", params).fetchall()
+        return _ledger_frame(records)
+
+    def _write(self, fn):
+        """fn(conn) in one transaction; bumps the revision other processes probe."""
+        with self.lock:
+            with self.conn:
+                out = fn(self.conn)
+                self.conn.execute("INSERT INTO ledger_meta(key, value) VALUES ('revision', '1') "
+                                  "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+        return out
+
+    def load(self):
+        return self._select(), {"cols": list(TX_LAYOUT_POSITIONAL), "width": len(TX_HEADERS)}
+
+    def delta(self, hwm, layout_info):
+        with self.lock:
+            keys = self.conn.execute("SELECT txid, created_at, deleted_at FROM ledger ORDER BY row_num").fetchall()
+            ids, created, deleted = (list(col) for col in zip(*keys)) if keys else ([], [], [])
+            mode, first, last = _tx_delta_plan(ids, created, deleted, hwm)
+            if mode != "delta":
+                return mode, None
+            return mode, self._select("row_num BETWEEN ? AND ?", (first, last))
+
+    def query(self, month=None, start=None, end=None):
+        where, params = [], []
+        if month:
+            where.append("month = ?")
+            params.append(str(month))
+        if start is not None:
+            where.append("day >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if end is not None:
+            where.append("day <= ?")
+            params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+        if start is not None or end is not None:
+            where.append("day != ''")
+        return self._select(" AND ".join(where), tuple(params))
+
+    def append_many(self, rows):
+        def _w(conn):
+            first = int(conn.execute("SELECT COALESCE(MAX(row_num), 1) + 1 FROM ledger").fetchone()[0])
+            conn.executemany(_LEDGER_INSERT, _ledger_records(first, rows))
+            return first
+        return self._write(_w)
+
+    def update_many(self, updates):
+        recs = [rec for r, row in sorted(updates.items()) for rec in _ledger_records(int(r), [row])]
+        self._write(lambda conn: conn.executemany(_LEDGER_UPDATE, [rec[1:] + rec[:1] for rec in recs]))
+
+    def delete_many(self, row_nums):
+        stamp = _tombstone_stamp()
+        self._write(lambda conn: conn.executemany(
+            "UPDATE ledger SET deleted_at = ? WHERE row_num = ? AND deleted_at = ''",
+            [(stamp, int(r)) for r in set(row_nums)]))
+
+    def restore(self, row_num, row):
+        rec = _ledger_records(int(row_num), [row])[0]
+        return self._write(lambda conn: conn.execute(
+            f"{_LEDGER_UPDATE} AND txid = ? AND deleted_at != ''", rec[1:] + rec[:2]).rowcount) > 0
+
+    def compact(self):
+        def _w(conn):
+            removed = conn.execute("DELETE FROM ledger WHERE deleted_at != ''").rowcount
+            if removed:
+                conn.execute("UPDATE ledger SET row_num = n.pos + 1 FROM "
+                             "(SELECT rowid AS id, ROW_NUMBER() OVER (ORDER BY row_num) AS pos FROM ledger) AS n "
+                             "WHERE ledger.rowid = n.id")
+            return removed
+        return self._write(_w)
+
+    def revision(self):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM ledger_meta WHERE key = 'revision'").fetchone()
+        return f"sqlite:{row[0] if row else 0}"
+
+
+def ledger_config() -> Dict[str, str]:
+    """The [ledger] secrets table as {"backend", "path"}."""
+    cfg = dict(st.secrets["ledger"]) if "ledger" in st.secrets else {}
+    backend = str(cfg.get("backend") or "sheets").strip().lower()
+    if backend not in LEDGER_BACKENDS:
+        st.error(f"Unknown [ledger] backend {backend!r}; expected one of: {', '.join(LEDGER_BACKENDS)}.")
+        st.stop()
+    path = Path(str(cfg.get("path") or LEDGER_DB_PATH))
+    if not path.is_absolute():
+        path = APP_DIR / path
+    return {"backend": backend, "path": str(path)}
+
+
+@st.cache_resource
+def _sqlite_ledger_store(path: str) -> SqliteLedgerStore:
+    return SqliteLedgerStore(Path(path))
+
+
+def ledger_store() -> LedgerStore:
+    cfg = ledger_config()
+    if cfg["backend"] == "sqlite":
+        return _sqlite_ledger_store(cfg["path"])
+    return SheetsLedgerStore(ensure_ws(open_sheet(), TAB_TRANSACTIONS, TX_HEADERS, rows=10000))
+
+
+# =============================
+# Shared ledger (all sessions)
+# =============================
+# One parsed copy of the ledger per process, keyed by spreadsheet id. Snapshot frames are never
+# mutated (every patch builds a new frame), so sessions adopt them without copying. A Drive
+# modifiedTime probe (file metadata, not a Sheets read) says whether the sheet moved since the
+# snapshot was taken; the first session to notice re-syncs (delta) and republishes for the rest.
+# st.cache_resource rather than st.cache_data: cache_data would hand every session its own copy.
+LEDGER_PROBE_SECS = 15
+
+
+def sheet_revision() -> str:
+    """Drive modifiedTime of the spreadsheet, plus the SQLite ledger's revision when the ledger
+    is local ("" when the probe is unavailable)."""
+    try:
+        rev = str(gs_call(open_sheet().get_lastUpdateTime))
+    except Exception:
+        return ""
+    cfg = ledger_config()
+    if rev and cfg["backend"] == "sqlite":
+        rev = f"{rev}|{_sqlite_ledger_store(cfg['path']).revision()}"
+    return rev
+
+
+class SharedLedger:
+    """Latest published snapshot plus a process-wide, throttled revision probe."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.snapshot: Optional[Dict[str, object]] = None
+        self.version = 0
+        self.revision = ""
+        self.probed_at = 0.0
+
+    def probe(self, force: bool = False) -> str:
+        with self.lock:
+            if not force and time.time() - self.probed_at < LEDGER_PROBE_SECS:
+                return self.revision
+            self.probed_at = time.time()
+        rev = sheet_revision()
+        with self.lock:
+            self.revision = rev
+        return rev
+
+    def publish(self, snap: Dict[str, object]) -> int:
+        with self.lock:
+            self.version += 1
+            self.snapshot = dict(snap, version=self.version)
+            return self.version
+
+
+@st.cache_resource
+def _shared_ledger(sheet_id: str) -> SharedLedger:
+    return SharedLedger()
+
+
+def shared_ledger() -> SharedLedger:
+    cfg = ledger_config()
+    return _shared_ledger(open_sheet().id if cfg["backend"] == "sheets" else f"{open_sheet().id}|{cfg['path']}")
+
+
+def publish_session_ledger(revision: Optional[str] = None) -> None:
+    """Share this session's ledger with every other session.
+
+    `revision` is the sheet revision the data was read at. Without one the data comes from our
+    own writes: it matches the sheet's new revision only if nobody else published since we last
+    adopted; otherwise it is published as unknown ("") so the next probe re-syncs it.
+    """
+    led = shared_ledger()
+    if revision is None:
+        revision = st.session_state.pop("ledger_revision", None)
+    if revision is None:
+        snap = led.snapshot
+        if snap is None or snap["version"] == st.session_state.get("ledger_version"):
+            revision = led.probe(force=True)
+        else:
+            revision = ""
+    st.session_state["ledger_version"] = led.publish({
+        "revision": revision,
+        "replica_gen": st.session_state.get("replica_gen"),
+        "synced_at": st.session_state.get("last_sync_at"),
+        "tx_df": st.session_state["tx_df"],
+        "tx_hwm": st.session_state["tx_hwm"],
+        "tx_layout": st.session_state.get("tx_layout"),
+        "acct_df": st.session_state["acct_df"],
+        "admin_kv": st.session_state.get("admin_kv", {}),
+    })
+    st.session_state["ledger_local_changes"] = False
+
+
+def adopt_shared_snapshot(snap: Dict[str, object]) -> None:
+    """Point this session at a published snapshot (no parsing, no copies)."""
+    apply_admin_values(snap["admin_kv"], synced_at=snap["synced_at"])
+    st.session_state.pop("admin_store", None)
+    st.session_state["acct_df"] = snap["acct_df"]
+    st.session_state["accounts_dirty"] = False
+    st.session_state["tx_layout"] = snap["tx_layout"]
+    _store_tx_df(snap["tx_df"], synced_at=snap["synced_at"], hwm=snap["tx_hwm"])
+    st.session_state["replica_gen"] = snap["replica_gen"]
+    st.session_state["ledger_version"] = snap["version"]
+    st.session_state["ledger_local_changes"] = False
+    st.session_state.pop("ledger_revision", None)
+
+
+def adopt_shared_ledger() -> bool:
+    """Start a session from the shared snapshot, if any; poll_shared_ledger handles staleness."""
+    snap = shared_ledger().snapshot
+    if snap is None:
+        return False
+    adopt_shared_snapshot(snap)
+    return True
+
+
+@perf_timed("sync")
+def poll_shared_ledger() -> None:
+    """Per-rerun exchange with the shared ledger: publish local changes, adopt others', re-sync if stale."""
+    led = shared_ledger()
+    if st.session_state.get("ledger_local_changes"):
+        publish_session_ledger()
+        return
+    snap = led.snapshot
+    if snap is not None and snap["version"] != st.session_state.get("ledger_version"):
+        adopt_shared_snapshot(snap)
+    rev = led.probe()
+    if not rev or snap is None or rev == snap["revision"]:
+        return
+    # The sheet moved since the snapshot: one session re-reads, the others pick up its publish.
+    # Someone else wrote, possibly in place, so the key probe's "noop" can't be trusted here.
+    if not led.refresh_lock.acquire(blocking=False):
+        return
+    try:
+        refresh_admin_from_sheets()
+        refresh_accounts_from_sheets()
+        sync_transactions_delta(check_content=True)
+        publish_session_ledger(revision=rev)
+    except SheetsUnavailable:
+        pass  # keep serving the snapshot; the next probe retries
+    finally:
+        led.refresh_lock.release()
+
+
+# =============================
+# Recurring
+# =============================
+def upsert_pref(prefs_list: List[dict], pref: dict) -> List[dict]:
+    mk = str(pref.get("MerchantKey", "")).strip()
+    if not mk:
+        return prefs_list
+    out = []
+    replaced = False
+    for r in prefs_list:
+        if str(r.get("MerchantKey", "")).strip() == mk:
+            out.append(pref)
+            replaced = True
+        else:
+            out.append(r)
+    if not replaced:
+        out.append(pref)
+    return out
+
+def ensure_recurring_for_month(month_str: str) -> int:
+    """Auto-add recurring items for month_str if missing. Runs when app opens or month changes."""
+    tx = st.session_state["tx_df"]
+    prefs_list = st.session_state["prefs_list"]
+    try:
+        p = pd.Period(month_str, freq="M")
+    except Exception:
+        return 0
+
+    year, month = p.year, p.month
+    existing_tags = set(tx.loc[(tx["Month"] == month_str) & (tx["AutoTag"].str.startswith("AUTO:")), "AutoTag"].tolist())
+    created = 0
+
+    # One append_rows + one local patch for the whole month instead of a write per item.
+    with write_batch():
+        for pref in prefs_list:
+            if not bool(pref.get("IsRecurring", False)):
+                continue
+            mk = str(pref.get("MerchantKey", "")).strip()
+            if not mk:
+                continue
+            dom = pref.get("DayOfMonth", 1)
+            try:
+                dom = int(float(dom)) if dom is not None and str(dom).strip() != "" else 1
+            except Exception:
+                dom = 1
+            dom = clamp_day(year, month, dom)
+
+            tag = f"AUTO:{mk}:{month_str}"
+            if tag in existing_tags:
+                continue
+
+            amt = pref.get("Amount", None)
+            try:
+                amt = float(amt) if amt is not None and str(amt).strip() != "" else None
+            except Exception:
+                amt = None
+            if amt is None or amt <= 0:
+                continue
+
+            cat = str(pref.get("Category", "")).strip() or "Uncategorized"
+            pay = str(pref.get("Pay", "")).strip() or "Bank"
+            acct = str(pref.get("Account", "")).strip()
+            nick = str(pref.get("Nickname", "")).strip() or mk.title()
+
+            due = date(year, month, dom)
+            note = f"[AUTO] {nick}"
+
+            append_transaction(due, "Debit", amt, pay, acct, cat, note, auto_tag=tag)
+            created += 1
+
+    return created
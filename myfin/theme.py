@@ -0,0 +1,439 @@
+"""Premium dark theme, mobile CSS and the client-side mobile hint (injected on every run)."""
+from __future__ import annotations
+
+import streamlit as st
+
+
+# ====================== VF3_HF2 START ======================
+VF3_HF2_CSS = """
+    <style>
+      /* Base dark surface (mobile & desktop, no light-mode bleed) */
+      .stApp { background:#070B12; color:#E9EEF7; }
+
+      /* Inputs & selectors */
+      input, textarea {
+        background:#0F1624 !important;
+        color:#E9EEF7 !important;
+        border:1px solid rgba(233,238,247,.18) !important;
+      }
+      input::placeholder, textarea::placeholder {
+        color:rgba(233,238,247,.55) !important;
+      }
+      div[data-baseweb="select"] > div,
+      div[data-baseweb="input"] > div {
+        background:#0F1624 !important;
+        color:#E9EEF7 !important;
+      }
+
+      /* Mobile nav polish */
+      @media (max-width: 768px) {
+        section[data-testid="stSidebar"] { display:none; }
+        div[data-testid="stHorizontalBlock"] > div {
+          gap:8px;
+        }
+        button[kind="secondary"] {
+          border-radius:18px !important;
+          padding:6px 12px !important;
+        }
+      }
+
+      /* Keep tiles as tiles on mobile */
+      @media (max-width: 768px) {
+        .tile-grid {
+          display:grid !important;
+          grid-template-columns: repeat(2, minmax(0, 1fr)) !important;
+          gap:12px !important;
+        }
+      }
+    </style>
+    """
+# ====================== VF3_HF2 END ========================
+
+
+# =============================
+# Premium Dark UI (final)
+# =============================
+DARK_CSS = """
+<style>
+:root{color-scheme:dark;} html,body{color-scheme:dark;}
+:root{
+  --bg0:#070B14;
+  --bg1:#0B1220;
+  --panel:rgba(255,255,255,0.050);
+  --panel2:rgba(255,255,255,0.070);
+  --border:rgba(255,255,255,0.10);
+  --text:#E8EAED;
+  --muted:rgba(232,234,237,0.66);
+  --accent:rgba(99,102,241,1.0);
+  --accent2:rgba(56,189,248,1.0);
+  --good:rgba(34,197,94,1.0);
+  --warn:rgba(245,158,11,1.0);
+  --bad:rgba(239,68,68,1.0);
+}
+.block-container{ padding-top: 1rem; max-width: 1260px; }
+.stApp{
+  background:
+    radial-gradient(900px 650px at 15% 10%, rgba(56,189,248,0.12), transparent 60%),
+    radial-gradient(900px 650px at 80% 10%, rgba(99,102,241,0.12), transparent 60%),
+    radial-gradient(900px 650px at 80% 85%, rgba(34,197,94,0.08), transparent 60%),
+    linear-gradient(180deg, var(--bg0) 0%, var(--bg1) 100%);
+  color: var(--text);
+}
+section[data-testid="stSidebar"]{
+  background: linear-gradient(180deg, rgba(7,11,20,0.97), rgba(7,11,20,0.86));
+  border-right: 1px solid var(--border);
+}
+section[data-testid="stSidebar"] *{ color: var(--text); }
+
+h1,h2,h3,h4{ letter-spacing: -0.25px; color: var(--text); }
+p, label, .stMarkdown{ color: var(--text); }
+
+@keyframes mfFadeIn { from {opacity:0; transform: translateY(6px);} to {opacity:1; transform: translateY(0);} }
+.mf-anim{ animation: mfFadeIn 160ms ease-out; }
+
+.mf-topbrand{
+  display:flex; align-items:center; justify-content:space-between;
+  gap:12px; padding: 14px 14px; border-radius: 18px;
+  background: var(--panel);
+  border: 1px solid var(--border);
+  box-shadow: 0 18px 46px rgba(0,0,0,0.40);
+}
+.mf-pill{
+  display:inline-block; padding:4px 10px; border-radius:999px;
+  background: rgba(99,102,241,0.14);
+  border:1px solid rgba(99,102,241,0.22);
+  color: rgba(199,210,254,1);
+  font-size:12px; font-weight:900;
+}
+.mf-card{
+  border-radius:18px; padding:16px;
+  border:1px solid var(--border);
+  background: var(--panel);
+  box-shadow:0 18px 50px rgba(0,0,0,0.40);
+}
+.mf-card.tight{ padding:14px; }
+.mf-card:hover{ border-color: rgba(99,102,241,0.28); box-shadow:0 20px 60px rgba(0,0,0,0.45); }
+.mf-card h4{ margin:0 0 8px 0; font-weight:950; }
+.mf-kpi{ font-size:30px; font-weight:950; margin:0; line-height:1.1; }
+.mf-sub{ margin:6px 0 0 0; font-size:13px; color: var(--muted); }
+
+.mf-tile{
+  border-radius:18px; padding:14px;
+  border:1px solid var(--border);
+  background: var(--panel);
+  box-shadow:0 18px 50px rgba(0,0,0,0.40);
+}
+.mf-tile-title{ font-weight:950; font-size:14px; margin:0; color: var(--text); }
+.mf-tile-num{ font-weight:950; font-size:22px; margin:6px 0 0 0; color: var(--text); }
+.mf-tile-sub{ font-size:12px; color: var(--muted); margin:8px 0 0 0; }
+.mf-hr{ height:1px; background: var(--border); margin:10px 0; }
+
+.mf-sync{
+  display:flex; align-items:center; justify-content:space-between; gap:10px;
+  padding:10px 12px; border-radius: 16px;
+  background: rgba(255,255,255,0.045);
+  border: 1px solid var(--border);
+}
+.mf-sync small{ color: var(--muted); }
+
+.stButton > button{
+  border-radius: 14px !important;
+  border: 1px solid rgba(99,102,241,0.35) !important;
+  background: rgba(99,102,241,0.16) !important;
+  color: rgba(224,231,255,1) !important;
+  font-weight: 950 !important;
+  padding: 0.62rem 0.95rem !important;
+}
+.stButton > button:hover{
+  background: rgba(99,102,241,0.24) !important;
+  border-color: rgba(99,102,241,0.55) !important;
+}
+.stButton > button:active{ transform: scale(0.99); }
+
+div[data-baseweb="input"] input,
+div[data-baseweb="textarea"] textarea{
+  background: rgba(255,255,255,0.06) !important;
+  color: var(--text) !important;
+  border: 1px solid var(--border) !important;
+}
+div[data-baseweb="select"] > div{
+  background: rgba(255,255,255,0.06) !important;
+  border: 1px solid var(--border) !important;
+}
+
+div[data-testid="stDataFrame"]{
+  border-radius:14px;
+  border:1px solid var(--border);
+  overflow:hidden;
+  background: rgba(255,255,255,0.03);
+}
+
+.mf-login-wrap{ max-width: 420px; margin: 5vh auto 0 auto; }
+.mf-login-title{ font-size: 26px; font-weight: 950; margin: 0; color: var(--text); }
+.mf-login-sub{ margin-top: 6px; color: var(--muted); font-size: 13px; }
+
+/* ===== VF2.2: Bigger sidebar pages navigation ===== */
+section[data-testid="stSidebar"] { min-width: 280px !important; max-width: 320px !important; }
+section[data-testid="stSidebar"] .stSidebarContent { padding-top: 0.5rem; }
+section[data-testid="stSidebar"] [data-testid="stSidebarNav"] ul { gap: 6px; }
+section[data-testid="stSidebar"] [data-testid="stSidebarNav"] li a {
+  font-size: 1.05rem !important;
+  line-height: 1.35rem !important;
+  padding: 12px 14px !important;
+  border-radius: 14px !important;
+}
+section[data-testid="stSidebar"] [data-testid="stSidebarNav"] li a svg {
+  width: 20px !important; height: 20px !important;
+}
+
+
+/* --- Force dark mode / high contrast (even when OS/browser is light) --- */
+:root, html, body {
+  color-scheme: dark;
+}
+[data-testid="stAppViewContainer"], .stApp, body {
+  background: radial-gradient(1200px 600px at 15% 10%, rgba(66,99,255,0.18), rgba(0,0,0,0) 55%),
+              radial-gradient(900px 500px at 85% 20%, rgba(0,180,140,0.14), rgba(0,0,0,0) 55%),
+              #0b0f14 !important;
+  color: #e9eef7 !important;
+}
+h1,h2,h3,h4,h5,h6,p,span,div,label,small,li {
+  color: #e9eef7 !important;
+}
+::placeholder { color: rgba(233,238,247,0.55) !important; opacity: 1 !important; }
+input, textarea, [data-baseweb="input"] input, [data-baseweb="textarea"] textarea, [data-baseweb="select"] > div {
+  background-color: rgba(255,255,255,0.06) !important;
+  color: #e9eef7 !important;
+  border-color: rgba(255,255,255,0.14) !important;
+}
+[data-baseweb="select"] svg { fill: rgba(233,238,247,0.7) !important; }
+[data-testid="stSidebar"], section[data-testid="stSidebar"] {
+  background: rgba(10,13,18,0.92) !important;
+}
+
+/* tiny pill */
+.pill { display:inline-block; padding:6px 10px; border-radius:999px; font-weight:600;
+  background: rgba(255,255,255,0.08); border:1px solid rgba(255,255,255,0.12); }
+.pill-auto { box-shadow: 0 0 0 1px rgba(66,99,255,0.25) inset; }
+
+/* Quick actions layout: keep as 2-column grid on mobile instead of a long list */
+.quick-actions div[data-testid="stHorizontalBlock"] { gap: 10px !important; }
+@media (max-width: 768px){
+  .quick-actions div[data-testid="stHorizontalBlock"] > div[data-testid="column"]{
+    flex: 1 1 calc(50% - 10px) !important;
+    width: calc(50% - 10px) !important;
+    min-width: calc(50% - 10px) !important;
+  }
+  .quick-actions button{
+    height: 44px !important;
+    font-size: 16px !important;
+  }
+}
+
+/* --- Force dark controls even when OS/browser prefers light --- */
+@media (prefers-color-scheme: light) {
+  :root, body, .stApp { background: #0b0f14 !important; color: #e9eef7 !important; }
+}
+
+/* Segmented controls (Streamlit) */
+div[data-testid="stSegmentedControl"] button {
+  background: rgba(255,255,255,0.06) !important;
+  color: #e9eef7 !important;
+  border: 1px solid rgba(255,255,255,0.18) !important;
+}
+div[data-testid="stSegmentedControl"] button[aria-checked="true"] {
+  background: rgba(99, 145, 255, 0.35) !important;
+  border-color: rgba(120,160,255,0.55) !important;
+}
+
+/* Radio/checkbox label text (avoid washed-out light theme) */
+label, [data-testid="stMarkdownContainer"] { color: #e9eef7 !important; }
+
+/* BaseWeb (used by selectbox etc.) */
+*[data-baseweb] { color-scheme: dark; }
+
+/* Quick actions: force grid-like layout on small screens (prevent full vertical stacking) */
+@media (max-width: 740px) {
+  .quick-actions [data-testid="stHorizontalBlock"] { flex-wrap: wrap !important; }
+  .quick-actions [data-testid="column"] {
+    flex: 0 0 calc(50% - 0.75rem) !important;
+    width: calc(50% - 0.75rem) !important;
+    min-width: 0 !important;
+  }
+}
+
+
+/* Force dark native controls on mobile even if OS is light */
+input, select, textarea, button { color-scheme: dark; }
+
+/* Fix light (white) segmented controls / radios on mobile */
+div[data-testid="stSegmentedControl"] button,
+div[data-testid="stRadio"] label,
+div[data-testid="stRadio"] div[role="radiogroup"] label,
+div[data-testid="stSelectbox"] div[data-baseweb="select"] > div,
+div[data-testid="stSelectbox"] div[data-baseweb="select"] * {
+  background-color: rgba(255,255,255,0.06) !important;
+  color: #e9eefc !important;
+  border-color: rgba(255,255,255,0.18) !important;
+}
+
+div[data-testid="stSegmentedControl"] button[aria-pressed="true"]{
+  background-color: rgba(255,255,255,0.12) !important;
+  border-color: rgba(255,90,90,0.55) !important;
+  color: #ffffff !important;
+}
+
+/* Some mobile browsers render native <select> with light palette unless color-scheme is dark */
+select { background-color: #0f1622 !important; color: #e9eefc !important; }
+
+/* --- Mobile: keep 2-column grids instead of collapsing to single column --- */
+@media (max-width: 768px){
+  /* Force Streamlit columns to remain in a 2-column grid where possible */
+  div[data-testid="stHorizontalBlock"]{
+    gap: 0.6rem !important;
+  }
+  div[data-testid="stHorizontalBlock"] > div[data-testid="column"]{
+    flex: 1 1 calc(50% - 0.6rem) !important;
+    width: calc(50% - 0.6rem) !important;
+    min-width: calc(50% - 0.6rem) !important;
+  }
+  /* If there is only one column, let it take full width */
+  div[data-testid="stHorizontalBlock"] > div[data-testid="column"]:only-child{
+    flex-basis: 100% !important;
+    width: 100% !important;
+    min-width: 100% !important;
+  }
+}
+
+/* --- Darken radio/segmented controls on mobile (Safari sometimes forces light styles) --- */
+div[data-testid="stSegmentedControl"] div[role="radiogroup"]{
+  background: rgba(16,22,36,0.70) !important;
+  border: 1px solid rgba(255,255,255,0.12) !important;
+}
+div[data-testid="stSegmentedControl"] label{
+  color: rgba(235,240,255,0.92) !important;
+}
+div[data-testid="stSegmentedControl"] label[data-checked="true"]{
+  background: rgba(255,255,255,0.08) !important;
+  border: 1px solid rgba(255,255,255,0.20) !important;
+}
+
+/* Fallback for st.radio (pill-style) */
+div[data-testid="stRadio"] div[role="radiogroup"]{
+  background: rgba(16,22,36,0.70) !important;
+  border: 1px solid rgba(255,255,255,0.12) !important;
+  border-radius: 12px !important;
+  padding: 2px !important;
+}
+div[data-testid="stRadio"] div[role="radiogroup"] label{
+  background: transparent !important;
+  color: rgba(235,240,255,0.92) !important;
+}
+div[data-testid="stRadio"] div[role="radiogroup"] label:hover{
+  background: rgba(255,255,255,0.05) !important;
+}
+div[data-testid="stRadio"] div[role="radiogroup"] label[data-checked="true"]{
+  background: rgba(255,255,255,0.08) !important;
+  border-radius: 10px !important;
+  border: 1px solid rgba(255,255,255,0.20) !important;
+}
+
+</style>
+"""
+# Mobile responsiveness (applies only on small screens)
+MOBILE_CSS = r"""
+<style>
+@media (max-width: 768px) {
+  /* HF5: hide sidebar overlay on mobile (we use in-page nav) */
+  section[data-testid="stSidebar"], div[data-testid="stSidebar"]{display:none !important;}
+  div[data-testid="collapsedControl"]{display:none !important;}
+
+  /* tighter page padding */
+  .block-container { padding-left: 0.85rem !important; padding-right: 0.85rem !important; padding-top: 0.75rem !important; }
+  /* full-width buttons */
+  .stButton>button { width: 100% !important; }
+
+  /* sidebar width on phones (if opened) */
+  section[data-testid="stSidebar"] { width: 82vw !important; max-width: 82vw !important; }
+
+  /* sidebar stays available on phones */
+  /* ensure main area uses full width */
+  div[data-testid="stAppViewContainer"] > .main { margin-left: 0 !important; }
+
+  /* make segmented controls wrap instead of clipping */
+  div[data-testid="stSegmentedControl"] div[data-baseweb="button-group"] { flex-wrap: wrap !important; }
+  div[data-testid="stSegmentedControl"] button { flex: 1 1 auto !important; min-width: 32% !important; }
+
+  /* prevent tables from breaking layout */
+  div[data-testid="stDataFrame"] { overflow-x: auto !important; }
+  /* slightly smaller headings */
+  h1 { font-size: 1.45rem !important; }
+  h2 { font-size: 1.20rem !important; }
+  h3 { font-size: 1.05rem !important; }
+
+  /* iOS Safari: ensure typed text is visible (fix white-input + white-text) */
+  input, textarea, select {
+    background-color: rgba(18,18,20,0.96) !important;
+    color: rgba(240,240,245,0.98) !important;
+    -webkit-text-fill-color: rgba(240,240,245,0.98) !important;
+    caret-color: rgba(240,240,245,0.98) !important;
+  }
+  /* Streamlit internal input wrappers */
+  div[data-baseweb="input"] input,
+  div[data-baseweb="textarea"] textarea,
+  div[data-baseweb="select"] input {
+    background-color: rgba(18,18,20,0.96) !important;
+    color: rgba(240,240,245,0.98) !important;
+    -webkit-text-fill-color: rgba(240,240,245,0.98) !important;
+  }
+  /* placeholder */
+  input::placeholder, textarea::placeholder {
+    color: rgba(240,240,245,0.55) !important;
+    -webkit-text-fill-color: rgba(240,240,245,0.55) !important;
+  }
+}
+</style>
+"""
+
+# --- Auto mobile hint (client-side) ---
+# Streamlit can't reliably detect screen size server-side. For phones, we set a query param once using JS.
+MOBILE_HINT_JS = """
+<script>
+(function() {
+  try {
+    const isSmall = window.innerWidth && window.innerWidth <= 768;
+    const url = new URL(window.location.href);
+    if (isSmall && !url.searchParams.has('mobile')) {
+      url.searchParams.set('mobile','1');
+      window.location.replace(url.toString());
+    }
+  } catch (e) {}
+})();
+</script>
+"""
+
+
+def inject_theme() -> None:
+    """CSS + mobile hint for this run; the view-mode default follows the `mobile` query param."""
+    # Guard CSS injection to avoid performance degradation
+    if "vf3_hf2_css_loaded" not in st.session_state:
+        st.session_state.vf3_hf2_css_loaded = True
+        st.markdown(VF3_HF2_CSS, unsafe_allow_html=True)
+    st.markdown(DARK_CSS, unsafe_allow_html=True)
+    st.markdown(MOBILE_CSS, unsafe_allow_html=True)
+    st.components.v1.html(MOBILE_HINT_JS, height=0)
+    # If the URL indicates mobile, default view mode to Mobile.
+    try:
+        if st.query_params.get("mobile") in ("1", ["1"]):
+            st.session_state["view_mode"] = "Mobile"
+    except Exception:
+        pass
+
+    # View mode override (lets you force card-layout on phones)
+    if "view_mode" not in st.session_state:
+        st.session_state["view_mode"] = "Auto"  # Auto | Desktop | Mobile
+
+
+def is_mobile_view():
+    # Mobile-specific view is disabled for now to avoid navigation issues.
+    return False
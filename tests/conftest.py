@@ -0,0 +1,51 @@
+"""Random ledgers for the equivalence tests: raw sheet rows parsed the way the app parses them."""
+import random
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from myfin.ledger import TX_LAYOUT_POSITIONAL, compact_tx_frame, tx_frame_from_rows
+
+ACCOUNTS = ["RBC VISA", "RBC Mastercard", "Line of Credit", "Canadian tire Mastercard - Grey"]
+TYPES = ["Debit", "Debit", "Debit", "Credit", "CC Repay", "LOC Draw", "LOC Repay", "International",
+         "Investment", "Transfer"]
+CATEGORIES = ["Groceries", "Fuel", "Dining", "Salary", "Uncategorized", "Shopping", "Transfers",
+              "Investment", "Payroll deposit", "Cashback"]
+NOTES = ["costco", "uber eats", "NETFLIX.COM", "shell 0042", "amazon mktp", "payroll", "salary oct",
+         "e-transfer to mom", "", "TIM HORTONS #1234", "interest", "refund amazon"]
+BAD_DATES = ["", "not a date", "2025-13-40", "31/31/2025"]
+
+
+def random_rows(rnd: random.Random, n: int, start: date = date(2025, 1, 1), days: int = 90,
+                bad_dates: float = 0.05, round_amounts: float = 0.3) -> list:
+    """`n` Transactions rows (TX_HEADERS order). Round amounts make payoffs land exactly on zero."""
+    rows = []
+    for i in range(n):
+        d = start + timedelta(days=rnd.randrange(days))
+        when = rnd.choice(BAD_DATES) if rnd.random() < bad_dates else d.isoformat()
+        amount = rnd.choice([100, 200, 300, 50]) if rnd.random() < round_amounts else round(rnd.uniform(0.1, 600), 2)
+        created = "" if rnd.random() < 0.05 else f"{d.isoformat()}T{rnd.randrange(24):02d}:{rnd.randrange(60):02d}:00"
+        rows.append([str(uuid.UUID(int=rnd.getrandbits(128))), when, "Family", rnd.choice(TYPES), str(amount),
+                     rnd.choice(["Card", "Card", "Card", "Bank", "Cash"]), rnd.choice(ACCOUNTS + ["Cash"]),
+                     rnd.choice(CATEGORIES), rnd.choice(NOTES), created, rnd.choice(["", "", "rule"]), ""])
+    return rows
+
+
+@pytest.fixture
+def make_ledger():
+    """(rows, compact=False) -> tx_df, parsed as a full sheet read is."""
+    def _make(rows, compact: bool = False, first_row: int = 2):
+        df = tx_frame_from_rows(rows, TX_LAYOUT_POSITIONAL, first_row=first_row)
+        return compact_tx_frame(df, ACCOUNTS) if compact else df
+    return _make
+
+
+@pytest.fixture
+def session():
+    """st.session_state (bare mode), with the keys a test sets removed afterwards."""
+    import streamlit as st
+    before = set(st.session_state.keys())
+    yield st.session_state
+    for k in set(st.session_state.keys()) - before:
+        del st.session_state[k]
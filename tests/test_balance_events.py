@@ -0,0 +1,104 @@
+"""compute_balance_events / extend_balance_events vs the original per-row replay."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ACCOUNTS, random_rows
+from myfin.analytics import _compute_balance_events_keyed, compute_balance_events, extend_balance_events
+
+
+def reference_balance_events(tx: pd.DataFrame, accounts) -> pd.DataFrame:
+    """The iterrows loop compute_balance_events replaced (accounts passed in, not global)."""
+    df = tx[tx["Account"].isin(accounts)].copy()
+    charges = df[((df["Type"] == "Debit") & (df["Pay"] == "Card")) | (df["Type"] == "LOC Draw")].copy()
+    charges["Delta"] = charges["Amount"]
+    charges["Kind"] = "Charge"
+
+    pays = df[(df["Type"] == "CC Repay") | (df["Type"] == "LOC Repay")].copy()
+    pays["Delta"] = -pays["Amount"]
+    pays["Kind"] = "Payment"
+
+    use = pd.concat([charges, pays], ignore_index=True)
+    if use.empty:
+        return pd.DataFrame(columns=["Date", "Month", "Account", "Delta", "Balance", "Kind"])
+
+    use["_sort"] = use["CreatedAt"].fillna("")
+    use.sort_values(["Date", "_sort"], inplace=True)
+
+    bal = {a: 0.0 for a in accounts}
+    out = []
+    for _, r in use.iterrows():
+        a = r.get("Account", "")
+        d = float(r.get("Delta", 0.0))
+        bal[a] = max(0.0, bal.get(a, 0.0) + d)
+        out.append({"Date": r.get("Date"), "Month": r.get("Month"), "Account": a, "Delta": d, "Balance": bal[a],
+                    "Kind": r.get("Kind", "")})
+    return pd.DataFrame(out)
+
+
+def assert_same_events(got: pd.DataFrame, want: pd.DataFrame) -> None:
+    assert len(got) == len(want)
+    if want.empty:
+        return
+    got, want = got.reset_index(drop=True), want.reset_index(drop=True)
+    for c in ["Month", "Account", "Kind"]:
+        assert got[c].astype(str).tolist() == want[c].astype(str).tolist(), c
+    assert pd.to_datetime(got["Date"]).equals(pd.to_datetime(want["Date"]))
+    for c in ["Delta", "Balance"]:  # bit-for-bit, not approximately
+        assert np.array_equal(got[c].to_numpy(dtype=float).view(np.int64), want[c].to_numpy(dtype=float).view(np.int64)), c
+
+
+@pytest.mark.parametrize("seed", range(40))
+@pytest.mark.parametrize("compact", [False, True])
+def test_matches_reference(make_ledger, seed, compact):
+    rnd = random.Random(seed)
+    tx = make_ledger(random_rows(rnd, rnd.randrange(0, 400), bad_dates=rnd.choice([0.0, 0.05, 0.3])), compact)
+    accounts = rnd.sample(ACCOUNTS, rnd.randint(1, len(ACCOUNTS)))
+    want = reference_balance_events(tx, accounts)
+    assert_same_events(compute_balance_events(tx, accounts), want)
+
+
+def test_zero_floor_and_exact_payoffs(make_ledger):
+    rows = random_rows(random.Random(7), 0)
+    for i, (typ, amount) in enumerate([("Debit", "100"), ("CC Repay", "100"), ("CC Repay", "50"), ("Debit", "0.1"),
+                                       ("Debit", "0.2"), ("CC Repay", "0.3"), ("Debit", "30"), ("CC Repay", "500"),
+                                       ("Debit", "20")]):
+        rows.append([f"t{i}", "2025-02-01", "Family", typ, amount, "Card", "RBC VISA", "Fuel", "", f"2025-02-01T00:{i:02d}",
+                     "", ""])
+    tx = make_ledger(rows)
+    got = compute_balance_events(tx, ["RBC VISA"])
+    assert_same_events(got, reference_balance_events(tx, ["RBC VISA"]))
+    assert (got["Balance"] >= 0).all() and got["Balance"].iloc[-1] == 20.0
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_extend_matches_full_replay(make_ledger, seed):
+    """Any split: extension either declines (None) or equals the full replay."""
+    rnd = random.Random(1000 + seed)
+    rows = random_rows(rnd, rnd.randrange(1, 300), bad_dates=rnd.choice([0.0, 0.05]))
+    k = rnd.randrange(len(rows) + 1)
+    accounts = ACCOUNTS[:3]
+    events, last_key = _compute_balance_events_keyed(make_ledger(rows[:k]), accounts)
+    ext = extend_balance_events(events, last_key, make_ledger(rows[k:], first_row=k + 2), accounts)
+    if ext is not None:
+        assert_same_events(ext[0], reference_balance_events(make_ledger(rows), accounts))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_extend_in_replay_order(make_ledger, seed):
+    """Appends that replay after the last event (the delta-sync case) extend, in several steps."""
+    rnd = random.Random(2000 + seed)
+    rows = random_rows(rnd, 300, bad_dates=0.0)
+    rows.sort(key=lambda r: (r[1], r[9]))
+    for i, r in enumerate(rows):
+        r[9] = f"{r[1]}T{i:06d}"  # strictly increasing (Date, CreatedAt)
+    cuts = sorted(rnd.sample(range(1, len(rows)), 3)) + [len(rows)]
+    accounts = ACCOUNTS
+    events, last_key = _compute_balance_events_keyed(make_ledger(rows[:cuts[0]]), accounts)
+    for lo, hi in zip(cuts[:-1], cuts[1:]):
+        ext = extend_balance_events(events, last_key, make_ledger(rows[lo:hi], first_row=lo + 2), accounts)
+        assert ext is not None
+        events, last_key = ext
+    assert_same_events(events, reference_balance_events(make_ledger(rows), accounts))
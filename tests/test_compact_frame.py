@@ -0,0 +1,43 @@
+"""compact_tx_frame / _tx_concat_frames vs the plain-string ledger frame."""
+import random
+
+import pytest
+
+from conftest import ACCOUNTS, random_rows
+from myfin.ledger import _tx_concat_frames, compact_tx_frame
+
+CUTS = ["", "2024-12", "2025-01", "2025-02", "2025-03", "2025-04", "2026-02"]  # some not in any ledger
+
+
+def assert_month_compares_like_strings(compact, plain):
+    for cut in CUTS:
+        for op in ["__lt__", "__le__", "__gt__", "__ge__", "__eq__"]:
+            got = getattr(compact["Month"], op)(cut)
+            want = getattr(plain["Month"].astype(str), op)(cut)
+            assert got.tolist() == want.tolist(), (op, cut)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_month_compares_like_strings(make_ledger, seed):
+    rnd = random.Random(seed)
+    rows = random_rows(rnd, rnd.randrange(0, 300), bad_dates=rnd.choice([0.0, 0.1]))
+    plain = make_ledger(rows)
+    compact = compact_tx_frame(plain, ACCOUNTS)
+    assert compact["Month"].cat.ordered
+    assert_month_compares_like_strings(compact, plain)
+    if len(plain):
+        assert compact["Month"].max() == plain["Month"].astype(str).max()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_concat_keeps_month_ordered(make_ledger, seed):
+    """A compact ledger plus freshly parsed rows (the delta-sync append) stays ordered and comparable."""
+    rnd = random.Random(500 + seed)
+    rows = random_rows(rnd, rnd.randrange(1, 300))
+    k = rnd.randrange(len(rows) + 1)
+    head = make_ledger(rows[:k], compact=True)
+    tail = make_ledger(rows[k:], first_row=k + 2)  # plain strings, as parsed
+    out = _tx_concat_frames([head, tail])
+    assert out["Month"].cat.ordered
+    assert list(out["Month"].cat.categories) == sorted(out["Month"].cat.categories)
+    assert_month_compares_like_strings(out, make_ledger(rows))
@@ -0,0 +1,68 @@
+"""effective_types (one income regex) vs the original per-token normalize-and-match passes."""
+import random
+import re
+
+import pandas as pd
+import pytest
+
+from conftest import random_rows
+from myfin.ledger import effective_types
+
+PIECES = ["salary", "Salary", "SALARY", "payroll", "pay cheque", "pay-cheque", "pay_cheque", "Pay\tCheque",
+          "paycheck", "paycheque", "wages", "bonus", "bonuses", "salaryman", "unsalary", "pay", "cheque",
+          "wage", "💼", "é", "2", "#", "-", "_", " ", "  ", "ß", "İ", "K", "net", "deposit", "oct", "fizz"]
+
+
+def reference_dash_types(df: pd.DataFrame) -> pd.Series:
+    """The _dash_type_series EffectiveType replaced."""
+    if df is None or df.empty or "Type" not in df.columns:
+        return pd.Series([], dtype=str)
+
+    t = df["Type"].astype(str)
+
+    if "Category" in df.columns:
+        raw_cat = df["Category"].astype(str).fillna("").str.strip().str.lower()
+        norm_cat = raw_cat.str.replace(r"[^a-z\s]", " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip()
+        search_text = norm_cat
+        for note_col in ("Notes", "Reason/Notes", "Reason", "Description"):
+            if note_col in df.columns:
+                raw_note = df[note_col].astype(str).fillna("").str.strip().str.lower()
+                norm_note = raw_note.str.replace(r"[^a-z\s]", " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip()
+                search_text = (search_text + " " + norm_note).str.strip()
+                break
+
+        income_tokens = ("salary", "payroll", "pay cheque", "paycheck", "paycheque", "wages", "bonus")
+        is_income = pd.Series(False, index=df.index)
+        for tok in income_tokens:
+            is_income = is_income | search_text.str.contains(rf"\b{re.escape(tok)}\b", regex=True, na=False)
+
+        t = t.mask(is_income, "Credit")
+
+    return t
+
+
+def random_text(rnd: random.Random) -> str:
+    return "".join(rnd.choice(PIECES) for _ in range(rnd.randrange(0, 5)))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_reference(seed):
+    rnd = random.Random(seed)
+    n = 2000
+    df = pd.DataFrame({"Type": [rnd.choice(["Debit", "Credit", "CC Repay", "LOC Draw"]) for _ in range(n)],
+                       "Category": [random_text(rnd) for _ in range(n)],
+                       "Notes": [random_text(rnd) if rnd.random() < 0.9 else None for _ in range(n)]})
+    assert effective_types(df).tolist() == reference_dash_types(df).tolist()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_parsed_column(make_ledger, seed):
+    """The EffectiveType column a sheet read stores, plain and compacted."""
+    rnd = random.Random(100 + seed)
+    rows = random_rows(rnd, 500)
+    for r in rows:
+        if rnd.random() < 0.5:
+            r[7 if rnd.random() < 0.5 else 8] = random_text(rnd)
+    for compact in (False, True):
+        tx = make_ledger(rows, compact)
+        assert tx["EffectiveType"].astype(str).tolist() == reference_dash_types(tx).tolist()
@@ -0,0 +1,61 @@
+"""ExpenseFlags (per distinct value) vs the original _is_nonexpense_movement column scans."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import random_rows
+from myfin.analytics import _is_nonexpense_movement
+from myfin.ledger import FLAG_LOC, FLAG_MOVE_TYPE, FLAG_REMIT, FLAG_REPAY, expense_flags
+
+TYPES = ["Debit", " Debit ", "debit", "Credit", "International", "CC Repay", "LOC Draw", " LOC Repay", "Investment"]
+PAYS = ["Card", "card ", "CARD", "Bank", "Cash", ""]
+ACCOUNTS = ["Line of Credit", "line  of credit", "LineofCredit", "RBC LOC", "Blocked card", "loc", "RBC VISA", " LOC ", ""]
+CATEGORIES = ["India", "Remittance", "International Transfer", "transfer abroad", "Send Home", "CC Repayment",
+              "repay", "Groceries", "Indian food", "Transfers", "sendhome", ""]
+
+
+def reference_components(df: pd.DataFrame):
+    """_is_nonexpense_movement before ExpenseFlags, one mask per reason."""
+    cat = df.get("Category", "").astype(str).fillna("").str.strip().str.lower()
+    acc = df.get("Account", "").astype(str).fillna("").str.strip().str.lower()
+    pay = df.get("Pay", "").astype(str).fillna("").str.strip().str.lower()
+    typ = df.get("Type", "").astype(str).fillna("").str.strip()
+
+    is_move = (typ == "International") | (typ == "CC Repay") | (typ == "LOC Draw") | (typ == "LOC Repay")
+    is_loc = acc.str.contains(r"\bline\s*of\s*credit\b|\bloc\b", regex=True, na=False) & (pay == "card") & (typ == "Debit")
+    is_remit = cat.str.contains(r"india|remit|remittance|international\s*transfer|transfer\s*abroad|send\s*home", regex=True, na=False)
+    is_repay_cat = cat.str.contains(r"repay|repayment", regex=True, na=False)
+    return {FLAG_MOVE_TYPE: is_move, FLAG_LOC: is_loc, FLAG_REMIT: is_remit, FLAG_REPAY: is_repay_cat}
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_reference(seed):
+    rnd = random.Random(seed)
+    n = 3000
+    df = pd.DataFrame({"Type": [rnd.choice(TYPES) for _ in range(n)], "Pay": [rnd.choice(PAYS) for _ in range(n)],
+                       "Account": [rnd.choice(ACCOUNTS) for _ in range(n)],
+                       "Category": [rnd.choice(CATEGORIES) for _ in range(n)]})
+    flags = expense_flags(df)
+    assert flags.dtype == np.uint8
+    parts = reference_components(df)
+    for bit, want in parts.items():
+        assert ((flags & bit) != 0).tolist() == want.tolist(), bit
+    old = parts[FLAG_MOVE_TYPE] | parts[FLAG_LOC] | parts[FLAG_REMIT] | parts[FLAG_REPAY]
+    assert _is_nonexpense_movement(df).tolist() == old.tolist()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_parsed_column(make_ledger, seed):
+    """The ExpenseFlags column a sheet read stores, plain and compacted."""
+    rnd = random.Random(200 + seed)
+    rows = random_rows(rnd, 500)
+    for r in rows:
+        r[3], r[5], r[6], r[7] = rnd.choice(TYPES), rnd.choice(PAYS), rnd.choice(ACCOUNTS), rnd.choice(CATEGORIES)
+    for compact in (False, True):
+        tx = make_ledger(rows, compact)
+        parts = reference_components(tx)
+        old = parts[FLAG_MOVE_TYPE] | parts[FLAG_LOC] | parts[FLAG_REMIT] | parts[FLAG_REPAY]
+        assert (tx["ExpenseFlags"].to_numpy() != 0).tolist() == old.tolist()
+        assert _is_nonexpense_movement(tx).tolist() == old.tolist()
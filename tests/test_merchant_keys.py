@@ -0,0 +1,50 @@
+"""normalize_merchant / merchant_keys vs the original four-substitution normalizer."""
+import random
+import re
+
+import pandas as pd
+import pytest
+
+from conftest import random_rows
+from myfin.config import STOPWORDS
+from myfin.helpers import merchant_keys, normalize_merchant
+
+WORDS = sorted(STOPWORDS)[:20] + ["costco", "Costco", "UBER", "eats", "netflix.com", "tim", "hortons", "#1234",
+                                  "a1b2c", "e-transfer", "shell0042", "café", "naïve", "ok", "to", "x", "\t", " ",
+                                  " ", "_", "💳", "ßtore", "amazon*mktp", "3.99", ""]
+
+
+def reference_normalize_merchant(notes: str) -> str:
+    t = (notes or "").lower().strip()
+    t = re.sub(r"\d+", " ", t)
+    t = re.sub(r"[^a-z\s]", " ", t)
+    t = re.sub(r"\s+", " ", t).strip()
+    if not t:
+        return ""
+    words = [w for w in t.split() if w not in STOPWORDS and len(w) > 2]
+    return " ".join(words[:2]).strip() if words else ""
+
+
+def random_note(rnd: random.Random) -> str:
+    return rnd.choice(["", " ", "-"]).join(rnd.choice(WORDS) for _ in range(rnd.randrange(0, 6)))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_reference(seed):
+    rnd = random.Random(seed)
+    notes = [random_note(rnd) for _ in range(5000)] + [None, ""]
+    assert [normalize_merchant(n) for n in notes] == [reference_normalize_merchant(n) for n in notes]
+    keys = merchant_keys(pd.Series(notes, dtype=object))
+    assert keys.tolist() == [reference_normalize_merchant(n) for n in notes]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_parsed_column(make_ledger, seed):
+    """The MerchantKey column a sheet read stores, plain and compacted."""
+    rnd = random.Random(300 + seed)
+    rows = random_rows(rnd, 500)
+    for r in rows:
+        r[8] = random_note(rnd)
+    for compact in (False, True):
+        tx = make_ledger(rows, compact)
+        assert tx["MerchantKey"].astype(str).tolist() == [reference_normalize_merchant(r[8]) for r in rows]
@@ -0,0 +1,42 @@
+"""tx_hwm_patched vs the high-water mark of the patched ledger computed from scratch."""
+import random
+
+import pytest
+
+from conftest import random_rows
+from myfin.ledger import _tx_concat_frames, _tx_key_digest, tx_hwm_of, tx_hwm_patched
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("compact", [False, True])
+def test_patched_matches_full(make_ledger, seed, compact):
+    """Appends, in-place edits and deletes, as the local write paths patch them."""
+    rnd = random.Random(seed)
+    rows = random_rows(rnd, rnd.randrange(1, 200))
+    tx = make_ledger(rows, compact)
+    hwm = tx_hwm_of(tx)
+    for _ in range(6):
+        op = rnd.choice(["append", "edit", "delete"]) if len(tx) else "append"
+        if op == "append":
+            first = int(tx["_row"].max()) + 1 if len(tx) else 2
+            new = make_ledger(random_rows(rnd, rnd.randint(1, 5)), first_row=first)
+            tx = _tx_concat_frames([tx, new])
+            hwm = tx_hwm_patched(hwm, added=new)
+        elif op == "edit":
+            pos = rnd.randrange(len(tx))
+            old = tx.iloc[[pos]]
+            new = make_ledger(random_rows(rnd, 1), first_row=int(old["_row"].iat[0]))
+            tx = _tx_concat_frames([tx.iloc[:pos], new, tx.iloc[pos + 1:]])
+            hwm = tx_hwm_patched(hwm, removed=old, added=new)
+        else:
+            gone = tx["_row"].isin(rnd.sample(tx["_row"].tolist(), rnd.randint(1, min(3, len(tx)))))
+            hwm = tx_hwm_patched(hwm, removed=tx[gone])
+            tx = tx[~gone].reset_index(drop=True)
+        assert hwm == tx_hwm_of(tx, rows=hwm["rows"]), op
+
+
+def test_key_digest_matches_sheet_probe(make_ledger):
+    """The frame's key digest equals the one the delta probe computes from raw key columns."""
+    rows = random_rows(random.Random(3), 50)
+    assert tx_hwm_of(make_ledger(rows, compact=True))["digest"] == _tx_key_digest(
+        list(range(2, 52)), [r[0] for r in rows], [r[9] for r in rows])